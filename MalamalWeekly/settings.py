@@ -50,6 +50,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'custom_admin.profiler.QueryProfilerMiddleware',  # Inactive unless QUERY_PROFILER_ENABLED
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -158,3 +159,15 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 # Session settings
 SESSION_COOKIE_AGE = 86400  # 24 hours
+
+# Query profiler (custom_admin.profiler; summarize with `manage.py query_report`)
+QUERY_PROFILER_ENABLED = False
+QUERY_PROFILER_PATH = BASE_DIR / 'query_profile.jsonl'
+QUERY_BUDGET_RAISE = False  # Raise QueryBudgetExceeded instead of logging (for tests)
+QUERY_BUDGETS = {
+    'games:dashboard': 25,
+    'games:my_entries': 15,
+    'games:winners_list': 10,
+    'games:leaderboard': 15,
+    'transactions:transaction_history': 15,
+}
@@ -19,7 +19,7 @@ class UserProfileInline(admin.StackedInline):
         ('total_winnings', 'total_spent'),
         ('is_blocked', 'blocked_reason'),
     )
-    readonly_fields = ('total_deposits', 'total_withdrawals', 'total_winnings', 'total_spent')
+    readonly_fields = ('wallet_balance', 'total_deposits', 'total_withdrawals', 'total_winnings', 'total_spent')
 
 
 class UserAdmin(BaseUserAdmin):
@@ -44,7 +44,7 @@ class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'phone_number', 'wallet_balance', 'total_winnings', 'is_verified', 'is_blocked', 'created_at')
     list_filter = ('is_verified', 'is_blocked', 'created_at')
     search_fields = ('user__username', 'user__email', 'phone_number')
-    readonly_fields = ('total_deposits', 'total_withdrawals', 'total_winnings', 'total_spent', 'created_at', 'updated_at')
+    readonly_fields = ('wallet_balance', 'total_deposits', 'total_withdrawals', 'total_winnings', 'total_spent', 'created_at', 'updated_at')
     
     fieldsets = (
         ('User Information', {
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_userprofile_preferred_currency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='ledger_sequence',
+            field=models.PositiveBigIntegerField(default=0, help_text='Sequence of the last ledger posting on this wallet'),
+        ),
+    ]
@@ -1,9 +1,17 @@
 from django.db import models
+from decimal import Decimal
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 
+# Columns owned by accounts.wallet; only its guarded UPDATEs write them
+WALLET_FIELDS = (
+    'wallet_balance', 'total_deposits', 'total_withdrawals',
+    'total_winnings', 'total_spent', 'ledger_sequence',
+)
+
+
 class UserProfile(models.Model):
     """Extended user profile with wallet and additional information"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
@@ -31,6 +39,7 @@ class UserProfile(models.Model):
     total_withdrawals = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     total_winnings = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     total_spent = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    ledger_sequence = models.PositiveBigIntegerField(default=0, help_text="Sequence of the last ledger posting on this wallet")
     
     # Profile Photo
     profile_photo = models.ImageField(upload_to='profile_photos/', blank=True, null=True)
@@ -94,26 +103,43 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"{self.user.username}'s Profile"
     
+    def save(self, *args, **kwargs):
+        # A full save from a stale instance must not roll back wallet columns
+        # (or reuse a ledger sequence) written by a concurrent wallet UPDATE
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in WALLET_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
+    def _sync_wallet(self, new_balance, aggregate, amount):
+        """Mirror a wallet UPDATE onto this in-memory instance"""
+        self.wallet_balance = new_balance
+        setattr(self, aggregate, getattr(self, aggregate) + Decimal(str(amount)))
+    
     def add_credits(self, amount):
         """Add credits to user wallet"""
-        self.wallet_balance += amount
-        self.total_deposits += amount
-        self.save()
+        from .wallet import credit
+        new_balance = credit(self.user_id, amount, 'total_deposits')
+        self._sync_wallet(new_balance, 'total_deposits', amount)
+        return new_balance
     
     def deduct_credits(self, amount):
         """Deduct credits from user wallet"""
-        if self.wallet_balance >= amount:
-            self.wallet_balance -= amount
-            self.total_spent += amount
-            self.save()
-            return True
-        return False
+        from .wallet import debit
+        new_balance = debit(self.user_id, amount, 'total_spent')
+        if new_balance is None:
+            return False
+        self._sync_wallet(new_balance, 'total_spent', amount)
+        return True
     
     def add_winnings(self, amount):
         """Add winning amount to wallet"""
-        self.wallet_balance += amount
-        self.total_winnings += amount
-        self.save()
+        from .wallet import credit
+        new_balance = credit(self.user_id, amount, 'total_winnings')
+        self._sync_wallet(new_balance, 'total_winnings', amount)
+        return new_balance
 
 
 class BanAppeal(models.Model):
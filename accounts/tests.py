@@ -1,3 +1,94 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import Sum
 from django.test import TestCase
 
-# Create your tests here.
+from transactions import ledger
+from transactions.ledger_models import LedgerPosting
+
+from . import wallet
+from .models import UserProfile
+
+
+def make_user(username, balance='0.00'):
+    user = User.objects.create_user(username=username, password='x')
+    if Decimal(balance):
+        wallet.credit(user, Decimal(balance))
+    return user
+
+
+def profile(user):
+    return UserProfile.objects.get(user=user)
+
+
+class WalletTests(TestCase):
+    
+    def test_debit_that_would_overdraw_returns_none(self):
+        user = make_user('alice', '50.00')
+        postings = LedgerPosting.objects.count()
+        
+        self.assertIsNone(wallet.debit(user, Decimal('50.01')))
+        
+        self.assertEqual(profile(user).wallet_balance, Decimal('50.00'))
+        self.assertEqual(profile(user).total_spent, Decimal('0.00'))
+        self.assertEqual(LedgerPosting.objects.count(), postings)
+    
+    def test_debit_and_credit_match_the_ledger(self):
+        user = make_user('bob', '100.00')
+        
+        self.assertEqual(wallet.debit(user, Decimal('30.00')), Decimal('70.00'))
+        self.assertEqual(wallet.credit(user, Decimal('5.50'), 'total_winnings'), Decimal('75.50'))
+        
+        self.assertEqual(profile(user).wallet_balance, Decimal('75.50'))
+        self.assertEqual(ledger.balance(user), Decimal('75.50'))
+    
+    def test_non_positive_amounts_are_rejected(self):
+        user = make_user('carol', '10.00')
+        for amount in (Decimal('0.00'), Decimal('-1.00')):
+            with self.assertRaises(ValueError):
+                wallet.debit(user, amount)
+            with self.assertRaises(ValueError):
+                wallet.credit_many({user.pk: amount})
+        self.assertEqual(profile(user).wallet_balance, Decimal('10.00'))
+
+
+class CreditManyTests(TestCase):
+    
+    def setUp(self):
+        self.users = [make_user(f'winner{i}', '10.00') for i in range(3)]
+        self.amounts = {user.pk: Decimal('1.25') * (i + 1) for i, user in enumerate(self.users)}
+    
+    def test_balances_match_profiles_and_ledger(self):
+        balances = wallet.credit_many(self.amounts, 'total_winnings', memo='Prizes', batch_size=2)
+        
+        for user in self.users:
+            expected = Decimal('10.00') + self.amounts[user.pk]
+            self.assertEqual(balances[user.pk], expected)
+            self.assertEqual(profile(user).wallet_balance, expected)
+            self.assertEqual(profile(user).total_winnings, self.amounts[user.pk])
+            self.assertEqual(ledger.balance(user), expected)
+    
+    def test_postings_are_balanced_double_entries(self):
+        wallet.credit_many(self.amounts, 'total_winnings', memo='Prizes')
+        
+        prizes = LedgerPosting.objects.filter(memo='Prizes')
+        self.assertEqual(prizes.filter(account=LedgerPosting.WALLET).count(), len(self.users))
+        self.assertEqual(prizes.filter(account='prize_payouts').aggregate(total=Sum('amount'))['total'], -sum(self.amounts.values()))
+        for entry in prizes.values('entry_id').annotate(total=Sum('amount')):
+            self.assertEqual(entry['total'], Decimal('0.00'))
+    
+    def test_rebuilt_snapshots_match_wallets(self):
+        wallet.credit_many(self.amounts, 'total_winnings')
+        user_ids = [user.pk for user in self.users]
+        
+        balances = ledger.rebuild_snapshots(user_ids)
+        
+        for user in self.users:
+            self.assertEqual(balances[user.pk], (profile(user).ledger_sequence, profile(user).wallet_balance))
+        
+        out = StringIO()
+        call_command('rebuild_balance_snapshots', '--verify', stdout=out)
+        self.assertIn('Ledger balances match wallet balances', out.getvalue())
@@ -6,6 +6,7 @@ from django.db.models import Sum
 from django.utils import timezone
 from .forms import UserRegistrationForm, UserLoginForm, UserProfileForm, UserUpdateForm, KYCSubmissionForm
 from .models import UserProfile
+from games import rank_index
 from games.models import Leaderboard
 from transactions.models import Transaction
 
@@ -128,6 +129,7 @@ def profile(request):
         leaderboard = Leaderboard.objects.get(user=user)
     except Leaderboard.DoesNotExist:
         leaderboard = Leaderboard.objects.create(user=user)
+    leaderboard.rank = rank_index.index.rank_of(user.pk)
     
     context = {
         'profile': profile,
@@ -0,0 +1,175 @@
+"""
+Wallet mutation helpers.
+
+Every balance change is a single conditional UPDATE on the profile row:
+    
+    UPDATE accounts_userprofile
+       SET wallet_balance = wallet_balance - X, total_spent = total_spent + X
+     WHERE user_id = ... AND wallet_balance >= X
+
+Only the balance, the matching running total and updated_at are written, so
+concurrent game entries can neither lose updates nor overdraw the wallet, and
+no other profile column is clobbered by a stale in-memory copy.
+
+The same statement bumps the profile's ledger_sequence, and the matching
+double-entry postings are appended to transactions.ledger in the same
+transaction. wallet_balance remains the overdraft guard; the ledger is the
+audit trail the balance can be rebuilt and reconciled from.
+"""
+import sqlite3
+from decimal import Decimal
+
+from django.db import connections, router, transaction
+from django.db.models import Case, DecimalField, F, Value, When, sql
+from django.utils import timezone
+
+from transactions import ledger
+
+from .models import UserProfile
+
+
+AGGREGATE_FIELDS = ('total_deposits', 'total_withdrawals', 'total_winnings', 'total_spent')
+
+TWO_PLACES = Decimal('0.01')
+
+
+def _user_id(user):
+    """Accept a User instance or a raw user id"""
+    return getattr(user, 'pk', user)
+
+
+def _supports_update_returning(connection):
+    """UPDATE ... RETURNING is available on PostgreSQL and SQLite 3.35+ (not MySQL/MariaDB)"""
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return sqlite3.sqlite_version_info >= (3, 35, 0)
+    return False
+
+
+def _apply(user, amount, aggregate, debit, memo=''):
+    """Run the guarded UPDATE, append the ledger postings and return the new
+    balance, or None if the UPDATE matched no row"""
+    if aggregate not in AGGREGATE_FIELDS:
+        raise ValueError(f"Unknown wallet aggregate: {aggregate}")
+    
+    amount = Decimal(str(amount))
+    if amount <= 0:
+        raise ValueError("Amount must be positive")
+    
+    using = router.db_for_write(UserProfile)
+    connection = connections[using]
+    user_id = _user_id(user)
+    
+    queryset = UserProfile.objects.using(using).filter(user_id=user_id)
+    if debit:
+        queryset = queryset.filter(wallet_balance__gte=amount)
+    
+    values = {
+        'wallet_balance': F('wallet_balance') - amount if debit else F('wallet_balance') + amount,
+        aggregate: F(aggregate) + amount,
+        'ledger_sequence': F('ledger_sequence') + 1,
+        'updated_at': timezone.now(),
+    }
+    
+    with transaction.atomic(using=using):
+        if _supports_update_returning(connection):
+            # Same statement QuerySet.update() would run, plus RETURNING: one round trip
+            query = queryset.query.chain(sql.UpdateQuery)
+            query.add_update_values(values)
+            update_sql, params = query.get_compiler(using).as_sql()
+            columns = ', '.join(
+                connection.ops.quote_name(UserProfile._meta.get_field(name).column)
+                for name in ('wallet_balance', 'ledger_sequence')
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f"{update_sql} RETURNING {columns}", params)
+                row = cursor.fetchone()
+        else:
+            # MySQL has no UPDATE ... RETURNING; the row lock taken by the UPDATE
+            # keeps the follow-up read exact until the transaction commits.
+            row = None
+            if queryset.update(**values):
+                row = UserProfile.objects.using(using).filter(
+                    user_id=user_id
+                ).values_list('wallet_balance', 'ledger_sequence').get()
+        
+        if row is None:
+            return None
+        
+        balance = Decimal(str(row[0])).quantize(TWO_PLACES)
+        # The profile row stays locked until commit, so the sequence is ours alone
+        ledger.record(user_id, row[1], -amount if debit else amount, aggregate, balance, memo, using=using)
+    
+    return balance
+
+
+def credit(user, amount, aggregate='total_deposits', memo=''):
+    """Add amount to the wallet and to the given running total.
+    
+    Returns:
+        Decimal: the new wallet balance
+    """
+    balance = _apply(user, amount, aggregate, debit=False, memo=memo)
+    if balance is None:
+        raise UserProfile.DoesNotExist(f"No profile for user {_user_id(user)}")
+    return balance
+
+
+def debit(user, amount, aggregate='total_spent', memo=''):
+    """Remove amount from the wallet if (and only if) the balance covers it.
+    
+    Returns:
+        Decimal: the new wallet balance, or None when funds are insufficient
+    """
+    return _apply(user, amount, aggregate, debit=True, memo=memo)
+
+
+def credit_many(amounts, aggregate='total_winnings', memo='', batch_size=500):
+    """Credit several wallets with one CASE UPDATE per batch.
+    
+    Args:
+        amounts: {user_id: amount}
+    
+    Returns:
+        dict: {user_id: new wallet balance}
+    """
+    if aggregate not in AGGREGATE_FIELDS:
+        raise ValueError(f"Unknown wallet aggregate: {aggregate}")
+    
+    amounts = {user_id: Decimal(str(amount)) for user_id, amount in amounts.items()}
+    if any(amount <= 0 for amount in amounts.values()):
+        raise ValueError("Amount must be positive")
+    
+    using = router.db_for_write(UserProfile)
+    user_ids = sorted(amounts)  # consistent lock order across concurrent settlements
+    balances = {}
+    
+    with transaction.atomic(using=using):
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            delta = Case(
+                *[When(user_id=user_id, then=Value(amounts[user_id])) for user_id in batch],
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            )
+            updated = UserProfile.objects.using(using).filter(user_id__in=batch).update(
+                wallet_balance=F('wallet_balance') + delta,
+                **{aggregate: F(aggregate) + delta},
+                ledger_sequence=F('ledger_sequence') + 1,
+                updated_at=timezone.now(),
+            )
+            if updated != len(batch):
+                raise UserProfile.DoesNotExist("Missing profile for one or more users")
+            
+            # Rows stay locked by the UPDATE, so these are exactly our results
+            rows = UserProfile.objects.using(using).filter(user_id__in=batch).values_list(
+                'user_id', 'wallet_balance', 'ledger_sequence'
+            )
+            movements = []
+            for user_id, balance, sequence in rows:
+                balance = Decimal(str(balance)).quantize(TWO_PLACES)
+                balances[user_id] = balance
+                movements.append((user_id, sequence, amounts[user_id], balance))
+            ledger.record_many(movements, aggregate, memo, using=using)
+    
+    return balances
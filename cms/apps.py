@@ -5,3 +5,7 @@ class CmsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cms'
     verbose_name = 'Content Management'
+    
+    def ready(self):
+        from . import signals
+        signals.connect()
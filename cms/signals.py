@@ -0,0 +1,16 @@
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_save
+
+from . import snapshot
+from .models import Page, SiteSettings, SocialLink
+
+
+def _changed(sender, **kwargs):
+    # After commit, so a rebuild can't cache the old rows again
+    db_transaction.on_commit(snapshot.invalidate)
+
+
+def connect():
+    for model in (Page, SocialLink, SiteSettings):
+        post_save.connect(_changed, sender=model, dispatch_uid=f'cms_snapshot_save_{model._meta.label}')
+        post_delete.connect(_changed, sender=model, dispatch_uid=f'cms_snapshot_delete_{model._meta.label}')
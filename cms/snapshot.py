@@ -0,0 +1,88 @@
+"""
+Cached snapshot of the CMS data every page renders (site settings, footer
+pages, social links).
+
+Each process keeps the snapshot in memory and only looks at the shared
+cache's version number every CMS_SNAPSHOT_CHECK_SECONDS. The snapshot itself
+is stored in the cache under that version, so after an edit one process
+rebuilds it (three queries) and the others load it from the cache.
+Saving or deleting a Page, SocialLink or SiteSettings bumps the version
+(see cms.signals).
+
+Without a shared cache backend the version is per-process too; the local
+copy is then also rebuilt every CMS_SNAPSHOT_MAX_AGE seconds.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Page, SiteSettings, SocialLink
+
+
+VERSION_KEY = 'cms:snapshot:version'
+
+# {'version', 'snapshot', 'checked_at', 'built_at'} of this process
+_state = None
+
+
+def _snapshot_key(version):
+    return f'cms:snapshot:{version}'
+
+
+def build():
+    """Read the snapshot from the database"""
+    pages = list(Page.objects.filter(
+        is_active=True,
+        show_in_footer=True,
+        footer_section__in=('quick_links', 'information'),
+    ))
+    return {
+        'site_settings': SiteSettings.get_settings(),
+        'footer_quick_links': [page for page in pages if page.footer_section == 'quick_links'],
+        'footer_information_pages': [page for page in pages if page.footer_section == 'information'],
+        'social_links': list(SocialLink.objects.filter(is_active=True)),
+    }
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Unknown version (cold or evicted cache): start a new one rather than reusing 1
+        cache.add(VERSION_KEY, time.time_ns())
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def get():
+    """The current snapshot, from memory when possible"""
+    global _state
+    now = time.monotonic()
+    state = _state
+    check_every = getattr(settings, 'CMS_SNAPSHOT_CHECK_SECONDS', 5)
+    max_age = getattr(settings, 'CMS_SNAPSHOT_MAX_AGE', 300)
+    
+    if state is not None and now - state['checked_at'] < check_every and now - state['built_at'] < max_age:
+        return state['snapshot']
+    
+    version = _version()
+    if state is not None and state['version'] == version and now - state['built_at'] < max_age:
+        state['checked_at'] = now
+        return state['snapshot']
+    
+    snapshot = cache.get(_snapshot_key(version))
+    if snapshot is None or (state is not None and state['version'] == version):
+        snapshot = build()
+        cache.set(_snapshot_key(version), snapshot, max_age)
+    _state = {'version': version, 'snapshot': snapshot, 'checked_at': now, 'built_at': now}
+    return snapshot
+
+
+def invalidate():
+    """Start a new version; every process picks it up on its next check"""
+    global _state
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns())
+    _state = None
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CustomAdminConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'custom_admin'
+    
+    def ready(self):
+        from . import signals
+        signals.connect()
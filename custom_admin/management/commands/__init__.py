@@ -0,0 +1 @@
+# Keep this file empty to make this directory a Python package
@@ -0,0 +1,91 @@
+from django.core.management.base import BaseCommand, CommandError
+from custom_admin import profiler
+
+
+SORT_KEYS = {
+    'queries': 'avg_queries',
+    'max-queries': 'max_queries',
+    'duplicates': 'avg_duplicate_queries',
+    'db-time': 'avg_db_ms',
+    'template-time': 'avg_template_ms',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Summarize the requests recorded by QueryProfilerMiddleware per view: query count, '
+        'repeated queries, DB and template time, and views over their QUERY_BUDGETS entry.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            help='Profile file to read (default: QUERY_PROFILER_PATH)',
+        )
+        parser.add_argument(
+            '--sort',
+            choices=SORT_KEYS,
+            default='queries',
+            help='Order views by this average, highest first (default: queries)',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=20,
+            help='Number of views to show (default: 20)',
+        )
+        parser.add_argument(
+            '--duplicates',
+            type=int,
+            default=3,
+            help='Most repeated queries to show per view (default: 3)',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Exit with an error if any recorded request went over its query budget',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Empty the profile file after reporting',
+        )
+    
+    def handle(self, *args, **options):
+        path = options['path'] or profiler.profile_path()
+        records = profiler.read(path)
+        if not records:
+            self.stdout.write(f'No requests recorded in {path}')
+            return
+        
+        views = sorted(profiler.summarize(records), key=lambda view: view[SORT_KEYS[options['sort']]], reverse=True)
+        self.stdout.write(f'{len(records)} request(s) to {len(views)} view(s) in {path}\n')
+        self.stdout.write(
+            f'{"View":<40} {"Reqs":>5} {"Queries":>8} {"Max":>5} {"Dupes":>6} '
+            f'{"DB ms":>8} {"Tmpl ms":>8} {"Budget":>7}'
+        )
+        for view in views[:options['top']]:
+            budget = '-' if view['budget'] is None else str(view['budget'])
+            line = (
+                f'{view["view"][:40]:<40} {view["requests"]:>5} {view["avg_queries"]:>8.1f} '
+                f'{view["max_queries"]:>5} {view["avg_duplicate_queries"]:>6.1f} '
+                f'{view["avg_db_ms"]:>8.1f} {view["avg_template_ms"]:>8.1f} {budget:>7}'
+            )
+            self.stdout.write(self.style.ERROR(line) if view['over_budget'] else line)
+            for sql, count in view['duplicates'].most_common(options['duplicates']):
+                self.stdout.write(f'    {count}x {sql[:160]}')
+        
+        if options['clear']:
+            open(path, 'w').close()
+        
+        over = [view for view in views if view['over_budget']]
+        if over:
+            summary = ', '.join(
+                f'{view["view"]} ({view["over_budget"]} request(s), max {view["max_queries"]} > {view["budget"]})'
+                for view in over
+            )
+            if options['check']:
+                raise CommandError(f'Over query budget: {summary}')
+            self.stdout.write(self.style.WARNING(f'Over query budget: {summary}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✓ No view over its query budget'))
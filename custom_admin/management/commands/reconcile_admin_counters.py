@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from custom_admin import sidebar
+
+
+class Command(BaseCommand):
+    help = 'Recompute the cached admin sidebar counters from the database (corrects drift; run periodically)'
+    
+    def handle(self, *args, **options):
+        drifted = sidebar.reconcile()
+        for name, (cached, actual) in sorted(drifted.items()):
+            self.stdout.write(f'  {name}: {"not cached" if cached is None else cached} -> {actual}')
+        self.stdout.write(self.style.SUCCESS(f'✓ Counters reconciled ({len(drifted)} corrected)'))
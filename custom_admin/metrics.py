@@ -0,0 +1,131 @@
+"""
+Admin dashboard metrics.
+
+Every status breakdown is one conditional aggregate per table
+(Count/Sum with filter=Q(...)); transaction totals and the 7-day chart are
+GROUP BYs over the daily transaction rollups, so a full refresh is about a
+dozen small queries whatever the data size. The result is cached for
+DASHBOARD_METRICS_CACHE_SECONDS and served as JSON by the dashboard_metrics
+view; the dashboard page itself only renders its shell and fills the
+numbers in from there.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from accounts.models import BanAppeal, UserProfile
+from cms.models import Page
+from games.models import Game
+from transactions import rollups
+from transactions.models import DailyTransactionRollup, DepositRequest, PaymentGateway, WithdrawalRequest
+
+
+CACHE_KEY = 'custom_admin:dashboard_metrics'
+
+CHART_TYPES = ('deposit', 'withdrawal', 'game_entry')
+
+
+def cache_seconds():
+    return getattr(settings, 'DASHBOARD_METRICS_CACHE_SECONDS', 30)
+
+
+def cached():
+    """The cached metrics, or None if they expired"""
+    return cache.get(CACHE_KEY)
+
+
+def get(refresh=False):
+    """Dashboard metrics, recomputed at most once per cache period unless refresh is set"""
+    metrics = None if refresh else cached()
+    if metrics is None:
+        metrics = compute()
+        cache.set(CACHE_KEY, metrics, cache_seconds())
+    return metrics
+
+
+def _money(value):
+    return str((value or Decimal('0')).quantize(Decimal('0.01')))
+
+
+def compute(now=None):
+    """Compute every dashboard number (JSON-serializable; amounts as 2-decimal strings)"""
+    now = now or timezone.now()
+    
+    users = User.objects.aggregate(
+        total=Count('pk', filter=Q(is_staff=False)),
+        new=Count('pk', filter=Q(is_staff=False, date_joined__gte=now - timedelta(days=30))),
+    )
+    games = Game.objects.aggregate(
+        total=Count('pk'),
+        active=Count('pk', filter=Q(status='active')),
+    )
+    completed = {transaction_type: amount for transaction_type, (_, amount) in rollups.totals().items()}
+    total_transactions = DailyTransactionRollup.objects.aggregate(total=Sum('transaction_count'))['total'] or 0
+    kyc = UserProfile.objects.aggregate(
+        pending=Count('pk', filter=Q(kyc_status='pending')),
+        verified=Count('pk', filter=Q(kyc_status='verified')),
+        rejected=Count('pk', filter=Q(kyc_status='rejected')),
+        not_submitted=Count('pk', filter=Q(kyc_status='not_submitted')),
+    )
+    appeals = BanAppeal.objects.aggregate(
+        pending=Count('pk', filter=Q(status='pending')),
+        approved=Count('pk', filter=Q(status='approved')),
+        rejected=Count('pk', filter=Q(status='rejected')),
+    )
+    gateways = PaymentGateway.objects.aggregate(
+        total=Count('pk'),
+        active=Count('pk', filter=Q(is_active=True)),
+    )
+    pages = Page.objects.aggregate(
+        total=Count('pk'),
+        active=Count('pk', filter=Q(is_active=True)),
+    )
+    
+    return {
+        'total_users': users['total'],
+        'new_users_count': users['new'],
+        'total_games': games['total'],
+        'active_games': games['active'],
+        'total_transactions': total_transactions,
+        'total_deposits': _money(completed.get('deposit')),
+        'total_withdrawals': _money(completed.get('withdrawal')),
+        'total_game_entries': _money(completed.get('game_entry')),
+        'pending_deposits': DepositRequest.objects.filter(status='pending').count(),
+        'pending_withdrawals': WithdrawalRequest.objects.filter(status='pending').count(),
+        'kyc_pending': kyc['pending'],
+        'kyc_verified': kyc['verified'],
+        'kyc_rejected': kyc['rejected'],
+        'kyc_not_submitted': kyc['not_submitted'],
+        'pending_appeals': appeals['pending'],
+        'approved_appeals': appeals['approved'],
+        'rejected_appeals': appeals['rejected'],
+        'active_gateways': gateways['active'],
+        'total_gateways': gateways['total'],
+        'total_pages': pages['total'],
+        'active_pages': pages['active'],
+        'daily_transactions': daily_transactions(now),
+        'generated_at': now.isoformat(),
+    }
+
+
+def daily_transactions(now, days=7):
+    """Completed deposit/withdrawal/game entry totals per day, oldest first (one query on the rollups)"""
+    today = timezone.localdate(now)
+    first_day = today - timedelta(days=days - 1)
+    totals = rollups.daily(first_day, today, transaction_types=CHART_TYPES)
+    
+    series = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        series.append({
+            'date': day.strftime('%b %d'),
+            'deposits': float(totals.get((day, 'deposit')) or 0),
+            'withdrawals': float(totals.get((day, 'withdrawal')) or 0),
+            'game_entries': float(totals.get((day, 'game_entry')) or 0),
+        })
+    return series
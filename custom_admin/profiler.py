@@ -0,0 +1,232 @@
+"""
+Opt-in per-request query profiler.
+
+With QUERY_PROFILER_ENABLED set, QueryProfilerMiddleware records for every
+request the view name, query count, repeated queries (by fingerprint: the
+SQL with its literals replaced by '?'), total DB time and template render
+time, and appends them as one JSON line to QUERY_PROFILER_PATH. The
+query_report command summarizes that file per view.
+
+QUERY_BUDGETS maps view names ('games:my_entries') to the most queries a
+request to them may run. Requests over budget are logged as warnings; with
+QUERY_BUDGET_RAISE set (e.g. in test settings) they raise
+QueryBudgetExceeded instead, which fails the test that made the request.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+
+
+logger = logging.getLogger(__name__)
+
+# The profile of the request being handled in this thread/task, if any
+_current = ContextVar('query_profile', default=None)
+
+_write_lock = threading.Lock()
+_template_timing_installed = False
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)')
+
+
+class QueryBudgetExceeded(Exception):
+    """A view ran more queries than its QUERY_BUDGETS entry allows"""
+
+
+def fingerprint(sql):
+    """The query with its literal values replaced, so repeats of one query compare equal"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    return _IN_LIST.sub('(...)', sql)
+
+
+def profile_path():
+    return Path(getattr(settings, 'QUERY_PROFILER_PATH', settings.BASE_DIR / 'query_profile.jsonl'))
+
+
+def budget_for(view_name):
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+
+
+class RequestProfile:
+    """Queries and timings of one request"""
+    
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.fingerprints = Counter()
+    
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.query_count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+    
+    def duplicates(self):
+        """{fingerprint: times run} of the queries run more than once"""
+        return {sql: count for sql, count in self.fingerprints.most_common() if count > 1}
+    
+    def as_record(self, request, response, view_name, total_time):
+        duplicates = self.duplicates()
+        return {
+            'view': view_name,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': self.query_count,
+            'duplicate_queries': sum(count - 1 for count in duplicates.values()),
+            'duplicates': duplicates,
+            'db_ms': round(self.db_time * 1000, 2),
+            'template_ms': round(self.template_time * 1000, 2),
+            'total_ms': round(total_time * 1000, 2),
+            'budget': budget_for(view_name),
+            'at': time.time(),
+        }
+
+
+def _install_template_timing():
+    """Time Template.render; only the outermost render of a request counts (includes nest)"""
+    global _template_timing_installed
+    if _template_timing_installed:
+        return
+    original_render = Template.render
+    
+    def render(self, context):
+        profile = _current.get()
+        if profile is None:
+            return original_render(self, context)
+        profile.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original_render(self, context)
+        finally:
+            profile.template_depth -= 1
+            if profile.template_depth == 0:
+                profile.template_time += time.perf_counter() - started
+    
+    Template.render = render
+    _template_timing_installed = True
+
+
+def write(record):
+    line = json.dumps(record, default=str) + '\n'
+    with _write_lock:
+        with open(profile_path(), 'a', encoding='utf-8') as sink:
+            sink.write(line)
+
+
+def read(path=None):
+    """The recorded requests, oldest first (lines that don't parse are skipped)"""
+    path = Path(path) if path else profile_path()
+    if not path.exists():
+        return []
+    records = []
+    with open(path, encoding='utf-8') as sink:
+        for line in sink:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def summarize(records):
+    """Per-view totals of the recorded requests.
+    
+    Returns:
+        list: one dict per view with request count, average/max queries,
+              duplicate queries, DB and template time, budget and requests over it
+    """
+    views = {}
+    for record in records:
+        view = views.setdefault(record['view'], {
+            'view': record['view'],
+            'requests': 0,
+            'queries': 0,
+            'max_queries': 0,
+            'duplicate_queries': 0,
+            'db_ms': 0.0,
+            'template_ms': 0.0,
+            'budget': None,
+            'over_budget': 0,
+            'duplicates': Counter(),
+        })
+        view['requests'] += 1
+        view['queries'] += record['queries']
+        view['max_queries'] = max(view['max_queries'], record['queries'])
+        view['duplicate_queries'] += record['duplicate_queries']
+        view['db_ms'] += record['db_ms']
+        view['template_ms'] += record['template_ms']
+        view['duplicates'].update(record.get('duplicates', {}))
+        budget = budget_for(record['view'])
+        if budget is None:
+            budget = record.get('budget')
+        view['budget'] = budget
+        if budget is not None and record['queries'] > budget:
+            view['over_budget'] += 1
+    
+    for view in views.values():
+        requests = view['requests']
+        view['avg_queries'] = view['queries'] / requests
+        view['avg_duplicate_queries'] = view['duplicate_queries'] / requests
+        view['avg_db_ms'] = view['db_ms'] / requests
+        view['avg_template_ms'] = view['template_ms'] / requests
+    return list(views.values())
+
+
+class QueryProfilerMiddleware:
+    """Record each request's queries and timings (only when QUERY_PROFILER_ENABLED is set)"""
+    
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_PROFILER_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        _install_template_timing()
+    
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            with connections['default'].execute_wrapper(profile):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total_time = time.perf_counter() - started
+        
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.view_name if match else None) or request.path
+        record = profile.as_record(request, response, view_name, total_time)
+        try:
+            write(record)
+        except OSError:
+            logger.exception('Could not write query profile to %s', profile_path())
+        
+        budget = record['budget']
+        if budget is not None and record['queries'] > budget:
+            message = (
+                f'{view_name} ran {record["queries"]} queries (budget {budget}, '
+                f'{record["duplicate_queries"]} repeated)'
+            )
+            if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
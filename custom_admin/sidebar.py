@@ -0,0 +1,159 @@
+"""
+Admin sidebar counters, served from the cache.
+
+Each counter is a cached COUNT that custom_admin.signals keeps current:
+saves and deletes of the counted models adjust it by +1/-1 once their
+transaction commits (a status change out of 'pending' is a -1, and so on).
+Transactions of the last 24 hours are counted in hourly cache buckets that
+new transactions increment, so the sliding window never needs a query.
+
+A missing counter is recomputed on first read. reconcile() recomputes all
+of them (run reconcile_admin_counters periodically), and every counter also
+expires after ADMIN_COUNTERS_MAX_AGE seconds, which bounds drift from bulk
+updates that send no signals, or from per-process caches when no shared
+cache backend is configured.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from accounts.models import BanAppeal, UserProfile
+from cms.models import Page
+from games.models import Game
+from transactions.currency_models import Currency
+from transactions.models import DepositRequest, Transaction, WithdrawalRequest
+
+
+KEY_PREFIX = 'admin_sidebar:'
+
+# Context name: (model, filter that selects the counted rows)
+COUNTERS = {
+    'total_users_count': (User, {'is_staff': False, 'is_superuser': False}),
+    'pending_deposits_count': (DepositRequest, {'status': 'pending'}),
+    'pending_withdrawals_count': (WithdrawalRequest, {'status': 'pending'}),
+    'pending_kyc_count': (UserProfile, {'kyc_status': 'pending'}),
+    'active_games_count': (Game, {'status': 'active'}),
+    'pending_appeals_count': (BanAppeal, {'status': 'pending'}),
+    'total_cms_pages_count': (Page, {}),
+    'total_currencies_count': (Currency, {}),
+}
+
+RECENT_HOURS = 24
+
+
+def max_age():
+    return getattr(settings, 'ADMIN_COUNTERS_MAX_AGE', 300)
+
+
+def counters_for(model):
+    """Names of the counters that count rows of this model"""
+    return [name for name, (counted_model, _) in COUNTERS.items() if counted_model is model]
+
+
+def is_counted(name, instance):
+    """Whether the instance matches the counter's filter (None if those fields aren't loaded)"""
+    _, filters = COUNTERS[name]
+    if any(field not in instance.__dict__ for field in filters):
+        return None
+    return all(getattr(instance, field) == value for field, value in filters.items())
+
+
+def _count(name):
+    model, filters = COUNTERS[name]
+    return model.objects.filter(**filters).count()
+
+
+def adjust(name, delta):
+    """Add delta to a cached counter (a missing counter is recomputed on next read)"""
+    try:
+        cache.incr(KEY_PREFIX + name, delta)
+    except ValueError:
+        pass
+
+
+def invalidate(*names):
+    cache.delete_many([KEY_PREFIX + name for name in names or COUNTERS])
+
+
+def _hour(when):
+    return int(when.timestamp() // 3600)
+
+
+def _hour_key(hour):
+    return f'{KEY_PREFIX}transactions:{hour}'
+
+
+def transactions_created(created_at_values):
+    """Count new transactions into their hourly buckets"""
+    per_hour = {}
+    for created_at in created_at_values:
+        hour = _hour(created_at)
+        per_hour[hour] = per_hour.get(hour, 0) + 1
+    for hour, count in per_hour.items():
+        try:
+            cache.incr(_hour_key(hour), count)
+        except ValueError:
+            pass
+
+
+def _fill_hours(now):
+    """Recompute the hourly transaction buckets of the window (one GROUP BY)"""
+    current = _hour(now)
+    hours = range(current - RECENT_HOURS + 1, current + 1)
+    since = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=RECENT_HOURS - 1)
+    counts = {
+        _hour(row['hour']): row['count']
+        for row in Transaction.objects.filter(created_at__gte=since).annotate(
+            hour=TruncHour('created_at'),
+        ).values('hour').annotate(count=Count('pk'))
+    }
+    buckets = {_hour_key(hour): counts.get(hour, 0) for hour in hours}
+    cache.set_many(buckets, (RECENT_HOURS + 1) * 3600)
+    return buckets
+
+
+def get_counts(now=None):
+    """Every sidebar counter in one cache read; only missing ones hit the database"""
+    now = now or timezone.now()
+    current = _hour(now)
+    hour_keys = [_hour_key(hour) for hour in range(current - RECENT_HOURS + 1, current + 1)]
+    keys = [KEY_PREFIX + name for name in COUNTERS]
+    cached = cache.get_many(keys + hour_keys)
+    
+    counts, missing = {}, {}
+    for name in COUNTERS:
+        value = cached.get(KEY_PREFIX + name)
+        if value is None:
+            value = missing[KEY_PREFIX + name] = _count(name)
+        counts[name] = value
+    if missing:
+        cache.set_many(missing, max_age())
+    
+    if any(key not in cached for key in hour_keys):
+        cached.update(_fill_hours(now))
+    # Whole hours: the window is between 23 and 24 hours long
+    counts['recent_transactions_count'] = sum(cached[key] for key in hour_keys)
+    return counts
+
+
+def reconcile(now=None):
+    """Recompute every counter from the database.
+    
+    Returns:
+        dict: {name: (cached value or None, actual value)} for counters that had drifted
+    """
+    now = now or timezone.now()
+    cached = cache.get_many([KEY_PREFIX + name for name in COUNTERS])
+    actual = {name: _count(name) for name in COUNTERS}
+    cache.set_many({KEY_PREFIX + name: value for name, value in actual.items()}, max_age())
+    _fill_hours(now)
+    return {
+        name: (cached.get(KEY_PREFIX + name), value)
+        for name, value in actual.items()
+        if cached.get(KEY_PREFIX + name) != value
+    }
@@ -0,0 +1,60 @@
+"""
+Keep the cached admin sidebar counters (custom_admin.sidebar) current.
+
+post_init remembers whether each loaded row is counted; post_save and
+post_delete compare and adjust the counters after the transaction commits,
+so rolled-back changes never move them.
+"""
+from functools import partial
+
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_init, post_save
+
+from transactions.models import Transaction
+from transactions.signals import transactions_bulk_created
+
+from . import sidebar
+
+
+def _remember(sender, instance, **kwargs):
+    instance._sidebar_counted = {name: sidebar.is_counted(name, instance) for name in sidebar.counters_for(sender)}
+
+
+def _changed(sender, instance, created, **kwargs):
+    before_all = getattr(instance, '_sidebar_counted', {})
+    for name in sidebar.counters_for(sender):
+        before = False if created else before_all.get(name)
+        after = sidebar.is_counted(name, instance)
+        if before is None or after is None:
+            db_transaction.on_commit(partial(sidebar.invalidate, name))
+        elif before != after:
+            db_transaction.on_commit(partial(sidebar.adjust, name, 1 if after else -1))
+    _remember(sender, instance)
+
+
+def _deleted(sender, instance, **kwargs):
+    before_all = getattr(instance, '_sidebar_counted', {})
+    for name in sidebar.counters_for(sender):
+        before = before_all.get(name)
+        if before is None:
+            db_transaction.on_commit(partial(sidebar.invalidate, name))
+        elif before:
+            db_transaction.on_commit(partial(sidebar.adjust, name, -1))
+
+
+def _transaction_saved(sender, instance, created, **kwargs):
+    if created:
+        db_transaction.on_commit(partial(sidebar.transactions_created, [instance.created_at]))
+
+
+def _transactions_bulk_created(sender, transactions, **kwargs):
+    db_transaction.on_commit(partial(sidebar.transactions_created, [txn.created_at for txn in transactions]))
+
+
+def connect():
+    for model in {model for model, _ in sidebar.COUNTERS.values()}:
+        post_init.connect(_remember, sender=model, dispatch_uid=f'sidebar_remember_{model._meta.label}')
+        post_save.connect(_changed, sender=model, dispatch_uid=f'sidebar_changed_{model._meta.label}')
+        post_delete.connect(_deleted, sender=model, dispatch_uid=f'sidebar_deleted_{model._meta.label}')
+    post_save.connect(_transaction_saved, sender=Transaction, dispatch_uid='sidebar_transaction_saved')
+    transactions_bulk_created.connect(_transactions_bulk_created, sender=Transaction, dispatch_uid='sidebar_transactions_bulk_created')
@@ -15,6 +15,7 @@ urlpatterns = [
     
     # Dashboard
     path('', views.admin_dashboard, name='dashboard'),
+    path('dashboard/metrics/', views.dashboard_metrics, name='dashboard_metrics'),
     
     # Users
     path('users/', views.users_list, name='users_list'),
@@ -39,9 +40,11 @@ urlpatterns = [
     path('games/<int:game_id>/create-round/', views.create_new_round, name='create_new_round'),
     path('rounds/<int:round_id>/close/', views.close_round, name='close_round'),
     path('rounds/<int:round_id>/select-winner/', views.select_winner, name='select_winner'),
+    path('rounds/<int:round_id>/resolution-status/', views.round_resolution_status, name='round_resolution_status'),
     
     # Transactions
     path('transactions/', views.transactions_list, name='transactions_list'),
+    path('transactions/export/', views.transactions_export, name='transactions_export'),
     
     # Ban Appeals
     path('appeals/', views.ban_appeals_list, name='ban_appeals_list'),
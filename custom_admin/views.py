@@ -2,15 +2,21 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
-from django.db.models import Sum, Count, Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.db import transaction as db_transaction
+from django.db.models import Count, Q
 from django.utils import timezone
-from datetime import timedelta
-import json
+from datetime import date, timedelta
+from collections import defaultdict
+from accounts import wallet
 from accounts.models import UserProfile, BanAppeal
-from games.models import Game, GameRound, UserEntry, Winner
+from games import counters, jobs
+from games.models import MIN_ROUND_DURATION_SECONDS, Game, GameRound, RoundResolutionJob, UserEntry, Winner
+from transactions import exports
 from transactions.models import Transaction, DepositRequest, WithdrawalRequest, PaymentGateway
 from django.contrib.auth.models import User
 from cms.models import Page, SocialLink, SiteSettings
+from . import metrics
 
 
 def is_admin(user):
@@ -51,56 +57,7 @@ def admin_logout_view(request):
 @login_required
 @user_passes_test(is_admin, login_url='/admin-panel/login/')
 def admin_dashboard(request):
-    """Main admin dashboard"""
-    from datetime import timedelta
-    from django.utils import timezone
-    from cms.models import Page
-    
-    # Statistics
-    total_users = User.objects.filter(is_staff=False).count()
-    total_games = Game.objects.count()
-    active_games = Game.objects.filter(status='active').count()
-    total_transactions = Transaction.objects.count()
-    
-    # Financial stats
-    total_deposits = Transaction.objects.filter(
-        transaction_type='deposit', 
-        status='completed'
-    ).aggregate(Sum('amount'))['amount__sum'] or 0
-    
-    total_withdrawals = Transaction.objects.filter(
-        transaction_type='withdrawal', 
-        status='completed'
-    ).aggregate(Sum('amount'))['amount__sum'] or 0
-    
-    total_game_entries = Transaction.objects.filter(
-        transaction_type='game_entry', 
-        status='completed'
-    ).aggregate(Sum('amount'))['amount__sum'] or 0
-    
-    # Pending requests
-    pending_deposits = DepositRequest.objects.filter(status='pending').count()
-    pending_withdrawals = WithdrawalRequest.objects.filter(status='pending').count()
-    
-    # KYC Statistics
-    kyc_pending = UserProfile.objects.filter(kyc_status='pending').count()
-    kyc_verified = UserProfile.objects.filter(kyc_status='verified').count()
-    kyc_rejected = UserProfile.objects.filter(kyc_status='rejected').count()
-    kyc_not_submitted = UserProfile.objects.filter(kyc_status='not_submitted').count()
-    
-    # Ban Appeals Statistics
-    pending_appeals = BanAppeal.objects.filter(status='pending').count()
-    approved_appeals = BanAppeal.objects.filter(status='approved').count()
-    rejected_appeals = BanAppeal.objects.filter(status='rejected').count()
-    
-    # Payment Gateway Statistics
-    active_gateways = PaymentGateway.objects.filter(is_active=True).count()
-    total_gateways = PaymentGateway.objects.count()
-    
-    # CMS Statistics
-    total_pages = Page.objects.count()
-    active_pages = Page.objects.filter(is_active=True).count()
-    
+    """Main admin dashboard (the numbers are filled in from dashboard_metrics)"""
     # Recent activity
     recent_transactions = Transaction.objects.select_related('user').order_by('-created_at')[:10]
     recent_entries = UserEntry.objects.select_related('user', 'game_round__game').order_by('-created_at')[:10]
@@ -111,89 +68,29 @@ def admin_dashboard(request):
     # Recent KYC submissions
     recent_kyc = UserProfile.objects.filter(kyc_status='pending').select_related('user').order_by('-kyc_submitted_at')[:5]
     
-    # Chart Data - Last 7 days transactions
-    last_7_days = timezone.now() - timedelta(days=7)
-    daily_transactions = []
-    daily_labels = []
-    
-    for i in range(6, -1, -1):
-        day = timezone.now() - timedelta(days=i)
-        day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
-        
-        deposits = Transaction.objects.filter(
-            transaction_type='deposit',
-            status='completed',
-            created_at__gte=day_start,
-            created_at__lt=day_end
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        withdrawals = Transaction.objects.filter(
-            transaction_type='withdrawal',
-            status='completed',
-            created_at__gte=day_start,
-            created_at__lt=day_end
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        game_entries = Transaction.objects.filter(
-            transaction_type='game_entry',
-            status='completed',
-            created_at__gte=day_start,
-            created_at__lt=day_end
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        daily_transactions.append({
-            'date': day.strftime('%b %d'),
-            'deposits': float(deposits),
-            'withdrawals': float(withdrawals),
-            'game_entries': float(game_entries)
-        })
-        daily_labels.append(day.strftime('%b %d'))
-    
-    # User growth - Last 30 days
-    last_30_days = timezone.now() - timedelta(days=30)
-    new_users_count = User.objects.filter(
-        is_staff=False,
-        date_joined__gte=last_30_days
-    ).count()
-    
     context = {
-        'total_users': total_users,
-        'total_games': total_games,
-        'active_games': active_games,
-        'total_transactions': total_transactions,
-        'total_deposits': total_deposits,
-        'total_withdrawals': total_withdrawals,
-        'total_game_entries': total_game_entries,
-        'pending_deposits': pending_deposits,
-        'pending_withdrawals': pending_withdrawals,
         'recent_transactions': recent_transactions,
         'recent_entries': recent_entries,
         'active_rounds': active_rounds,
-        
-        # New statistics
-        'kyc_pending': kyc_pending,
-        'kyc_verified': kyc_verified,
-        'kyc_rejected': kyc_rejected,
-        'kyc_not_submitted': kyc_not_submitted,
-        'pending_appeals': pending_appeals,
-        'approved_appeals': approved_appeals,
-        'rejected_appeals': rejected_appeals,
-        'active_gateways': active_gateways,
-        'total_gateways': total_gateways,
-        'total_pages': total_pages,
-        'active_pages': active_pages,
         'recent_kyc': recent_kyc,
-        'new_users_count': new_users_count,
         
-        # Chart data
-        'daily_transactions': json.dumps(daily_transactions),
-        'daily_labels': daily_labels,
+        # Render whatever is already cached; the page fetches fresh numbers either way
+        'metrics': metrics.cached() or defaultdict(lambda: '…'),
     }
     
     return render(request, 'custom_admin/dashboard.html', context)
 
 
+@login_required
+@user_passes_test(is_admin, login_url='/admin-panel/login/')
+def dashboard_metrics(request):
+    """Dashboard numbers as JSON (cached for DASHBOARD_METRICS_CACHE_SECONDS)"""
+    return JsonResponse({
+        'success': True,
+        'metrics': metrics.get(refresh=request.GET.get('refresh') == '1'),
+    })
+
+
 @login_required
 @user_passes_test(is_admin, login_url='/admin-panel/login/')
 def users_list(request):
@@ -386,28 +283,29 @@ def approve_deposit(request, request_id):
     
     user = deposit_request.user
     
-    # Create transaction
-    transaction = Transaction.objects.create(
-        user=user,
-        transaction_type='deposit',
-        amount=deposit_request.amount,
-        payment_method=deposit_request.payment_method,
-        status='completed',
-        balance_before=user.profile.wallet_balance,
-        balance_after=user.profile.wallet_balance + deposit_request.amount,
-        description=f'Deposit approved by {request.user.username}',
-        completed_at=timezone.now()
-    )
-    
-    # Add credits to user wallet
-    user.profile.add_credits(deposit_request.amount)
-    
-    # Update deposit request
-    deposit_request.status = 'approved'
-    deposit_request.processed_by = request.user
-    deposit_request.processed_at = timezone.now()
-    deposit_request.transaction = transaction
-    deposit_request.save()
+    with db_transaction.atomic():
+        # Add credits to user wallet
+        new_balance = wallet.credit(user, deposit_request.amount, 'total_deposits')
+        
+        # Create transaction
+        transaction = Transaction.objects.create(
+            user=user,
+            transaction_type='deposit',
+            amount=deposit_request.amount,
+            payment_method=deposit_request.payment_method,
+            status='completed',
+            balance_before=new_balance - deposit_request.amount,
+            balance_after=new_balance,
+            description=f'Deposit approved by {request.user.username}',
+            completed_at=timezone.now()
+        )
+        
+        # Update deposit request
+        deposit_request.status = 'approved'
+        deposit_request.processed_by = request.user
+        deposit_request.processed_at = timezone.now()
+        deposit_request.transaction = transaction
+        deposit_request.save()
     
     messages.success(request, f'Deposit of ₹{deposit_request.amount} approved for {user.username}')
     return redirect('custom_admin:deposit_requests')
@@ -470,33 +368,31 @@ def approve_withdrawal(request, request_id):
     
     user = withdrawal_request.user
     
-    # Check if user has sufficient balance
-    if user.profile.wallet_balance < withdrawal_request.amount:
-        messages.error(request, 'User has insufficient balance.')
-        return redirect('custom_admin:withdrawal_requests')
-    
-    # Create transaction
-    transaction = Transaction.objects.create(
-        user=user,
-        transaction_type='withdrawal',
-        amount=withdrawal_request.amount,
-        payment_method=withdrawal_request.payment_method,
-        status='completed',
-        balance_before=user.profile.wallet_balance,
-        balance_after=user.profile.wallet_balance - withdrawal_request.amount,
-        description=f'Withdrawal approved by {request.user.username}',
-        completed_at=timezone.now()
-    )
-    
-    # Deduct credits from user wallet
-    user.profile.deduct_credits(withdrawal_request.amount)
-    
-    # Update withdrawal request
-    withdrawal_request.status = 'approved'
-    withdrawal_request.processed_by = request.user
-    withdrawal_request.processed_at = timezone.now()
-    withdrawal_request.transaction = transaction
-    withdrawal_request.save()
+    with db_transaction.atomic():
+        # Deduct credits from user wallet (the guarded UPDATE is the balance check)
+        new_balance = wallet.debit(user, withdrawal_request.amount, 'total_withdrawals')
+        if new_balance is None:
+            messages.error(request, 'User has insufficient balance.')
+            return redirect('custom_admin:withdrawal_requests')
+        
+        # Create transaction
+        transaction = Transaction.objects.create(
+            user=user,
+            transaction_type='withdrawal',
+            amount=withdrawal_request.amount,
+            status='completed',
+            balance_before=new_balance + withdrawal_request.amount,
+            balance_after=new_balance,
+            description=f'Withdrawal approved by {request.user.username}',
+            completed_at=timezone.now()
+        )
+        
+        # Update withdrawal request
+        withdrawal_request.status = 'approved'
+        withdrawal_request.processed_by = request.user
+        withdrawal_request.processed_at = timezone.now()
+        withdrawal_request.transaction = transaction
+        withdrawal_request.save()
     
     messages.success(request, f'Withdrawal of ₹{withdrawal_request.amount} approved for {user.username}')
     return redirect('custom_admin:withdrawal_requests')
@@ -628,6 +524,15 @@ def edit_game(request, game_id):
     game = get_object_or_404(Game, id=game_id)
     
     if request.method == 'POST':
+        # Validate the round duration before touching the game
+        try:
+            round_duration = int(request.POST.get('round_duration_seconds') or game.round_duration_seconds)
+        except ValueError:
+            round_duration = None
+        if round_duration is None or round_duration < MIN_ROUND_DURATION_SECONDS:
+            messages.error(request, f'Round duration must be a whole number of seconds, at least {MIN_ROUND_DURATION_SECONDS}.')
+            return redirect('custom_admin:edit_game', game_id=game.id)
+        
         # Update game details
         game.name = request.POST.get('name')
         game.description = request.POST.get('description')
@@ -638,6 +543,8 @@ def edit_game(request, game_id):
         game.max_participants = request.POST.get('max_participants')
         game.status = request.POST.get('status')
         game.is_featured = request.POST.get('is_featured') == 'on'
+        game.auto_schedule_rounds = request.POST.get('auto_schedule_rounds') == 'on'
+        game.round_duration_seconds = round_duration
         
         # Handle image upload
         if 'image' in request.FILES:
@@ -656,6 +563,7 @@ def edit_game(request, game_id):
     context = {
         'game': game,
         'base_currency': base_currency,
+        'min_round_duration': MIN_ROUND_DURATION_SECONDS,
     }
     return render(request, 'custom_admin/edit_game.html', context)
 
@@ -665,7 +573,7 @@ def edit_game(request, game_id):
 def game_rounds(request, game_id):
     """View game rounds"""
     game = get_object_or_404(Game, id=game_id)
-    rounds = game.rounds.all().order_by('-round_number')
+    rounds = game.rounds.select_related('resolution_job').order_by('-round_number')
     
     context = {
         'game': game,
@@ -732,6 +640,9 @@ def close_round(request, round_id):
     game_round.actual_end = timezone.now()
     game_round.save()
     
+    # Fold the sharded participant/pool counters into the round
+    counters.fold([game_round.pk])
+    
     messages.success(request, f'Round #{game_round.round_number} has been closed. You can now select a winner.')
     return redirect('custom_admin:game_rounds', game_id=game_round.game.id)
 
@@ -740,14 +651,17 @@ def close_round(request, round_id):
 @user_passes_test(is_admin, login_url='/admin-panel/login/')
 def select_winner(request, round_id):
     """Select winner for a round - Random or Manual"""
-    import random
-    
     game_round = get_object_or_404(GameRound, id=round_id)
     
-    if game_round.status != 'closed':
+    # A 'processing' round whose job failed midway can be queued again to finish settling
+    if game_round.status not in ('closed', 'processing'):
         messages.error(request, 'Can only select winners for closed rounds.')
         return redirect('custom_admin:game_rounds', game_id=game_round.game.id)
     
+    # Pick up entries that committed after the round was closed
+    if counters.fold([game_round.pk]):
+        game_round.refresh_from_db()
+    
     # Get all entries for this round
     entries = UserEntry.objects.filter(game_round=game_round).select_related('user')
     
@@ -756,253 +670,28 @@ def select_winner(request, round_id):
         return redirect('custom_admin:game_rounds', game_id=game_round.game.id)
     
     # Check if winner already exists
-    if Winner.objects.filter(game_round=game_round).exists():
+    if game_round.status == 'closed' and Winner.objects.filter(game_round=game_round).exists():
         messages.error(request, 'Winner already selected for this round.')
         return redirect('custom_admin:game_rounds', game_id=game_round.game.id)
     
     if request.method == 'POST':
         selection_method = request.POST.get('selection_method')
         
+        # Winners are picked and paid by the resolve_rounds worker, outside this request
         if selection_method == 'auto':
-            # Automatic winner selection based on game type
-            game = game_round.game
-            winning_combination = None
-            winners = []
-            
-            if game.game_type == 'number_match':
-                # Generate 5 random numbers between 0-99
-                winning_combination = [random.randint(0, 99) for _ in range(5)]
-                
-                # Find entries that match the exact sequence
-                for entry in entries:
-                    if entry.user_choice == winning_combination:
-                        winners.append(entry)
-            
-            elif game.game_type == 'lucky_draw':
-                # Generate 1 random number between 1-100
-                winning_combination = [random.randint(1, 100)]
-                
-                # Find entries that match the number
-                for entry in entries:
-                    if entry.user_choice == winning_combination:
-                        winners.append(entry)
-            
-            elif game.game_type == 'color_game':
-                # Select random color
-                colors = ['red', 'green', 'blue', 'yellow']
-                winning_combination = [random.choice(colors)]
-                
-                # Find entries that match the color
-                for entry in entries:
-                    if entry.user_choice == winning_combination:
-                        winners.append(entry)
-            
-            elif game.game_type == 'custom':
-                # Handle custom game types
-                config = game.game_config
-                winning_logic = config.get('winning_logic', 'exact_match')
-                
-                if config.get('input_type') == 'number':
-                    # Generate random numbers
-                    number_count = config.get('number_count', 1)
-                    min_val = config.get('min_value', 1)
-                    max_val = config.get('max_value', 100)
-                    
-                    winning_combination = [random.randint(min_val, max_val) for _ in range(number_count)]
-                    
-                    if winning_logic == 'exact_match':
-                        for entry in entries:
-                            if entry.user_choice == winning_combination:
-                                winners.append(entry)
-                    elif winning_logic == 'partial_match':
-                        # Score based on partial matches
-                        entry_scores = []
-                        for entry in entries:
-                            score = sum(1 for i, num in enumerate(entry.user_choice) if i < len(winning_combination) and num == winning_combination[i])
-                            entry_scores.append((entry, score))
-                        # Get highest score
-                        if entry_scores:
-                            max_score = max(s[1] for s in entry_scores)
-                            winners = [e[0] for e in entry_scores if e[1] == max_score and e[1] > 0]
-                    elif winning_logic == 'closest':
-                        # Find closest to winning number
-                        if number_count == 1:
-                            entry_distances = []
-                            for entry in entries:
-                                distance = abs(entry.user_choice[0] - winning_combination[0])
-                                entry_distances.append((entry, distance))
-                            min_distance = min(d[1] for d in entry_distances)
-                            winners = [e[0] for e in entry_distances if e[1] == min_distance]
-                    elif winning_logic == 'random':
-                        # Pick random winner(s)
-                        winners = [random.choice(list(entries))]
-                
-                elif config.get('input_type') == 'choice':
-                    # Pick random choice(s)
-                    choices = config.get('choices', [])
-                    if config.get('multiple_selection', False):
-                        selection_count = config.get('selection_count', 1)
-                        winning_combination = random.sample(choices, min(selection_count, len(choices)))
-                    else:
-                        winning_combination = [random.choice(choices)]
-                    
-                    if winning_logic == 'exact_match':
-                        for entry in entries:
-                            if sorted(entry.user_choice) == sorted(winning_combination):
-                                winners.append(entry)
-                    elif winning_logic == 'random':
-                        winners = [random.choice(list(entries))]
-                
-                elif config.get('input_type') == 'text':
-                    # Generate random text or pick from entries
-                    if winning_logic == 'random':
-                        # Pick random winner
-                        winners = [random.choice(list(entries))]
-                        winning_combination = winners[0].user_choice
-                    else:
-                        # For text games, admin should set a winning answer manually
-                        # For now, just pick random
-                        winners = [random.choice(list(entries))]
-                        winning_combination = winners[0].user_choice
-            
-            # Save winning combination
-            game_round.winning_combination = winning_combination
-            game_round.save()
-            
-            if not winners:
-                messages.warning(request, f'No matching entries found! Winning combination: {winning_combination}. No winner for this round.')
-                game_round.status = 'completed'
-                game_round.has_winner = False
-                game_round.result_announced_at = timezone.now()
-                game_round.save()
-                return redirect('custom_admin:game_rounds', game_id=game_round.game.id)
-            
-            # If multiple winners, split prize or select first one
-            if len(winners) > 1:
-                # Split prize equally among winners
-                prize_per_winner = game_round.game.winning_amount / len(winners)
-                winner_names = []
-                
-                for entry in winners:
-                    # Create winner
-                    winner = Winner.objects.create(
-                        game_round=game_round,
-                        user=entry.user,
-                        entry=entry,
-                        prize_amount=prize_per_winner,
-                        announced_at=timezone.now()
-                    )
-                    
-                    # Add prize to user wallet
-                    entry.user.profile.add_credits(prize_per_winner)
-                    
-                    # Create transaction
-                    Transaction.objects.create(
-                        user=entry.user,
-                        transaction_type='prize',
-                        amount=prize_per_winner,
-                        status='completed',
-                        balance_before=entry.user.profile.wallet_balance - prize_per_winner,
-                        balance_after=entry.user.profile.wallet_balance,
-                        description=f'Prize for {game_round.game.name} - Round {game_round.round_number}',
-                        completed_at=timezone.now()
-                    )
-                    
-                    # Mark entry as winner
-                    entry.is_winner = True
-                    entry.save()
-                    
-                    winner_names.append(entry.user.username)
-                
-                game_round.status = 'completed'
-                game_round.has_winner = True
-                game_round.result_announced_at = timezone.now()
-                game_round.save()
-                
-                messages.success(request, f'{len(winners)} winners found! Winning combination: {winning_combination}. Prize split: ₹{prize_per_winner} each to {", ".join(winner_names)}')
-            else:
-                # Single winner
-                entry = winners[0]
-                
-                # Create winner
-                winner = Winner.objects.create(
-                    game_round=game_round,
-                    user=entry.user,
-                    entry=entry,
-                    prize_amount=game_round.game.winning_amount,
-                    announced_at=timezone.now()
-                )
-                
-                # Add prize to user wallet
-                entry.user.profile.add_credits(winner.prize_amount)
-                
-                # Create transaction
-                Transaction.objects.create(
-                    user=entry.user,
-                    transaction_type='prize',
-                    amount=winner.prize_amount,
-                    status='completed',
-                    balance_before=entry.user.profile.wallet_balance - winner.prize_amount,
-                    balance_after=entry.user.profile.wallet_balance,
-                    description=f'Prize for {game_round.game.name} - Round {game_round.round_number}',
-                    completed_at=timezone.now()
-                )
-                
-                # Update round status
-                game_round.status = 'completed'
-                game_round.has_winner = True
-                game_round.result_announced_at = timezone.now()
-                game_round.save()
-                
-                # Mark entry as winner
-                entry.is_winner = True
-                entry.save()
-                
-                messages.success(request, f'Winner found! {entry.user.username} won ₹{winner.prize_amount}. Winning combination: {winning_combination}')
-            
-            return redirect('custom_admin:game_rounds', game_id=game_round.game.id)
-        
+            job = jobs.enqueue(game_round, requested_by=request.user)
         elif selection_method == 'manual':
-            # Manual winner selection (old method)
-            entry_id = request.POST.get('entry_id')
-            entry = get_object_or_404(UserEntry, id=entry_id, game_round=game_round)
-            
-            # Create winner
-            winner = Winner.objects.create(
-                game_round=game_round,
-                user=entry.user,
-                entry=entry,
-                prize_amount=game_round.game.winning_amount,
-                announced_at=timezone.now()
-            )
-            
-            # Add prize to user wallet
-            entry.user.profile.add_credits(winner.prize_amount)
-            
-            # Create transaction
-            Transaction.objects.create(
-                user=entry.user,
-                transaction_type='prize',
-                amount=winner.prize_amount,
-                status='completed',
-                balance_before=entry.user.profile.wallet_balance - winner.prize_amount,
-                balance_after=entry.user.profile.wallet_balance,
-                description=f'Prize for {game_round.game.name} - Round {game_round.round_number}',
-                completed_at=timezone.now()
-            )
-            
-            # Update round status
-            game_round.status = 'completed'
-            game_round.has_winner = True
-            game_round.result_announced_at = timezone.now()
-            game_round.save()
-            
-            # Mark entry as winner
-            entry.is_winner = True
-            entry.save()
-            
-            messages.success(request, f'Winner manually selected! {entry.user.username} won ₹{winner.prize_amount}')
-            return redirect('custom_admin:game_rounds', game_id=game_round.game.id)
+            entry = get_object_or_404(UserEntry, id=request.POST.get('entry_id'), game_round=game_round)
+            job = jobs.enqueue(game_round, method='manual', entry=entry, requested_by=request.user)
+        else:
+            messages.error(request, 'Invalid selection method.')
+            return redirect('custom_admin:select_winner', round_id=game_round.id)
+        
+        if job.status in ('queued', 'running'):
+            messages.success(request, f'Winner selection for Round #{game_round.round_number} is {job.get_status_display().lower()}. Progress is shown below.')
+        else:
+            messages.info(request, f'Round #{game_round.round_number}: {job.message}')
+        return redirect('custom_admin:game_rounds', game_id=game_round.game.id)
     
     context = {
         'game_round': game_round,
@@ -1011,6 +700,28 @@ def select_winner(request, round_id):
     return render(request, 'custom_admin/select_winner.html', context)
 
 
+@login_required
+@user_passes_test(is_admin, login_url='/admin-panel/login/')
+def round_resolution_status(request, round_id):
+    """Progress of a round's winner selection, polled by the rounds page"""
+    game_round = get_object_or_404(GameRound, id=round_id)
+    job = RoundResolutionJob.objects.filter(game_round=game_round).first()
+    
+    if job is None:
+        return JsonResponse({'success': False, 'error': 'Winner selection has not been requested', 'round_status': game_round.status}, status=404)
+    
+    return JsonResponse({
+        'success': True,
+        'round_status': game_round.status,
+        'status': job.status,
+        'total_winners': job.total_winners,
+        'settled_winners': job.settled_winners,
+        'progress': job.progress_percent,
+        'message': job.message,
+        'error': job.error.strip().splitlines()[-1] if job.error else '',
+    })
+
+
 @login_required
 @user_passes_test(is_admin, login_url='/admin-panel/login/')
 def transactions_list(request):
@@ -1031,6 +742,35 @@ def transactions_list(request):
     return render(request, 'custom_admin/transactions_list.html', context)
 
 
+@login_required
+@user_passes_test(is_admin, login_url='/admin-panel/login/')
+def transactions_export(request):
+    """Stream transactions, entries or winners as CSV/JSON lines (?dataset=&format=&gzip=1, filters, ?cursor= or ?after_id=)"""
+    dataset = request.GET.get('dataset', 'transactions')
+    fmt = request.GET.get('format', 'csv')
+    gzip = request.GET.get('gzip') == '1'
+    try:
+        if fmt not in exports.FORMATS:
+            raise ValueError(f'Unknown format {fmt!r}')
+        since = date.fromisoformat(request.GET['since']) if request.GET.get('since') else None
+        until = date.fromisoformat(request.GET['until']) if request.GET.get('until') else None
+        filters = {name: request.GET.get(name) for name in exports.DATASETS.get(dataset, {}).get('filters', ())}
+        rows = exports.queryset(dataset, since, until, **filters)
+        if request.GET.get('cursor'):
+            after_id = exports.parse_cursor(dataset, request.GET['cursor'])
+        else:
+            after_id = int(request.GET.get('after_id') or 0)
+    except ValueError as exc:
+        return JsonResponse({'success': False, 'error': str(exc)}, status=400)
+    
+    response = StreamingHttpResponse(
+        exports.iter_bytes(dataset, rows, fmt, gzip, after_id),
+        content_type='application/gzip' if gzip else ('text/csv' if fmt == 'csv' else 'application/x-ndjson'),
+    )
+    response['Content-Disposition'] = f'attachment; filename="{exports.filename(dataset, fmt, gzip)}"'
+    return response
+
+
 @login_required
 @user_passes_test(is_admin, login_url='/admin-panel/login/')
 def ban_appeals_list(request):
@@ -1763,6 +1503,7 @@ def currency_toggle_status(request, currency_id):
 def exchange_rates_list(request):
     """List all exchange rates"""
     from transactions.currency_models import ExchangeRate, Currency
+    from transactions.currency_utils import last_refresh
     
     # Get filter parameters
     from_currency_code = request.GET.get('from_currency')
@@ -1789,6 +1530,7 @@ def exchange_rates_list(request):
         'currencies': currencies,
         'total_rates': rates.count(),
         'active_rates': rates.filter(is_active=True).count(),
+        'last_refresh': last_refresh(),
     }
     
     return render(request, 'custom_admin/exchange_rates_list.html', context)
@@ -1888,28 +1630,13 @@ def exchange_rate_delete(request, rate_id):
 @login_required
 @user_passes_test(is_admin)
 def refresh_exchange_rates(request):
-    """Refresh exchange rates from live API"""
-    from transactions.currency_utils import update_exchange_rates_from_api, CurrencyManager
-    
-    result = update_exchange_rates_from_api()
+    """Refresh exchange rates from live API (in the background; the rates list shows the outcome)"""
+    from transactions.currency_utils import refresh_in_background
     
-    if result['success']:
-        # Build success message with updated rates
-        updated_list = ', '.join([f"{item['currency']} ({item['symbol']}{item['rate']:.2f})" 
-                                  for item in result['updated'][:5]])  # Show first 5
-        if len(result['updated']) > 5:
-            updated_list += f" and {len(result['updated']) - 5} more"
-        
-        messages.success(request, f'✓ Exchange rates updated successfully! {updated_list}')
-        
-        if result['failed']:
-            failed_list = ', '.join([item['currency'] for item in result['failed']])
-            messages.warning(request, f'Failed to update: {failed_list}')
+    if refresh_in_background():
+        messages.info(request, 'Fetching the latest exchange rates in the background. Reload this page in a few seconds to see them.')
     else:
-        messages.error(request, f'Failed to update exchange rates: {result["message"]}')
-    
-    # Clear cache
-    CurrencyManager.clear_cache()
+        messages.warning(request, 'An exchange rate refresh is already running.')
     
     return redirect('custom_admin:exchange_rates_list')
 
@@ -2,8 +2,8 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils import timezone
-from .models import Game, GameRound, UserEntry, Winner, Leaderboard
-import random
+from .models import Game, GameRound, UserEntry, Winner, Leaderboard, LeaderboardRollup, RoundResolutionJob
+from . import counters, jobs, leaderboard_service
 import json
 
 
@@ -29,6 +29,9 @@ class GameAdmin(admin.ModelAdmin):
         ('Status', {
             'fields': ('status', 'is_featured')
         }),
+        ('Scheduling', {
+            'fields': ('auto_schedule_rounds', 'round_duration_seconds')
+        }),
         ('Statistics', {
             'fields': ('total_rounds_played', 'total_winners'),
             'classes': ('collapse',)
@@ -99,7 +102,9 @@ class GameRoundAdmin(admin.ModelAdmin):
     open_round.short_description = "Open selected rounds for entry"
     
     def close_round(self, request, queryset):
+        round_ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(status='closed', actual_end=timezone.now())
+        counters.fold(round_ids)
         self.message_user(request, f'{updated} round(s) closed.')
     close_round.short_description = "Close selected rounds"
     
@@ -109,71 +114,15 @@ class GameRoundAdmin(admin.ModelAdmin):
     process_results.short_description = "Process results for selected rounds"
     
     def select_winner(self, request, queryset):
-        """Randomly select winner(s) for closed rounds"""
-        winners_selected = 0
+        """Queue closed rounds for the resolve_rounds worker"""
+        queued = 0
         for game_round in queryset.filter(status='closed'):
-            # Get all entries for this round
-            entries = list(game_round.entries.all())
-            
-            if not entries:
+            if not game_round.entries.exists():
                 continue
-            
-            # Generate winning combination based on game type
-            game = game_round.game
-            if game.game_type == 'number_match':
-                winning_combination = [random.randint(0, 99) for _ in range(5)]
-            elif game.game_type == 'lucky_draw':
-                winning_combination = [random.randint(1, 100)]
-            elif game.game_type == 'color_game':
-                colors = ['red', 'green', 'blue', 'yellow']
-                winning_combination = [random.choice(colors)]
-            else:
-                winning_combination = []
-            
-            game_round.winning_combination = winning_combination
-            
-            # Check for exact matches
-            winner_entry = None
-            for entry in entries:
-                if entry.user_choice == winning_combination:
-                    winner_entry = entry
-                    break
-            
-            # 70% chance of having a winner if exact match found
-            if winner_entry and random.random() < 0.7:
-                winner_entry.is_winner = True
-                winner_entry.winning_amount = game.winning_amount
-                winner_entry.save()
-                
-                # Create winner record
-                Winner.objects.create(
-                    game_round=game_round,
-                    user_entry=winner_entry,
-                    user=winner_entry.user,
-                    prize_amount=game.winning_amount,
-                    prize_credited=True,
-                    prize_credited_at=timezone.now()
-                )
-                
-                # Credit winning amount to user
-                winner_entry.user.profile.add_winnings(game.winning_amount)
-                
-                game_round.has_winner = True
-                winners_selected += 1
-            else:
-                game_round.has_winner = False
-            
-            game_round.status = 'completed'
-            game_round.result_announced_at = timezone.now()
-            game_round.save()
-            
-            # Update game statistics
-            game.total_rounds_played += 1
-            if game_round.has_winner:
-                game.total_winners += 1
-            game.save()
+            jobs.enqueue(game_round, requested_by=request.user)
+            queued += 1
         
-        self.message_user(request, f'Results processed. {winners_selected} winner(s) selected.')
+        self.message_user(request, f'{queued} round(s) queued for winner selection. The resolve_rounds worker will process them.')
     select_winner.short_description = "Select winner for closed rounds"
 
 
@@ -232,6 +181,17 @@ class WinnerAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(RoundResolutionJob)
+class RoundResolutionJobAdmin(admin.ModelAdmin):
+    list_display = ('game_round', 'method', 'status', 'settled_winners', 'total_winners', 'attempts', 'worker', 'created_at', 'finished_at')
+    list_filter = ('status', 'method', 'created_at')
+    search_fields = ('game_round__game__name', 'worker')
+    readonly_fields = ('game_round', 'method', 'manual_entry', 'requested_by', 'status', 'worker', 'lease_expires_at', 'attempts', 'total_winners', 'settled_winners', 'message', 'error', 'created_at', 'started_at', 'finished_at')
+    
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(Leaderboard)
 class LeaderboardAdmin(admin.ModelAdmin):
     list_display = ('rank', 'user', 'points', 'total_wins', 'total_winnings', 'total_games_played', 'win_rate', 'last_updated')
@@ -262,19 +222,26 @@ class LeaderboardAdmin(admin.ModelAdmin):
         return False
     
     def update_leaderboard(self, request, queryset):
-        for leaderboard in queryset:
-            leaderboard.update_stats()
+        leaderboard_service.rebuild_stats(queryset.values_list('user_id', flat=True))
         
-        # Update ranks
-        all_leaderboards = Leaderboard.objects.all().order_by('-points', '-total_winnings')
-        for idx, lb in enumerate(all_leaderboards, start=1):
-            lb.rank = idx
-            lb.save(update_fields=['rank'])
+        # Update ranks (only rows whose rank changed are written)
+        changed = leaderboard_service.refresh_ranks()
         
-        self.message_user(request, 'Leaderboard updated successfully.')
+        self.message_user(request, f'Leaderboard updated successfully. {changed} rank(s) changed.')
     update_leaderboard.short_description = "Update selected leaderboard entries"
 
 
+@admin.register(LeaderboardRollup)
+class LeaderboardRollupAdmin(admin.ModelAdmin):
+    list_display = ('user', 'game', 'period_type', 'period_start', 'points', 'total_wins', 'total_winnings', 'total_games_played', 'updated_at')
+    list_filter = ('period_type', 'period_start', 'game')
+    search_fields = ('user__username', 'game__name')
+    readonly_fields = ('user', 'game', 'period_type', 'period_start', 'total_games_played', 'total_wins', 'total_winnings', 'total_spent', 'points', 'updated_at')
+    
+    def has_add_permission(self, request):
+        return False
+
+
 # Customize admin site headers
 admin.site.site_header = "Malamal Weekly Admin"
 admin.site.site_title = "Malamal Weekly Admin Portal"
@@ -0,0 +1,144 @@
+"""
+Sharded participant/pool counters for game rounds.
+
+increment() bumps one of ROUND_COUNTER_SHARDS rows picked at random with an
+F() expression, so simultaneous entries into a popular round spread their
+row locks instead of serializing on GameRound. totals() reads the folded
+GameRound values plus the unfolded shards in one statement, and fold()
+(run by the fold_round_counters command) moves shard values back into
+GameRound.
+"""
+import random
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Case, DecimalField, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import GameRound, GameRoundCounter
+
+
+def shard_count():
+    """Number of counter slots per round"""
+    return max(1, getattr(settings, 'ROUND_COUNTER_SHARDS', 8))
+
+
+def increment(game_round, participants=1, pool_amount=Decimal('0.00')):
+    """Add to a random shard of the round's counters"""
+    round_id = getattr(game_round, 'pk', game_round)
+    shard = random.randrange(shard_count())
+    values = {
+        'participants': F('participants') + participants,
+        'pool_amount': F('pool_amount') + pool_amount,
+    }
+    
+    shard_rows = GameRoundCounter.objects.filter(game_round_id=round_id, shard=shard)
+    if shard_rows.update(**values):
+        return
+    
+    # First hit on this shard: create it, or fall back to the UPDATE if a
+    # concurrent entry created it first
+    try:
+        with db_transaction.atomic():
+            GameRoundCounter.objects.create(
+                game_round_id=round_id,
+                shard=shard,
+                participants=participants,
+                pool_amount=pool_amount,
+            )
+    except IntegrityError:
+        shard_rows.update(**values)
+
+
+def increment_many(amounts):
+    """Add to several rounds' counters in two statements.
+    
+    Args:
+        amounts: {round_id: (participants, pool_amount)}
+    """
+    if not amounts:
+        return
+    shard = random.randrange(shard_count())
+    round_ids = list(amounts)
+    
+    # Make sure the chosen shard exists for every round, then bump them all
+    GameRoundCounter.objects.bulk_create(
+        [GameRoundCounter(game_round_id=round_id, shard=shard) for round_id in round_ids],
+        ignore_conflicts=True,
+    )
+    GameRoundCounter.objects.filter(game_round_id__in=round_ids, shard=shard).update(
+        participants=F('participants') + Case(
+            *[When(game_round_id=round_id, then=Value(n)) for round_id, (n, _) in amounts.items()],
+            output_field=IntegerField(),
+        ),
+        pool_amount=F('pool_amount') + Case(
+            *[When(game_round_id=round_id, then=Value(pool)) for round_id, (_, pool) in amounts.items()],
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        ),
+    )
+
+
+def _with_totals(queryset):
+    return queryset.annotate(
+        live_participants=F('total_participants') + Coalesce(Sum('counter_shards__participants'), Value(0)),
+        live_pool_amount=F('total_pool_amount') + Coalesce(Sum('counter_shards__pool_amount'), Value(Decimal('0.00'))),
+    )
+
+
+def totals_for(round_ids):
+    """Live {round_id: (participants, pool_amount)} for several rounds in one query"""
+    return {
+        round_id: (participants, Decimal(str(pool_amount)).quantize(Decimal('0.01')))
+        for round_id, participants, pool_amount in _with_totals(
+            GameRound.objects.filter(pk__in=round_ids)
+        ).values_list('pk', 'live_participants', 'live_pool_amount')
+    }
+
+
+def totals(game_round):
+    """Live (participants, pool_amount) for a round"""
+    round_id = getattr(game_round, 'pk', game_round)
+    participants, pool_amount = _with_totals(
+        GameRound.objects.filter(pk=round_id)
+    ).values_list('live_participants', 'live_pool_amount').get()
+    return participants, Decimal(str(pool_amount)).quantize(Decimal('0.01'))
+
+
+def fold(round_ids=None):
+    """Move shard values into GameRound.total_participants/total_pool_amount.
+    
+    Each round folds in its own transaction with its shards locked, so totals()
+    never sees a value counted twice or not at all.
+    
+    Returns:
+        int: number of rounds folded
+    """
+    shards = GameRoundCounter.objects.exclude(participants=0, pool_amount=0)
+    if round_ids is not None:
+        shards = shards.filter(game_round_id__in=round_ids)
+    
+    folded = 0
+    for round_id in shards.values_list('game_round_id', flat=True).distinct().order_by('game_round_id'):
+        with db_transaction.atomic():
+            locked = list(
+                GameRoundCounter.objects.select_for_update()
+                .filter(game_round_id=round_id)
+                .values_list('pk', 'participants', 'pool_amount')
+            )
+            participants = sum(row[1] for row in locked)
+            pool_amount = sum((row[2] for row in locked), Decimal('0.00'))
+            if not participants and not pool_amount:
+                continue
+            
+            GameRound.objects.filter(pk=round_id).update(
+                total_participants=F('total_participants') + participants,
+                total_pool_amount=F('total_pool_amount') + pool_amount,
+            )
+            GameRoundCounter.objects.filter(pk__in=[row[0] for row in locked]).update(
+                participants=0,
+                pool_amount=Decimal('0.00'),
+            )
+        folded += 1
+    
+    return folded
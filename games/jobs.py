@@ -0,0 +1,174 @@
+"""
+Round-resolution job queue.
+
+The admin enqueues a RoundResolutionJob per closed round instead of picking
+winners inside its HTTP request. Workers (manage.py resolve_rounds) claim
+jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any number of them can run
+side by side without two ever taking the same round. Each claim carries a
+lease that is renewed after every settled batch; a job whose worker died
+becomes claimable again once the lease lapses, and settlement skips the
+entries that were already paid.
+"""
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import counters, resolution, settlement
+from .models import Game, GameRound, RoundResolutionJob
+
+
+def lease_seconds():
+    """How long a claimed job stays reserved without a heartbeat"""
+    return getattr(settings, 'ROUND_RESOLUTION_LEASE_SECONDS', 300)
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(game_round, method='auto', entry=None, requested_by=None):
+    """Queue winner selection for a round (a failed job is re-queued).
+    
+    Returns:
+        RoundResolutionJob: the round's job, which may already be queued or running
+    """
+    job, created = RoundResolutionJob.objects.get_or_create(
+        game_round=game_round,
+        defaults={'method': method, 'manual_entry': entry, 'requested_by': requested_by},
+    )
+    if not created and job.status == 'failed':
+        # A partially settled round keeps its stored result; otherwise take the new request
+        if game_round.status == 'closed':
+            job.method, job.manual_entry = method, entry
+        job.status = 'queued'
+        job.requested_by = requested_by
+        job.error = ''
+        job.message = ''
+        job.finished_at = None
+        job.save()
+    return job
+
+
+def claim(worker=None, lease=None):
+    """Reserve the oldest runnable job for this worker, or return None"""
+    now = timezone.now()
+    lease = lease_seconds() if lease is None else lease
+    
+    with db_transaction.atomic():
+        # Subquery rather than a join so only the job row is locked
+        job = RoundResolutionJob.objects.select_for_update(skip_locked=True).filter(
+            Q(status='queued') | Q(status='running', lease_expires_at__lt=now),
+            game_round__in=GameRound.objects.filter(status__in=('closed', 'processing')).values('pk'),
+        ).order_by('created_at').first()
+        if job is None:
+            return None
+        
+        job.status = 'running'
+        job.worker = worker or worker_name()
+        job.lease_expires_at = now + timedelta(seconds=lease)
+        job.attempts += 1
+        job.started_at = job.started_at or now
+        job.save(update_fields=['status', 'worker', 'lease_expires_at', 'attempts', 'started_at'])
+    
+    return job
+
+
+def run(job, batch_size=None, lease=None):
+    """Resolve and settle the job's round, recording progress on the job.
+    
+    Returns:
+        bool: whether the job completed (failures are stored on the job)
+    """
+    lease = lease_seconds() if lease is None else lease
+    
+    def heartbeat(done, total):
+        RoundResolutionJob.objects.filter(pk=job.pk).update(
+            settled_winners=done,
+            total_winners=total,
+            lease_expires_at=timezone.now() + timedelta(seconds=lease),
+        )
+    
+    try:
+        game_round, winning_combination, prizes = _resolve(job)
+        RoundResolutionJob.objects.filter(pk=job.pk).update(total_winners=len(prizes))
+        settlement.settle_round(game_round, prizes, batch_size=batch_size, progress=heartbeat)
+    except Exception:
+        RoundResolutionJob.objects.filter(pk=job.pk).update(
+            status='failed',
+            error=traceback.format_exc(),
+            lease_expires_at=None,
+            finished_at=timezone.now(),
+        )
+        return False
+    
+    Game.objects.filter(pk=game_round.game_id).update(
+        total_rounds_played=F('total_rounds_played') + 1,
+        total_winners=F('total_winners') + (1 if prizes else 0),
+    )
+    
+    if prizes:
+        # Includes payouts made by earlier attempts
+        message = f'{len(prizes)} winning ticket(s), ₹{sum(prizes.values())} paid. Winning combination: {winning_combination}'
+    else:
+        message = f'No matching entries. Winning combination: {winning_combination}'
+    RoundResolutionJob.objects.filter(pk=job.pk).update(
+        status='completed',
+        total_winners=len(prizes),
+        settled_winners=len(prizes),
+        message=message[:255],
+        lease_expires_at=None,
+        finished_at=timezone.now(),
+    )
+    return True
+
+
+def _resolve(job):
+    """Move the round from closed to processing with its result stored.
+    
+    A round already in processing (an earlier attempt died mid-settlement)
+    keeps its stored result, so the remaining payouts match the paid ones.
+    
+    Returns:
+        tuple: (game_round, winning_combination, {entry_id: prize})
+    """
+    game_round = GameRound.objects.select_related('game').get(pk=job.game_round_id)
+    
+    if game_round.status == 'closed':
+        # Pick up entries that committed after the round was closed
+        if counters.fold([game_round.pk]):
+            game_round.refresh_from_db()
+        
+        if job.method == 'manual':
+            winning_combination = game_round.winning_combination
+        else:
+            winning_combination = resolution.generate_winning_combination(game_round.game)
+        
+        moved = GameRound.objects.filter(pk=game_round.pk, status='closed').update(
+            status='processing',
+            winning_combination=winning_combination,
+            updated_at=timezone.now(),
+        )
+        if not moved:
+            raise RuntimeError(f"{game_round} is no longer closed")
+        game_round.refresh_from_db()
+    
+    elif game_round.status != 'processing':
+        raise RuntimeError(f"{game_round} is {game_round.get_status_display().lower()}, not closed")
+    
+    if job.method == 'manual':
+        if job.manual_entry_id is None:
+            raise RuntimeError("Manual selection has no entry")
+        return game_round, game_round.winning_combination, {job.manual_entry_id: game_round.game.winning_amount}
+    
+    winning_combination, prizes = resolution.resolve_prizes(game_round, game_round.winning_combination)
+    if winning_combination != game_round.winning_combination:
+        # Text games take the drawn entry's answer as the result
+        game_round.winning_combination = winning_combination
+        game_round.save(update_fields=['winning_combination', 'updated_at'])
+    return game_round, winning_combination, prizes
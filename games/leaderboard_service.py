@@ -0,0 +1,172 @@
+"""
+Incremental leaderboard maintenance.
+
+Entry creation and prize settlement push F() deltas into the affected
+users' Leaderboard rows (one CASE UPDATE for any number of users), then
+recompute points/win_rate for just those rows. Nothing re-reads a user's
+entries on the write path.
+
+Ranks are derived rather than stored on every write:
+    - rank_of() counts the rows ahead of a user on the (points, total_winnings) index
+    - top() ranks a page of the leaderboard by position
+    - refresh_ranks() rewrites the stored rank column in one window-function
+      pass, writing only the rows whose rank changed
+"""
+from decimal import Decimal
+
+from django.db.models import (
+    Case, Count, DecimalField, ExpressionWrapper, F, FloatField, IntegerField, Q, Sum, Value, When, Window,
+)
+from django.db.models.functions import Cast, Floor, Rank
+from django.utils import timezone
+
+from .models import Leaderboard, UserEntry
+
+
+# Delta columns, in the order apply_deltas() takes them
+DELTA_FIELDS = (
+    ('total_games_played', IntegerField()),
+    ('total_spent', DecimalField(max_digits=10, decimal_places=2)),
+    ('total_wins', IntegerField()),
+    ('total_winnings', DecimalField(max_digits=10, decimal_places=2)),
+)
+
+RANK_ORDER = [F('points').desc(), F('total_winnings').desc()]
+
+
+def apply_deltas(deltas):
+    """Add per-user deltas to the leaderboard.
+    
+    Args:
+        deltas: {user_id: (games played, spent, wins, winnings)}
+    """
+    if not deltas:
+        return
+    user_ids = sorted(deltas)
+    Leaderboard.objects.bulk_create([Leaderboard(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+    
+    updates = delta_updates(deltas)
+    if updates:
+        Leaderboard.objects.filter(user_id__in=user_ids).update(**updates)
+    _refresh_derived(user_ids)
+
+
+def delta_updates(deltas):
+    """update() kwargs adding each user's deltas to the DELTA_FIELDS columns (one CASE per column)"""
+    updates = {}
+    for index, (name, output_field) in enumerate(DELTA_FIELDS):
+        values = [(user_id, delta[index]) for user_id, delta in deltas.items() if delta[index]]
+        if values:
+            updates[name] = F(name) + Case(
+                *[When(user_id=user_id, then=Value(value)) for user_id, value in values],
+                default=Value(0),
+                output_field=output_field,
+            )
+    return updates
+
+
+def points(wins, winnings):
+    """Leaderboard points: 10 per win plus 1 per whole unit won"""
+    return ExpressionWrapper(wins * 10 + Cast(Floor(winnings), IntegerField()), output_field=IntegerField())
+
+
+def record_entries(game_id, entries):
+    """Count new game entries in one game: {user_id: (entries, fees paid)}"""
+    from .rollups import record
+    deltas = {user_id: (count, spent, 0, 0) for user_id, (count, spent) in entries.items()}
+    apply_deltas(deltas)
+    record(game_id, deltas)
+
+
+def record_wins(game_id, wins):
+    """Count settled prizes in one game: {user_id: (winning entries, amount won)}"""
+    from .rollups import record
+    deltas = {user_id: (0, 0, count, amount) for user_id, (count, amount) in wins.items()}
+    apply_deltas(deltas)
+    record(game_id, deltas)
+
+
+def _refresh_derived(user_ids):
+    """Recompute win_rate and points from the stored totals of these rows"""
+    Leaderboard.objects.filter(user_id__in=user_ids).update(
+        win_rate=Case(
+            When(total_games_played__gt=0, then=ExpressionWrapper(
+                Cast('total_wins', FloatField()) * Value(100.0) / F('total_games_played'),
+                output_field=FloatField(),
+            )),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+        points=points(F('total_wins'), F('total_winnings')),
+        last_updated=timezone.now(),
+    )
+
+
+def rebuild_stats(user_ids):
+    """Recompute the totals of these users from their entries (one aggregate query)"""
+    user_ids = list(user_ids)
+    stats = {
+        row['user_id']: row for row in UserEntry.objects.filter(user_id__in=user_ids).values('user_id').annotate(
+            games=Count('pk'),
+            spent=Sum('entry_fee_paid'),
+            wins=Count('pk', filter=Q(is_winner=True)),
+            winnings=Sum('winning_amount', filter=Q(is_winner=True)),
+        )
+    }
+    
+    Leaderboard.objects.bulk_create([Leaderboard(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+    rows = list(Leaderboard.objects.filter(user_id__in=user_ids))
+    for row in rows:
+        data = stats.get(row.user_id, {})
+        row.total_games_played = data.get('games', 0)
+        row.total_spent = data.get('spent') or Decimal('0.00')
+        row.total_wins = data.get('wins', 0)
+        row.total_winnings = data.get('winnings') or Decimal('0.00')
+    Leaderboard.objects.bulk_update(rows, [name for name, _ in DELTA_FIELDS], batch_size=1000)
+    _refresh_derived(user_ids)
+
+
+def ranked():
+    """Rows that take part in the ranking (users who have played)"""
+    return Leaderboard.objects.filter(total_games_played__gt=0)
+
+
+def rank_of(leaderboard):
+    """Competition rank of one row: 1 + the rows strictly ahead of it"""
+    if not leaderboard.total_games_played:
+        return None
+    return ranked().filter(
+        Q(points__gt=leaderboard.points) |
+        Q(points=leaderboard.points, total_winnings__gt=leaderboard.total_winnings)
+    ).count() + 1
+
+
+def top(limit=100):
+    """The first `limit` rows, each with .rank set (ties share a rank)"""
+    rows = list(ranked().select_related('user').order_by(*RANK_ORDER)[:limit])
+    previous = None
+    for position, row in enumerate(rows, start=1):
+        key = (row.points, row.total_winnings)
+        if key != previous:
+            rank = position
+            previous = key
+        row.rank = rank
+    return rows
+
+
+def refresh_ranks(chunk_size=2000):
+    """Store every row's current rank, writing only rows whose rank changed.
+    
+    Returns:
+        int: number of rows updated
+    """
+    current = ranked().annotate(
+        current_rank=Window(Rank(), order_by=RANK_ORDER)
+    ).values_list('pk', 'rank', 'current_rank').iterator(chunk_size=chunk_size)
+    
+    changed = [Leaderboard(pk=pk, rank=new) for pk, old, new in current if old != new]
+    # Users without games are unranked
+    unranked = Leaderboard.objects.filter(total_games_played=0, rank__isnull=False).update(rank=None)
+    
+    Leaderboard.objects.bulk_update(changed, ['rank'], batch_size=chunk_size)
+    return len(changed) + unranked
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from games.models import UserEntry
+from games.resolution import backfill_choice_keys
+
+
+class Command(BaseCommand):
+    help = 'Compute choice_key for entries created before it was stored at entry time'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Entries updated per batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--round',
+            type=int,
+            dest='round_id',
+            help='Only backfill entries of this round',
+        )
+    
+    def handle(self, *args, **options):
+        entries = UserEntry.objects.all()
+        if options['round_id']:
+            entries = entries.filter(game_round_id=options['round_id'])
+        
+        updated = backfill_choice_keys(entries, batch_size=options['batch_size'])
+        
+        if updated:
+            self.stdout.write(self.style.SUCCESS(f'✓ Computed choice keys for {updated} entr{"y" if updated == 1 else "ies"}'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✓ All entries already have choice keys'))
@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from games import rollups
+from games.models import UserEntry
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the daily/weekly/monthly leaderboard rollups from entries and winners. '
+        'Periods are rebuilt in parallel, each in its own transaction; entries made in a period '
+        'while it is being rebuilt may be missed, so rebuild the current period when play is quiet.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=date.fromisoformat,
+            help='First day to rebuild, YYYY-MM-DD (default: day of the first entry)',
+        )
+        parser.add_argument(
+            '--until',
+            type=date.fromisoformat,
+            help='Last day to rebuild, YYYY-MM-DD (default: today)',
+        )
+        parser.add_argument(
+            '--period',
+            action='append',
+            choices=rollups.PERIOD_TYPES,
+            help='Period type to rebuild; repeat for several (default: all)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Periods rebuilt at the same time (default: 4)',
+        )
+    
+    def handle(self, *args, **options):
+        until = options['until'] or timezone.localdate()
+        since = options['since']
+        if since is None:
+            first = UserEntry.objects.order_by('created_at').values_list('created_at', flat=True).first()
+            if first is None:
+                self.stdout.write('No entries to roll up')
+                return
+            since = timezone.localdate(first)
+        if since > until:
+            raise CommandError('--since must not be after --until')
+        
+        periods = [
+            (period_type, start)
+            for period_type in options['period'] or rollups.PERIOD_TYPES
+            for start in rollups.periods_between(period_type, since, until)
+        ]
+        self.stdout.write(f'Rebuilding {len(periods)} period(s) from {since} to {until}...')
+        
+        rows = 0
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as pool:
+            futures = {pool.submit(self._rebuild, *period): period for period in periods}
+            for future in as_completed(futures):
+                period_type, start = futures[future]
+                written = future.result()
+                rows += written
+                self.stdout.write(f'  {period_type} of {start}: {written} row(s)')
+        
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {len(periods)} period(s), {rows} rollup row(s)'))
+    
+    def _rebuild(self, period_type, start):
+        # Each worker thread has its own connection; close it when the chunk is done
+        try:
+            return rollups.rebuild_period(period_type, start)
+        finally:
+            connection.close()
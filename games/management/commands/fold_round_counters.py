@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from games import counters
+from games.models import GameRound
+
+
+class Command(BaseCommand):
+    help = 'Fold sharded participant/pool counters back into their game rounds'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--round',
+            type=int,
+            action='append',
+            dest='round_ids',
+            help='Only fold this round (can be repeated)',
+        )
+        parser.add_argument(
+            '--open-only',
+            action='store_true',
+            help='Only fold rounds that are currently open',
+        )
+    
+    def handle(self, *args, **options):
+        round_ids = options['round_ids']
+        
+        if options['open_only']:
+            open_rounds = GameRound.objects.filter(status='open')
+            if round_ids:
+                open_rounds = open_rounds.filter(pk__in=round_ids)
+            round_ids = list(open_rounds.values_list('pk', flat=True))
+        
+        folded = counters.fold(round_ids)
+        
+        if folded:
+            self.stdout.write(self.style.SUCCESS(f'✓ Folded counters for {folded} round(s)'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✓ No pending counter shards to fold'))
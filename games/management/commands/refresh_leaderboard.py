@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from games import leaderboard_service
+from games.models import Leaderboard
+
+
+class Command(BaseCommand):
+    help = 'Store current leaderboard ranks (and optionally rebuild totals from entries)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild-stats',
+            action='store_true',
+            help='Recompute every row from UserEntry first (repairs drift; reads all entries)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Users per rebuild batch (default: 1000)',
+        )
+    
+    def handle(self, *args, **options):
+        if options['rebuild_stats']:
+            user_ids = list(Leaderboard.objects.order_by('user_id').values_list('user_id', flat=True))
+            chunk_size = options['chunk_size']
+            for start in range(0, len(user_ids), chunk_size):
+                leaderboard_service.rebuild_stats(user_ids[start:start + chunk_size])
+            self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt stats for {len(user_ids)} user(s)'))
+        
+        changed = leaderboard_service.refresh_ranks()
+        self.stdout.write(self.style.SUCCESS(f'✓ {changed} rank(s) changed'))
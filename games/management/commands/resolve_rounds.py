@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+from games import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run the round-resolution worker: claim queued rounds, select winners and settle prizes'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the queue is empty instead of polling',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls of an empty queue (default: 5)',
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            default=None,
+            help='Exit after processing this many jobs',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Commit settlement after this many winners (default: PRIZE_SETTLEMENT_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--lease',
+            type=int,
+            default=None,
+            help='Seconds a claimed job stays reserved between progress updates (default: ROUND_RESOLUTION_LEASE_SECONDS)',
+        )
+    
+    def handle(self, *args, **options):
+        worker = jobs.worker_name()
+        processed = 0
+        self.stdout.write(f'Worker {worker} started')
+        
+        while options['max_jobs'] is None or processed < options['max_jobs']:
+            job = jobs.claim(worker, lease=options['lease'])
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+            
+            self.stdout.write(f'  Resolving {job.game_round} (attempt {job.attempts})...')
+            if jobs.run(job, batch_size=options['batch_size'], lease=options['lease']):
+                job.refresh_from_db()
+                self.stdout.write(self.style.SUCCESS(f'  ✓ {job.message}'))
+            else:
+                self.stdout.write(self.style.ERROR(f'  ✗ {job.game_round} failed; see the job in the admin'))
+            processed += 1
+        
+        self.stdout.write(self.style.SUCCESS(f'✓ Processed {processed} job(s)'))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+from games import scheduler
+
+
+class Command(BaseCommand):
+    help = 'Run the round scheduler: open, close and queue resolution of rounds on time, and start the next round'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run one pass and exit',
+        )
+        parser.add_argument(
+            '--max-sleep',
+            type=float,
+            default=5.0,
+            help='Longest wait between passes, so rounds created elsewhere are noticed (default: 5)',
+        )
+    
+    def handle(self, *args, **options):
+        self.stdout.write('Round scheduler started')
+        
+        while True:
+            close_old_connections()
+            result = scheduler.tick(timezone.now())
+            if any(result.values()):
+                self.stdout.write(
+                    f"[{timezone.now():%H:%M:%S.%f}] opened {result['opened']}, closed {result['closed']}, "
+                    f"queued {result['queued']} for resolution, created {result['created']}"
+                )
+            
+            if options['once']:
+                break
+            
+            # Wake up right at the next deadline instead of polling on a fixed interval
+            wait = options['max_sleep']
+            due = scheduler.next_due()
+            if due is not None:
+                wait = min(wait, (due - timezone.now()).total_seconds())
+            time.sleep(max(wait, 0.01))
+        
+        self.stdout.write(self.style.SUCCESS('✓ Scheduler pass complete'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from games import resolution, settlement
+from games.models import GameRound
+
+
+class Command(BaseCommand):
+    help = 'Finish prize settlement for rounds left in processing (already paid entries are skipped)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--round',
+            type=int,
+            action='append',
+            dest='round_ids',
+            help='Only settle this round (can be repeated)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Commit after this many winners (default: PRIZE_SETTLEMENT_BATCH_SIZE, else one transaction)',
+        )
+    
+    def handle(self, *args, **options):
+        rounds = GameRound.objects.filter(
+            status='processing', winning_combination__isnull=False
+        ).select_related('game')
+        if options['round_ids']:
+            rounds = rounds.filter(pk__in=options['round_ids'])
+        
+        resumed = 0
+        for game_round in rounds:
+            _, prizes = resolution.resolve_prizes(game_round, game_round.winning_combination)
+            settled, total_paid = settlement.settle_round(game_round, prizes, batch_size=options['batch_size'])
+            self.stdout.write(f'  {game_round}: paid {settled} remaining winning ticket(s), ₹{total_paid}')
+            resumed += 1
+        
+        if resumed:
+            self.stdout.write(self.style.SUCCESS(f'✓ Settled {resumed} round(s)'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✓ No rounds awaiting settlement'))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0002_alter_game_game_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameRoundCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('participants', models.IntegerField(default=0)),
+                ('pool_amount', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('game_round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counter_shards', to='games.gameround')),
+            ],
+            options={
+                'verbose_name': 'Game Round Counter',
+                'verbose_name_plural': 'Game Round Counters',
+                'unique_together': {('game_round', 'shard')},
+            },
+        ),
+    ]
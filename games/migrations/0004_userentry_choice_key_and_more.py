@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0003_gameroundcounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userentry',
+            name='choice_key',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Hash of the canonical selection, for exact-match lookups', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='userentry',
+            index=models.Index(fields=['game_round', 'choice_key'], name='games_usere_game_ro_dd6bc1_idx'),
+        ),
+    ]
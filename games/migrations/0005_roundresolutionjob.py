@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0004_userentry_choice_key_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoundResolutionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(choices=[('auto', 'Automatic'), ('manual', 'Manual')], default='auto', max_length=10)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('worker', models.CharField(blank=True, default='', max_length=100)),
+                ('lease_expires_at', models.DateTimeField(blank=True, help_text='A running job whose lease lapsed can be claimed by another worker', null=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('total_winners', models.PositiveIntegerField(default=0)),
+                ('settled_winners', models.PositiveIntegerField(default=0)),
+                ('message', models.CharField(blank=True, default='', max_length=255)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('game_round', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='resolution_job', to='games.gameround')),
+                ('manual_entry', models.ForeignKey(blank=True, help_text='Winning entry for manual selection', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='games.userentry')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Round Resolution Job',
+                'verbose_name_plural': 'Round Resolution Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='games_round_status_12bba6_idx')],
+            },
+        ),
+    ]
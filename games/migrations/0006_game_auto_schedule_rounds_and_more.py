@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0005_roundresolutionjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='auto_schedule_rounds',
+            field=models.BooleanField(default=False, help_text='Open, close and resolve rounds automatically, back to back'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='round_duration_seconds',
+            field=models.PositiveIntegerField(default=604800, help_text='Entry window of each automatically scheduled round'),
+        ),
+        migrations.AddIndex(
+            model_name='gameround',
+            index=models.Index(fields=['status', 'scheduled_start'], name='games_gamer_status_71dc24_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gameround',
+            index=models.Index(fields=['status', 'scheduled_end'], name='games_gamer_status_c50d2c_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0006_game_auto_schedule_rounds_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaderboard',
+            index=models.Index(fields=['points', 'total_winnings'], name='games_leade_points_23e3f6_idx'),
+        ),
+    ]
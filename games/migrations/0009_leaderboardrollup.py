@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0008_leaderboard_games_leade_last_up_af377e_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_type', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=10)),
+                ('period_start', models.DateField(help_text='First day of the period (weeks start on Monday)')),
+                ('total_games_played', models.IntegerField(default=0)),
+                ('total_wins', models.IntegerField(default=0)),
+                ('total_winnings', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('total_spent', models.DecimalField(decimal_places=2, default=0.0, max_digits=10)),
+                ('points', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_rollups', to='games.game')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Leaderboard Rollup',
+                'verbose_name_plural': 'Leaderboard Rollups',
+                'ordering': ['-period_start', '-points', '-total_winnings'],
+                'indexes': [models.Index(fields=['game', 'period_type', 'period_start', 'points', 'total_winnings'], name='games_leade_game_id_011b2c_idx'), models.Index(fields=['period_type', 'period_start', 'user'], name='games_leade_period__fd410a_idx')],
+                'unique_together': {('user', 'game', 'period_type', 'period_start')},
+            },
+        ),
+    ]
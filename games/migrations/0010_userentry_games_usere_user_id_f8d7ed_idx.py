@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0009_leaderboardrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userentry',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='games_usere_user_id_f8d7ed_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:18
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0010_userentry_games_usere_user_id_f8d7ed_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='game',
+            name='round_duration_seconds',
+            field=models.PositiveIntegerField(default=604800, help_text='Entry window of each automatically scheduled round (at least 10 seconds)', validators=[django.core.validators.MinValueValidator(10)]),
+        ),
+    ]
@@ -1,9 +1,14 @@
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 import json
 
 
+# Shortest entry window of an automatically scheduled round (games.scheduler)
+MIN_ROUND_DURATION_SECONDS = 10
+
+
 class Game(models.Model):
     """Game definition with rules and settings"""
     GAME_TYPES = [
@@ -42,6 +47,15 @@ class Game(models.Model):
     # Status and metadata
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     is_featured = models.BooleanField(default=False)
+    
+    # Round scheduling (run_round_scheduler)
+    auto_schedule_rounds = models.BooleanField(default=False, help_text="Open, close and resolve rounds automatically, back to back")
+    round_duration_seconds = models.PositiveIntegerField(
+        default=7 * 24 * 3600,
+        validators=[MinValueValidator(MIN_ROUND_DURATION_SECONDS)],
+        help_text=f"Entry window of each automatically scheduled round (at least {MIN_ROUND_DURATION_SECONDS} seconds)",
+    )
+    
     total_rounds_played = models.IntegerField(default=0)
     total_winners = models.IntegerField(default=0)
     
@@ -87,6 +101,8 @@ class GameRound(models.Model):
     total_participants = models.IntegerField(default=0)
     total_pool_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     
+    COUNTER_FIELDS = ('total_participants', 'total_pool_amount')
+    
     # Results
     winning_combination = models.JSONField(null=True, blank=True, help_text="Winning numbers/colors/etc")
     has_winner = models.BooleanField(default=False)
@@ -102,18 +118,38 @@ class GameRound(models.Model):
         verbose_name_plural = 'Game Rounds'
         ordering = ['-scheduled_start']
         unique_together = ['game', 'round_number']
+        indexes = [
+            # "Next due" lookups for the round scheduler
+            models.Index(fields=['status', 'scheduled_start']),
+            models.Index(fields=['status', 'scheduled_end']),
+        ]
     
     def __str__(self):
         return f"{self.game.name} - Round {self.round_number}"
     
+    def save(self, *args, **kwargs):
+        # Counter columns are only written by games.counters.fold(); a full
+        # save from a stale instance must not roll them back
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
+    def refresh_counters(self):
+        """Load live participant/pool totals (folded row + unfolded shards)"""
+        from .counters import totals
+        self.total_participants, self.total_pool_amount = totals(self)
+        return self.total_participants, self.total_pool_amount
+    
     def is_open_for_entry(self):
         """Check if round is accepting entries"""
         now = timezone.now()
-        return (
-            self.status == 'open' and
-            self.scheduled_start <= now < self.scheduled_end and
-            self.total_participants < self.game.max_participants
-        )
+        if not (self.status == 'open' and self.scheduled_start <= now < self.scheduled_end):
+            return False
+        participants, _ = self.refresh_counters()
+        return participants < self.game.max_participants
     
     def can_participate(self, user):
         """Check if user can participate in this round"""
@@ -131,6 +167,27 @@ class GameRound(models.Model):
         return True, "OK"
 
 
+class GameRoundCounter(models.Model):
+    """One shard of a round's participant/pool counters.
+    
+    Entries increment a random shard so concurrent players don't queue on the
+    GameRound row; games.counters sums the shards on read and folds them back
+    into GameRound periodically.
+    """
+    game_round = models.ForeignKey(GameRound, on_delete=models.CASCADE, related_name='counter_shards')
+    shard = models.PositiveSmallIntegerField()
+    participants = models.IntegerField(default=0)
+    pool_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    
+    class Meta:
+        verbose_name = 'Game Round Counter'
+        verbose_name_plural = 'Game Round Counters'
+        unique_together = ['game_round', 'shard']
+    
+    def __str__(self):
+        return f"{self.game_round} - shard {self.shard}"
+
+
 class UserEntry(models.Model):
     """User's entry/participation in a game round"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='game_entries')
@@ -138,6 +195,7 @@ class UserEntry(models.Model):
     
     # User's choice/selection
     user_choice = models.JSONField(help_text="User's selected numbers/colors/etc")
+    choice_key = models.CharField(max_length=64, blank=True, default='', editable=False, help_text="Hash of the canonical selection, for exact-match lookups")
     
     # Entry details
     entry_fee_paid = models.DecimalField(max_digits=10, decimal_places=2)
@@ -155,15 +213,28 @@ class UserEntry(models.Model):
         verbose_name_plural = 'User Entries'
         ordering = ['-created_at']
         unique_together = ['user', 'game_round']
+        indexes = [
+            models.Index(fields=['game_round', 'choice_key']),
+            # Keyset pagination of my_entries (transactions.pagination)
+            models.Index(fields=['user', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.game_round}"
     
+    @staticmethod
+    def generate_entry_number():
+        """Unique entry number (also used for bulk_create, which skips save())"""
+        import uuid
+        return f"ENT-{uuid.uuid4().hex[:8].upper()}"
+    
     def save(self, *args, **kwargs):
         if not self.entry_number:
             # Generate unique entry number
-            import uuid
-            self.entry_number = f"ENT-{uuid.uuid4().hex[:8].upper()}"
+            self.entry_number = self.generate_entry_number()
+        if not self.choice_key:
+            from .resolution import choice_key
+            self.choice_key = choice_key(self.game_round.game, self.user_choice)
         super().save(*args, **kwargs)
 
 
@@ -190,6 +261,66 @@ class Winner(models.Model):
         return f"{self.user.username} won {self.prize_amount} in {self.game_round}"
 
 
+class RoundResolutionJob(models.Model):
+    """Queued winner selection for a closed round.
+    
+    The admin only enqueues; the resolve_rounds worker claims jobs with
+    SELECT ... FOR UPDATE SKIP LOCKED, settles the round and records its
+    progress here for the admin page to poll.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    METHOD_CHOICES = [
+        ('auto', 'Automatic'),
+        ('manual', 'Manual'),
+    ]
+    
+    game_round = models.OneToOneField(GameRound, on_delete=models.CASCADE, related_name='resolution_job')
+    method = models.CharField(max_length=10, choices=METHOD_CHOICES, default='auto')
+    manual_entry = models.ForeignKey(UserEntry, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', help_text="Winning entry for manual selection")
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    
+    # Worker state
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    worker = models.CharField(max_length=100, blank=True, default='')
+    lease_expires_at = models.DateTimeField(null=True, blank=True, help_text="A running job whose lease lapsed can be claimed by another worker")
+    attempts = models.PositiveIntegerField(default=0)
+    
+    # Progress
+    total_winners = models.PositiveIntegerField(default=0)
+    settled_winners = models.PositiveIntegerField(default=0)
+    message = models.CharField(max_length=255, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Round Resolution Job'
+        verbose_name_plural = 'Round Resolution Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.game_round} - {self.get_status_display()}"
+    
+    @property
+    def progress_percent(self):
+        if self.status == 'completed':
+            return 100
+        if not self.total_winners:
+            return 0
+        return int(self.settled_winners * 100 / self.total_winners)
+
+
 class Leaderboard(models.Model):
     """Leaderboard/rankings for users"""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='leaderboard')
@@ -212,17 +343,62 @@ class Leaderboard(models.Model):
         verbose_name = 'Leaderboard Entry'
         verbose_name_plural = 'Leaderboard'
         ordering = ['-points', '-total_winnings']
+        indexes = [
+            models.Index(fields=['points', 'total_winnings']),
+            models.Index(fields=['last_updated']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - Rank: {self.rank or 'Unranked'}"
     
     def update_stats(self):
         """Update user statistics"""
-        entries = UserEntry.objects.filter(user=self.user)
-        self.total_games_played = entries.count()
-        self.total_wins = entries.filter(is_winner=True).count()
-        self.total_winnings = sum(entry.winning_amount for entry in entries.filter(is_winner=True))
-        self.total_spent = sum(entry.entry_fee_paid for entry in entries)
-        self.win_rate = (self.total_wins / self.total_games_played * 100) if self.total_games_played > 0 else 0
-        self.points = (self.total_wins * 10) + int(self.total_winnings)
-        self.save()
+        from .leaderboard_service import rebuild_stats
+        rebuild_stats([self.user_id])
+        self.refresh_from_db()
+
+
+class LeaderboardRollup(models.Model):
+    """A user's leaderboard totals in one game for one day, week or month.
+    
+    Maintained by games.rollups as entries and winners are written; entries
+    count in the period they were made, prizes in the period they were paid.
+    """
+    PERIOD_CHOICES = [
+        ('day', 'Day'),
+        ('week', 'Week'),
+        ('month', 'Month'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_rollups')
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='leaderboard_rollups')
+    period_type = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    period_start = models.DateField(help_text="First day of the period (weeks start on Monday)")
+    
+    # Statistics
+    total_games_played = models.IntegerField(default=0)
+    total_wins = models.IntegerField(default=0)
+    total_winnings = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    total_spent = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    points = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Leaderboard Rollup'
+        verbose_name_plural = 'Leaderboard Rollups'
+        ordering = ['-period_start', '-points', '-total_winnings']
+        unique_together = ['user', 'game', 'period_type', 'period_start']
+        indexes = [
+            models.Index(fields=['game', 'period_type', 'period_start', 'points', 'total_winnings']),
+            models.Index(fields=['period_type', 'period_start', 'user']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.game.name} ({self.get_period_type_display()} of {self.period_start})"
+    
+    @property
+    def win_rate(self):
+        if not self.total_games_played:
+            return 0.0
+        return self.total_wins * 100.0 / self.total_games_played
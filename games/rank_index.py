@@ -0,0 +1,275 @@
+"""
+In-process ranked index of the leaderboard.
+
+Each worker keeps every ranked player in an indexable skip list ordered by
+(-points, -total_winnings, user_id). Top-N, a player's exact rank and the
+players around them are then O(log n) lookups instead of table scans.
+
+The index is built from the table on first use and stays in step with it
+through a versioned snapshot: the version is the table's high-water mark,
+MAX(last_updated), which every leaderboard write advances. A worker compares
+it with its own version (at most every LEADERBOARD_INDEX_CHECK_SECONDS) and,
+when it moved, re-reads only the rows updated since, so all gunicorn
+workers converge on the same ranking without sharing memory.
+"""
+import math
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max
+
+from .models import Leaderboard
+
+
+class _End:
+    """Sentinel that sorts after every key"""
+    
+    def __lt__(self, other):
+        return False
+    
+    def __le__(self, other):
+        return False
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+    
+    def __init__(self, key, levels):
+        self.key = key
+        self.next = [None] * levels
+        self.width = [1] * levels
+
+
+class IndexableSkipList:
+    """Sorted keys with O(log n) insert, remove, rank and positional access.
+    
+    Each link stores how many bottom-level steps it spans, so positions can
+    be counted while descending.
+    """
+    MAX_LEVELS = 32
+    
+    def __init__(self):
+        self._nil = _Node(_End(), 0)
+        self._head = _Node(None, self.MAX_LEVELS)
+        self._head.next = [self._nil] * self.MAX_LEVELS
+        self._size = 0
+    
+    def __len__(self):
+        return self._size
+    
+    def _random_levels(self):
+        return min(self.MAX_LEVELS, 1 - int(math.log(1.0 - random.random(), 2)))
+    
+    def insert(self, key):
+        chain = [None] * self.MAX_LEVELS
+        steps_at_level = [0] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key <= key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+        
+        levels = self._random_levels()
+        new = _Node(key, levels)
+        steps = 0
+        for level in range(levels):
+            previous = chain[level]
+            new.next[level] = previous.next[level]
+            previous.next[level] = new
+            new.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+        self._size += 1
+    
+    def remove(self, key):
+        chain = [None] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+        
+        target = chain[0].next[0]
+        if target is self._nil or target.key != key:
+            raise KeyError(key)
+        for level in range(len(target.next)):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = target.next[level]
+        for level in range(len(target.next), self.MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self._size -= 1
+    
+    def rank(self, key):
+        """Number of keys strictly less than key"""
+        position = 0
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+    
+    def __getitem__(self, index):
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        remaining = index + 1
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node.key
+    
+    def slice(self, start, stop):
+        """Keys at positions [start, stop): one descent, then a walk along the bottom level"""
+        start, stop = max(start, 0), min(stop, self._size)
+        if start >= stop:
+            return []
+        keys = []
+        node = self._head
+        remaining = start + 1
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        while len(keys) < stop - start:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+def _key(user_id, points, winnings):
+    return (-points, -winnings, user_id)
+
+
+def _tie_key(key):
+    # Sorts before every key with the same score, so rank() counts only players strictly ahead
+    return (key[0], key[1], -1)
+
+
+class LeaderboardIndex:
+    """Per-process ranking of every player who has played"""
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = None
+        self._keys = {}
+        self._version = None
+        self._built_at = 0.0
+        self._checked_at = 0.0
+    
+    def _rebuild(self):
+        # Version first: anything written while the rows are read is picked up by the next sync
+        version = Leaderboard.objects.aggregate(version=Max('last_updated'))['version']
+        entries = IndexableSkipList()
+        keys = {}
+        rows = Leaderboard.objects.filter(total_games_played__gt=0).values_list(
+            'user_id', 'points', 'total_winnings'
+        ).iterator(chunk_size=5000)
+        for user_id, points, winnings in rows:
+            key = _key(user_id, points, winnings)
+            entries.insert(key)
+            keys[user_id] = key
+        
+        self._entries, self._keys, self._version = entries, keys, version
+        self._built_at = time.monotonic()
+    
+    def _sync(self, version):
+        # Re-read a little before our version: a write stamped earlier may have committed later
+        since = self._version - timedelta(seconds=getattr(settings, 'LEADERBOARD_INDEX_SYNC_OVERLAP', 30))
+        rows = Leaderboard.objects.filter(last_updated__gte=since).values_list(
+            'user_id', 'points', 'total_winnings', 'total_games_played'
+        )
+        for user_id, points, winnings, games in rows:
+            old = self._keys.pop(user_id, None)
+            if old is not None:
+                self._entries.remove(old)
+            if games > 0:
+                key = _key(user_id, points, winnings)
+                self._entries.insert(key)
+                self._keys[user_id] = key
+        self._version = version
+    
+    def refresh(self, force=False):
+        """Bring the index up to the table's current version"""
+        now = time.monotonic()
+        with self._lock:
+            max_age = getattr(settings, 'LEADERBOARD_INDEX_REBUILD_SECONDS', 3600)
+            if self._entries is None or force or now - self._built_at > max_age:
+                self._rebuild()
+                self._checked_at = now
+                return
+            
+            if now - self._checked_at < getattr(settings, 'LEADERBOARD_INDEX_CHECK_SECONDS', 1.0):
+                return
+            self._checked_at = now
+            
+            version = Leaderboard.objects.aggregate(version=Max('last_updated'))['version']
+            if version != self._version:
+                if self._version is None:
+                    self._rebuild()
+                else:
+                    self._sync(version)
+    
+    def _rank_of_key(self, key):
+        return self._entries.rank(_tie_key(key)) + 1
+    
+    def top(self, limit=100):
+        """[(rank, user_id)] for the first `limit` players (ties share a rank)"""
+        self.refresh()
+        with self._lock:
+            return self._ranked(self._entries.slice(0, limit), 0)
+    
+    def rank_of(self, user_id):
+        """Competition rank of the player, or None if they haven't played"""
+        self.refresh()
+        with self._lock:
+            key = self._keys.get(user_id)
+            return None if key is None else self._rank_of_key(key)
+    
+    def neighbors(self, user_id, radius=5):
+        """[(rank, user_id)] for up to `radius` players either side of the player"""
+        self.refresh()
+        with self._lock:
+            key = self._keys.get(user_id)
+            if key is None:
+                return []
+            position = self._entries.rank(key)
+            start = max(position - radius, 0)
+            return self._ranked(self._entries.slice(start, position + radius + 1), start)
+    
+    def _ranked(self, keys, start):
+        ranked = []
+        previous = None
+        for offset, key in enumerate(keys):
+            if previous is None:
+                rank = self._rank_of_key(key)
+            elif key[:2] != previous[:2]:
+                rank = start + offset + 1
+            previous = key
+            ranked.append((rank, key[2]))
+        return ranked
+
+
+index = LeaderboardIndex()
+
+
+def load(standings):
+    """Leaderboard rows for [(rank, user_id)], in order and with .rank set"""
+    rows = Leaderboard.objects.select_related('user').in_bulk(
+        [user_id for _, user_id in standings], field_name='user_id'
+    )
+    loaded = []
+    for rank, user_id in standings:
+        row = rows.get(user_id)
+        if row is not None:
+            row.rank = rank
+            loaded.append(row)
+    return loaded
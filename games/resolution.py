@@ -0,0 +1,191 @@
+"""
+Round resolution helpers: winning-combination generation, exact-match
+winner lookup and prize computation.
+
+Every UserEntry stores choice_key, a hash of its canonical selection. Exact
+match games then find their winners with one query on the indexed
+(game_round, choice_key) pair instead of loading and comparing every
+entry's JSON.
+"""
+import hashlib
+import json
+import random
+from decimal import Decimal, ROUND_DOWN
+
+
+EXACT_MATCH_TYPES = ('number_match', 'lucky_draw', 'color_game', 'odd_even')
+
+TWO_PLACES = Decimal('0.01')
+
+
+def is_order_insensitive(game):
+    """Whether the rules treat the selection as a set rather than a sequence"""
+    if game.game_type == 'keno':
+        return True
+    if game.game_type == 'custom':
+        config = game.game_config or {}
+        return config.get('input_type') == 'choice' and config.get('multiple_selection', False)
+    return False
+
+
+def choice_key(game, user_choice):
+    """Canonical hash of a selection (sorted first when order doesn't matter)"""
+    values = list(user_choice or [])
+    if is_order_insensitive(game):
+        values = sorted(values, key=lambda value: json.dumps(value, sort_keys=True))
+    canonical = json.dumps(values, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def uses_exact_match(game):
+    """Whether winners are exactly the entries whose selection equals the result"""
+    if game.game_type in EXACT_MATCH_TYPES:
+        return True
+    if game.game_type == 'custom':
+        config = game.game_config or {}
+        return (
+            config.get('winning_logic', 'exact_match') == 'exact_match' and
+            config.get('input_type') in ('number', 'choice')
+        )
+    return False
+
+
+def generate_winning_combination(game):
+    """Draw a random result for the game (None when the game has no draw)"""
+    if game.game_type == 'number_match':
+        return [random.randint(0, 99) for _ in range(5)]
+    
+    if game.game_type == 'lucky_draw':
+        return [random.randint(1, 100)]
+    
+    if game.game_type == 'color_game':
+        return [random.choice(['red', 'green', 'blue', 'yellow'])]
+    
+    if game.game_type == 'keno':
+        config = game.game_config or {}
+        pool = config.get('number_pool', 80)
+        return sorted(random.sample(range(1, pool + 1), config.get('numbers_drawn', 20)))
+    
+    if game.game_type == 'odd_even':
+        low, high = (game.game_config or {}).get('number_range', [1, 100])
+        return ['odd' if random.randint(low, high) % 2 else 'even']
+    
+    if game.game_type == 'custom':
+        config = game.game_config or {}
+        
+        if config.get('input_type') == 'number':
+            number_count = config.get('number_count', 1)
+            min_val = config.get('min_value', 1)
+            max_val = config.get('max_value', 100)
+            return [random.randint(min_val, max_val) for _ in range(number_count)]
+        
+        if config.get('input_type') == 'choice':
+            choices = config.get('choices', [])
+            if config.get('multiple_selection', False):
+                selection_count = config.get('selection_count', 1)
+                return random.sample(choices, min(selection_count, len(choices)))
+            return [random.choice(choices)]
+    
+    return None
+
+
+def payout_multiplier(game, winning_combination):
+    """Fixed per-ticket multiplier of the entry fee, or None if winners split the prize"""
+    if game.game_type == 'odd_even':
+        config = game.game_config or {}
+        return config.get(f'{winning_combination[0]}_payout')
+    return None
+
+
+def resolve_prizes(game_round, winning_combination):
+    """Winning entries of the round and what each one is paid.
+    
+    Fixed-multiplier games (odd/even, keno paytables) pay every winning
+    ticket its own prize; everything else splits the game's winning_amount.
+    Random picks reuse winners already recorded for the round, so resuming
+    an interrupted settlement never draws a second winner.
+    
+    Returns:
+        tuple: (winning_combination, {entry_id: prize})
+    """
+    from . import scoring
+    from .models import UserEntry, Winner
+    
+    game = game_round.game
+    config = game.game_config or {}
+    winner_ids = []
+    
+    if uses_exact_match(game):
+        winners = list(exact_match_winners(game_round, winning_combination).values_list('pk', 'entry_fee_paid'))
+        multiplier = payout_multiplier(game, winning_combination)
+        if multiplier is not None:
+            return winning_combination, {
+                pk: (fee * Decimal(str(multiplier))).quantize(TWO_PLACES) for pk, fee in winners
+            }
+        winner_ids = [pk for pk, _ in winners]
+    
+    elif game.game_type == 'keno':
+        return winning_combination, scoring.score_keno(game_round, winning_combination).prizes()
+    
+    elif game.game_type == 'custom':
+        winning_logic = config.get('winning_logic', 'exact_match')
+        input_type = config.get('input_type')
+        
+        if input_type == 'number' and winning_logic == 'partial_match':
+            # Highest number of positional matches (at least one)
+            winner_ids = scoring.score_partial_match(game_round, winning_combination).best(positive_only=True)
+        elif input_type == 'number' and winning_logic == 'closest':
+            if config.get('number_count', 1) == 1:
+                winner_ids = scoring.score_closest(game_round, winning_combination[0]).best(lowest=True)
+        elif input_type == 'text' or winning_logic == 'random':
+            winner_ids = list(Winner.objects.filter(game_round=game_round).values_list('user_entry_id', flat=True))
+            if not winner_ids:
+                entry_ids = list(UserEntry.objects.filter(game_round=game_round).values_list('pk', flat=True))
+                winner_ids = [random.choice(entry_ids)] if entry_ids else []
+            if input_type == 'text' and winner_ids:
+                # No answer to match against yet: the drawn entry's text becomes the result
+                winning_combination = UserEntry.objects.get(pk=winner_ids[0]).user_choice
+    
+    return winning_combination, split_prize(game.winning_amount, winner_ids)
+
+
+def split_prize(amount, entry_ids):
+    """Share a fixed prize equally, rounded down to the paisa"""
+    if not entry_ids:
+        return {}
+    share = (Decimal(str(amount)) / len(entry_ids)).quantize(TWO_PLACES, rounding=ROUND_DOWN)
+    return {pk: share for pk in entry_ids}
+
+
+def exact_match_winners(game_round, winning_combination):
+    """Entries whose selection equals the result: one indexed lookup"""
+    from .models import UserEntry
+    
+    backfill_choice_keys(UserEntry.objects.filter(game_round=game_round))
+    return UserEntry.objects.filter(
+        game_round=game_round,
+        choice_key=choice_key(game_round.game, winning_combination),
+    )
+
+
+def backfill_choice_keys(queryset, batch_size=1000):
+    """Fill choice_key on entries created before it existed.
+    
+    Returns:
+        int: number of entries updated
+    """
+    from .models import UserEntry
+    
+    pending = queryset.filter(choice_key='').select_related('game_round__game').order_by('pk')
+    updated = 0
+    last_pk = 0
+    
+    while True:
+        batch = list(pending.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return updated
+        for entry in batch:
+            entry.choice_key = choice_key(entry.game_round.game, entry.user_choice)
+        UserEntry.objects.bulk_update(batch, ['choice_key'])
+        updated += len(batch)
+        last_pk = batch[-1].pk
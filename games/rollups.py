@@ -0,0 +1,227 @@
+"""
+Time-windowed leaderboards (today, this week, this month; per game or overall).
+
+LeaderboardRollup holds each user's totals per (game, day/week/month). The
+write path adds the same deltas as the all-time leaderboard to the day, week
+and month rows of every affected user in one CASE UPDATE, so nothing reads
+UserEntry or Winner to answer a window:
+    
+    - one game, one period: a range scan on the (game, period, points) index
+    - all games, one period: a GROUP BY user over that period's rows
+    - any date range: a GROUP BY user over the day rows inside it
+
+Entries count in the period they were made, prizes in the period they were
+paid. rebuild_period() recomputes one period from the entry and winner
+tables with the same rule, for the backfill_leaderboard_rollups command.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth.models import User
+from django.db import transaction as db_transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .leaderboard_service import delta_updates, points
+from .models import LeaderboardRollup, UserEntry, Winner
+
+
+PERIOD_TYPES = ('day', 'week', 'month')
+
+
+def period_start(period_type, day):
+    """First day of the period containing `day` (weeks start on Monday)"""
+    if period_type == 'day':
+        return day
+    if period_type == 'week':
+        return day - timedelta(days=day.weekday())
+    if period_type == 'month':
+        return day.replace(day=1)
+    raise ValueError(f'Unknown period type: {period_type}')
+
+
+def period_end(period_type, start):
+    """First day after the period starting on `start`"""
+    if period_type == 'day':
+        return start + timedelta(days=1)
+    if period_type == 'week':
+        return start + timedelta(days=7)
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def periods_between(period_type, first_day, last_day):
+    """Start of every period overlapping [first_day, last_day]"""
+    starts = []
+    start = period_start(period_type, first_day)
+    while start <= last_day:
+        starts.append(start)
+        start = period_end(period_type, start)
+    return starts
+
+
+def record(game_id, deltas, when=None):
+    """Add per-user deltas to the day, week and month rollups of one game.
+    
+    Args:
+        deltas: {user_id: (games played, spent, wins, winnings)}
+        when: when the entries or prizes were written (default: now)
+    """
+    if not deltas:
+        return
+    day = timezone.localdate(when)
+    periods = [(period_type, period_start(period_type, day)) for period_type in PERIOD_TYPES]
+    user_ids = sorted(deltas)
+    
+    LeaderboardRollup.objects.bulk_create([
+        LeaderboardRollup(user_id=user_id, game_id=game_id, period_type=period_type, period_start=start)
+        for user_id in user_ids
+        for period_type, start in periods
+    ], ignore_conflicts=True)
+    
+    rows = LeaderboardRollup.objects.filter(game_id=game_id, user_id__in=user_ids).filter(
+        reduce(or_, [Q(period_type=period_type, period_start=start) for period_type, start in periods])
+    )
+    updates = delta_updates(deltas)
+    if updates:
+        rows.update(**updates)
+    rows.update(points=points(F('total_wins'), F('total_winnings')), updated_at=timezone.now())
+
+
+def top(period_type='week', day=None, game=None, limit=100):
+    """The first `limit` players of the period containing `day` (default: today).
+    
+    Returns LeaderboardRollup rows with .rank set (ties share a rank). Without
+    a game, the rows are unsaved per-user totals across every game.
+    """
+    start = period_start(period_type, day or timezone.localdate())
+    rows = LeaderboardRollup.objects.filter(period_type=period_type, period_start=start)
+    if game is None:
+        return _ranked(_totals(rows, period_type, start, limit))
+    return _ranked(list(
+        rows.filter(game=game).select_related('user', 'game').order_by('-points', '-total_winnings', 'user_id')[:limit]
+    ))
+
+
+def position(user, period_type='week', day=None, game=None):
+    """The user's totals and rank in the period containing `day` (default: today).
+    
+    Returns a LeaderboardRollup with .rank set, ranked as top() ranks (ties
+    share a rank), or None if the user has no rollup in the period. Without
+    a game it is an unsaved total across every game.
+    """
+    start = period_start(period_type, day or timezone.localdate())
+    rows = LeaderboardRollup.objects.filter(period_type=period_type, period_start=start)
+    if game is not None:
+        mine = rows.filter(game=game, user=user).select_related('user', 'game').first()
+        if mine is None:
+            return None
+        mine.rank = rows.filter(game=game).filter(
+            Q(points__gt=mine.points) | Q(points=mine.points, total_winnings__gt=mine.total_winnings)
+        ).count() + 1
+        return mine
+    
+    totals = _totals(rows.filter(user=user), period_type, start, 1)
+    if not totals:
+        return None
+    mine = totals[0]
+    mine.rank = rows.values('user_id').annotate(
+        winnings=Sum('total_winnings'),
+        score=points(Sum('total_wins'), Sum('total_winnings')),
+    ).filter(
+        Q(score__gt=mine.points) | Q(score=mine.points, winnings__gt=mine.total_winnings)
+    ).count() + 1
+    return mine
+
+
+def top_between(first_day, last_day, game=None, limit=100):
+    """The first `limit` players over the days [first_day, last_day], summed from the day rollups"""
+    rows = LeaderboardRollup.objects.filter(
+        period_type='day', period_start__gte=first_day, period_start__lte=last_day,
+    )
+    if game is not None:
+        rows = rows.filter(game=game)
+    return _ranked(_totals(rows, 'day', first_day, limit, game))
+
+
+def _totals(rows, period_type, start, limit, game=None):
+    """Per-user sums of the given rollup rows, best first, as unsaved rollups"""
+    totals = list(
+        rows.values('user_id').annotate(
+            games=Sum('total_games_played'),
+            spent=Sum('total_spent'),
+            wins=Sum('total_wins'),
+            winnings=Sum('total_winnings'),
+            score=points(Sum('total_wins'), Sum('total_winnings')),
+        ).order_by('-score', '-winnings', 'user_id')[:limit]
+    )
+    users = User.objects.in_bulk([row['user_id'] for row in totals])
+    return [
+        LeaderboardRollup(
+            user=users[row['user_id']],
+            game=game,
+            period_type=period_type,
+            period_start=start,
+            total_games_played=row['games'],
+            total_spent=row['spent'],
+            total_wins=row['wins'],
+            total_winnings=row['winnings'],
+            points=row['score'],
+        )
+        for row in totals
+    ]
+
+
+def _ranked(rows):
+    previous = None
+    for position, row in enumerate(rows, start=1):
+        key = (row.points, row.total_winnings)
+        if key != previous:
+            rank = position
+            previous = key
+        row.rank = rank
+    return rows
+
+
+def rebuild_period(period_type, start):
+    """Recompute every rollup of one period from UserEntry and Winner.
+    
+    Returns:
+        int: rollup rows written
+    """
+    since = timezone.make_aware(datetime.combine(start, time.min))
+    until = timezone.make_aware(datetime.combine(period_end(period_type, start), time.min))
+    
+    totals = {}
+    entries = UserEntry.objects.filter(created_at__gte=since, created_at__lt=until).values(
+        'user_id', 'game_round__game_id',
+    ).annotate(games=Count('pk'), spent=Sum('entry_fee_paid'))
+    for row in entries:
+        totals[row['user_id'], row['game_round__game_id']] = [row['games'], row['spent'], 0, Decimal('0.00')]
+    
+    wins = Winner.objects.filter(announced_at__gte=since, announced_at__lt=until).values(
+        'user_id', 'game_round__game_id',
+    ).annotate(wins=Count('pk'), winnings=Sum('prize_amount'))
+    for row in wins:
+        total = totals.setdefault((row['user_id'], row['game_round__game_id']), [0, Decimal('0.00'), 0, Decimal('0.00')])
+        total[2], total[3] = row['wins'], row['winnings']
+    
+    rows = [
+        LeaderboardRollup(
+            user_id=user_id,
+            game_id=game_id,
+            period_type=period_type,
+            period_start=start,
+            total_games_played=games,
+            total_spent=spent,
+            total_wins=wins,
+            total_winnings=winnings,
+            points=wins * 10 + int(winnings),
+        )
+        for (user_id, game_id), (games, spent, wins, winnings) in sorted(totals.items())
+    ]
+    with db_transaction.atomic():
+        LeaderboardRollup.objects.filter(period_type=period_type, period_start=start).delete()
+        LeaderboardRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -0,0 +1,118 @@
+"""
+Round lifecycle scheduler.
+
+run_round_scheduler calls tick() in a loop:
+    
+    scheduled -> open     when scheduled_start passes
+    open -> closed        when scheduled_end passes (counters folded)
+    closed -> resolution  a RoundResolutionJob for the resolve_rounds worker
+    next round            created back to back for auto-scheduled games
+
+Each transition is a conditional UPDATE on the expected status, next rounds
+are inserted under the (game, round_number) unique constraint and jobs are
+one per round, so several app nodes can run the scheduler at once without a
+round ever firing twice. Between ticks the loop sleeps until the next
+scheduled_start/scheduled_end, read through the (status, scheduled_*)
+indexes, so one-minute rounds flip within milliseconds of their deadline.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction as db_transaction
+
+from . import counters, jobs
+from .models import MIN_ROUND_DURATION_SECONDS, Game, GameRound
+
+
+def open_due(now):
+    """Open scheduled rounds whose start time has passed"""
+    return GameRound.objects.filter(status='scheduled', scheduled_start__lte=now).update(
+        status='open', actual_start=now, updated_at=now,
+    )
+
+
+def close_due(now):
+    """Close open rounds whose entry window has ended.
+    
+    Returns:
+        list: ids of the rounds this call closed
+    """
+    due = GameRound.objects.filter(status='open', scheduled_end__lte=now).values_list('pk', flat=True)
+    closed = [
+        pk for pk in due
+        if GameRound.objects.filter(pk=pk, status='open').update(status='closed', actual_end=now, updated_at=now)
+    ]
+    if closed:
+        counters.fold(closed)
+    return closed
+
+
+def queue_resolutions():
+    """Queue winner selection for closed rounds of auto-scheduled games"""
+    pending = GameRound.objects.filter(
+        status='closed', game__auto_schedule_rounds=True, resolution_job__isnull=True,
+    )
+    queued = 0
+    for game_round in pending:
+        jobs.enqueue(game_round)
+        queued += 1
+    return queued
+
+
+def schedule_next(now):
+    """Create the next round for auto-scheduled games with none scheduled or open.
+    
+    The new round starts where the previous one ended (unless the scheduler
+    was down for longer than a whole round), so short rounds run back to back
+    without drifting.
+    """
+    # A shorter window (saved before the field was validated, or by a raw
+    # UPDATE) would close as soon as it opened and spin the scheduler loop
+    games = Game.objects.filter(
+        status='active', auto_schedule_rounds=True, round_duration_seconds__gte=MIN_ROUND_DURATION_SECONDS,
+    ).exclude(
+        rounds__status__in=('scheduled', 'open'),
+    )
+    created = 0
+    for game in games:
+        duration = timedelta(seconds=game.round_duration_seconds)
+        last = game.rounds.order_by('-round_number').values_list('round_number', 'scheduled_end').first()
+        
+        start = now
+        if last and now - duration < last[1]:
+            start = last[1]
+        
+        try:
+            with db_transaction.atomic():
+                GameRound.objects.create(
+                    game=game,
+                    round_number=(last[0] + 1) if last else 1,
+                    scheduled_start=start,
+                    scheduled_end=start + duration,
+                    actual_start=now if start <= now else None,
+                    status='open' if start <= now else 'scheduled',
+                )
+        except IntegrityError:
+            # Another scheduler node created this round number first
+            continue
+        created += 1
+    return created
+
+
+def tick(now):
+    """Run every transition that is due at `now`"""
+    opened = open_due(now)
+    closed = close_due(now)
+    return {
+        'opened': opened,
+        'closed': len(closed),
+        'queued': queue_resolutions(),
+        'created': schedule_next(now),
+    }
+
+
+def next_due():
+    """Earliest upcoming scheduled_start or scheduled_end, or None"""
+    starts = GameRound.objects.filter(status='scheduled').order_by('scheduled_start').values_list('scheduled_start', flat=True)
+    ends = GameRound.objects.filter(status='open').order_by('scheduled_end').values_list('scheduled_end', flat=True)
+    candidates = [when for when in (starts.first(), ends.first()) if when is not None]
+    return min(candidates) if candidates else None
@@ -0,0 +1,221 @@
+"""
+Batch scoring for rounds that aren't decided by an exact match.
+
+Entries are streamed from the database in chunks and packed into flat
+arrays. Each keno ticket becomes a two-word bitmask over the 80-number pool,
+so a round's hit counts come from a couple of vectorized AND + popcount
+operations instead of a Python loop per ticket. NumPy is used when it is
+installed; otherwise the same scoring runs on Python ints.
+"""
+from decimal import Decimal
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+KENO_POOL = 80
+KENO_MAX_PICKS = 20
+CHUNK_SIZE = 10000
+
+
+class RoundScores:
+    """Scores for every entry of a round, as parallel arrays"""
+    
+    def __init__(self, entry_ids, scores, fees, multipliers=None):
+        self.entry_ids = entry_ids
+        self.scores = scores
+        self.fees = fees
+        self.multipliers = multipliers
+        self.vectorized = np is not None and isinstance(entry_ids, np.ndarray)
+    
+    def __len__(self):
+        return len(self.entry_ids)
+    
+    def best(self, lowest=False, positive_only=False):
+        """Entry ids sharing the best score (highest, or lowest for distances)"""
+        if not len(self):
+            return []
+        if self.vectorized:
+            target = self.scores.min() if lowest else self.scores.max()
+            if positive_only and target <= 0:
+                return []
+            return self.entry_ids[self.scores == target].tolist()
+        
+        target = min(self.scores) if lowest else max(self.scores)
+        if positive_only and target <= 0:
+            return []
+        return [pk for pk, score in zip(self.entry_ids, self.scores) if score == target]
+    
+    def prizes(self):
+        """{entry_id: prize} for entries whose paytable multiplier is non-zero"""
+        if self.multipliers is None:
+            return {}
+        if self.vectorized:
+            winning = np.nonzero(self.multipliers)[0]
+            pairs = zip(self.entry_ids[winning].tolist(), self.multipliers[winning].tolist(), self.fees[winning].tolist())
+        else:
+            pairs = ((pk, m, fee) for pk, m, fee in zip(self.entry_ids, self.multipliers, self.fees) if m)
+        return {
+            pk: (Decimal(str(multiplier)) * Decimal(str(fee))).quantize(Decimal('0.01'))
+            for pk, multiplier, fee in pairs
+        }
+    
+    def tiers(self):
+        """{score: number of entries}, e.g. how many keno tickets hit 0..20"""
+        counts = {}
+        scores = self.scores.tolist() if self.vectorized else self.scores
+        for score in scores:
+            counts[score] = counts.get(score, 0) + 1
+        return counts
+
+
+def _stream(game_round, chunk_size=CHUNK_SIZE):
+    """Yield (entry_id, user_choice, fee) without materializing model instances"""
+    from .models import UserEntry
+    
+    return UserEntry.objects.filter(game_round=game_round).order_by().values_list(
+        'pk', 'user_choice', 'entry_fee_paid'
+    ).iterator(chunk_size=chunk_size)
+
+
+def _popcount(values):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    # NumPy < 2.0: count bits byte by byte
+    table = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+    return table[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def keno_payout_table(config):
+    """Dense [spots][hits] multiplier table from the game's payout_table config"""
+    table = [[0.0] * (KENO_MAX_PICKS + 1) for _ in range(KENO_MAX_PICKS + 1)]
+    for spots, tiers in (config.get('payout_table') or {}).items():
+        for hits, multiplier in tiers.items():
+            spots_i, hits_i = int(spots), int(hits)
+            if 0 < spots_i <= KENO_MAX_PICKS and 0 <= hits_i <= spots_i:
+                table[spots_i][hits_i] = float(multiplier)
+    return table
+
+
+def score_keno(game_round, drawn, payout_table=None):
+    """Hit counts and paytable multipliers for every ticket in the round.
+    
+    Scores are hits per ticket; multipliers come from
+    payout_table[spots picked][hits].
+    """
+    if payout_table is None:
+        payout_table = keno_payout_table(game_round.game.game_config or {})
+    
+    entry_ids, lengths, flat, fees = [], [], [], []
+    for pk, choice, fee in _stream(game_round):
+        if not choice:
+            continue
+        entry_ids.append(pk)
+        lengths.append(len(choice))
+        flat.extend(choice)
+        fees.append(fee)
+    
+    if np is None:
+        return _score_keno_python(entry_ids, lengths, flat, fees, drawn, payout_table)
+    
+    if not entry_ids:
+        empty = np.zeros(0, dtype=np.int64)
+        return RoundScores(empty, empty, np.zeros(0), np.zeros(0))
+    
+    # Bit n-1 marks number n: numbers 1-64 go in the low word, 65-80 in the high word
+    bits = np.asarray(flat, dtype=np.int64) - 1
+    one = np.uint64(1)
+    low = np.where(bits < 64, np.left_shift(one, np.clip(bits, 0, 63).astype(np.uint64)), np.uint64(0))
+    high = np.where(bits >= 64, np.left_shift(one, np.clip(bits - 64, 0, 63).astype(np.uint64)), np.uint64(0))
+    
+    lengths = np.asarray(lengths, dtype=np.int64)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    low_masks = np.bitwise_or.reduceat(low, starts)
+    high_masks = np.bitwise_or.reduceat(high, starts)
+    
+    drawn_low, drawn_high = _keno_mask(drawn)
+    hits = (
+        _popcount(low_masks & np.uint64(drawn_low)).astype(np.int64) +
+        _popcount(high_masks & np.uint64(drawn_high)).astype(np.int64)
+    )
+    
+    table = np.asarray(payout_table, dtype=np.float64)
+    spots = np.clip(lengths, 0, KENO_MAX_PICKS)
+    multipliers = table[spots, np.clip(hits, 0, KENO_MAX_PICKS)]
+    
+    return RoundScores(
+        np.asarray(entry_ids, dtype=np.int64),
+        hits,
+        np.asarray([float(fee) for fee in fees], dtype=np.float64),
+        multipliers,
+    )
+
+
+def _keno_mask(numbers):
+    low = high = 0
+    for n in numbers:
+        if n <= 64:
+            low |= 1 << (n - 1)
+        else:
+            high |= 1 << (n - 65)
+    return low, high
+
+
+def _score_keno_python(entry_ids, lengths, flat, fees, drawn, payout_table):
+    drawn_mask = 0
+    for n in drawn:
+        drawn_mask |= 1 << (n - 1)
+    
+    hits, multipliers = [], []
+    offset = 0
+    for length in lengths:
+        mask = 0
+        for n in flat[offset:offset + length]:
+            mask |= 1 << (n - 1)
+        offset += length
+        count = bin(mask & drawn_mask).count('1')
+        hits.append(count)
+        multipliers.append(payout_table[min(length, KENO_MAX_PICKS)][min(count, KENO_MAX_PICKS)])
+    return RoundScores(entry_ids, hits, fees, multipliers)
+
+
+def score_partial_match(game_round, winning_combination):
+    """Number of positions where each entry equals the winning combination"""
+    width = len(winning_combination)
+    entry_ids, rows, fees = [], [], []
+    for pk, choice, fee in _stream(game_round):
+        entry_ids.append(pk)
+        rows.append((list(choice or []) + [None] * width)[:width])
+        fees.append(fee)
+    
+    if np is None:
+        scores = [sum(1 for a, b in zip(row, winning_combination) if a == b) for row in rows]
+        return RoundScores(entry_ids, scores, fees)
+    
+    # Missing positions become a sentinel that can never match
+    sentinel = np.iinfo(np.int64).min
+    matrix = np.asarray(
+        [[sentinel if v is None else v for v in row] for row in rows],
+        dtype=np.int64,
+    ).reshape(len(rows), width)
+    scores = (matrix == np.asarray(winning_combination, dtype=np.int64)).sum(axis=1)
+    return RoundScores(np.asarray(entry_ids, dtype=np.int64), scores, np.asarray([float(f) for f in fees]))
+
+
+def score_closest(game_round, target):
+    """Absolute distance between each entry's first number and the target"""
+    entry_ids, values, fees = [], [], []
+    for pk, choice, fee in _stream(game_round):
+        if not choice:
+            continue
+        entry_ids.append(pk)
+        values.append(choice[0])
+        fees.append(fee)
+    
+    if np is None:
+        return RoundScores(entry_ids, [abs(v - target) for v in values], fees)
+    
+    scores = np.abs(np.asarray(values, dtype=np.int64) - target)
+    return RoundScores(np.asarray(entry_ids, dtype=np.int64), scores, np.asarray([float(f) for f in fees]))
@@ -0,0 +1,147 @@
+"""
+Prize settlement for a resolved round.
+
+All payouts are computed up front as {entry_id: prize}; settle_round() then
+applies them with a fixed number of statements per batch, however many
+winners there are:
+    
+    - one CASE UPDATE crediting every winner's wallet (accounts.wallet.credit_many)
+    - one bulk INSERT each for Winner and Transaction rows
+    - one CASE UPDATE marking the UserEntry rows as winners
+
+By default the whole settlement is one DB transaction. Entries that already
+have a Winner row are skipped, so a settlement that failed midway (or was
+run in committed batches) can simply be run again to finish it.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Case, DecimalField, Value, When
+from django.utils import timezone
+
+from accounts import wallet
+from transactions.models import Transaction
+
+from . import leaderboard_service
+from .models import GameRound, UserEntry, Winner
+
+
+def default_batch_size():
+    """Winners per committed batch (None settles everything in one transaction)"""
+    return getattr(settings, 'PRIZE_SETTLEMENT_BATCH_SIZE', None)
+
+
+def settle_round(game_round, prizes, batch_size=None, progress=None):
+    """Pay out prizes and mark the round completed.
+    
+    Args:
+        prizes: {entry_id: prize amount} for every winning entry of the round
+        batch_size: commit after this many winners (defaults to
+            PRIZE_SETTLEMENT_BATCH_SIZE; None settles in one transaction)
+        progress: optional callable(done, total) run after each batch commits
+    
+    Returns:
+        tuple: (entries settled by this call, total amount they were paid)
+    """
+    if batch_size is None:
+        batch_size = default_batch_size()
+    entry_ids = sorted(prizes)
+    step = batch_size or len(entry_ids) or 1
+    batches = [entry_ids[start:start + step] for start in range(0, len(entry_ids), step)] or [[]]
+    settled, total_paid = 0, Decimal('0.00')
+    
+    for index, batch in enumerate(batches):
+        with db_transaction.atomic():
+            count, paid = _settle_batch(game_round, batch, prizes)
+            if index == len(batches) - 1:
+                # The round only shows as completed once its last payout commits
+                game_round.status = 'completed'
+                game_round.has_winner = bool(prizes)
+                game_round.result_announced_at = timezone.now()
+                game_round.save(update_fields=['status', 'has_winner', 'result_announced_at', 'updated_at'])
+        settled += count
+        total_paid += paid
+        if progress is not None:
+            progress(min((index + 1) * step, len(entry_ids)), len(entry_ids))
+    
+    return settled, total_paid
+
+
+def _settle_batch(game_round, entry_ids, prizes):
+    """Pay the entries of one batch that have no Winner row yet (caller holds the transaction)"""
+    # Serialize settlements of the same round so an entry is never paid twice
+    list(GameRound.objects.select_for_update().filter(pk=game_round.pk).values_list('pk'))
+    
+    paid_ids = set(Winner.objects.filter(user_entry_id__in=entry_ids).values_list('user_entry_id', flat=True))
+    entries = list(
+        UserEntry.objects.filter(game_round=game_round, pk__in=entry_ids)
+        .exclude(pk__in=paid_ids).order_by('pk').values_list('pk', 'user_id')
+    )
+    if not entries:
+        return 0, Decimal('0.00')
+    
+    amounts = {}
+    for pk, user_id in entries:
+        amounts[user_id] = amounts.get(user_id, Decimal('0.00')) + prizes[pk]
+    # A prize can round down to 0.00 (a split of a small pot, a zero winning
+    # amount); such entries still win and get a Winner row, but there is
+    # nothing to credit and credit_many() only takes positive amounts
+    amounts = {user_id: amount for user_id, amount in amounts.items() if amount > 0}
+    balances = wallet.credit_many(
+        amounts, 'total_winnings',
+        memo=f'Prizes for {game_round.game.name} - Round {game_round.round_number}',
+    ) if amounts else {}
+    
+    now = timezone.now()
+    Winner.objects.bulk_create([
+        Winner(
+            game_round=game_round,
+            user_id=user_id,
+            user_entry_id=pk,
+            prize_amount=prizes[pk],
+            prize_credited=True,
+            prize_credited_at=now,
+        )
+        for pk, user_id in entries
+    ])
+    
+    # Per-entry ledger rows; a user with several winning tickets walks up
+    # from their balance before the batch credit
+    running = {user_id: balances[user_id] - amounts[user_id] for user_id in amounts}
+    transactions = []
+    for pk, user_id in entries:
+        prize = prizes[pk]
+        if prize <= 0:
+            continue
+        transactions.append(Transaction(
+            user_id=user_id,
+            transaction_type='winning',
+            amount=prize,
+            total_amount=prize,
+            status='completed',
+            balance_before=running[user_id],
+            balance_after=running[user_id] + prize,
+            reference_id=Transaction.generate_reference_id(),
+            description=f'Prize for {game_round.game.name} - Round {game_round.round_number}',
+            game_entry_id=pk,
+            completed_at=now,
+        ))
+        running[user_id] += prize
+    Transaction.objects.bulk_create(transactions)
+    
+    wins = {}
+    for pk, user_id in entries:
+        count, won = wins.get(user_id, (0, Decimal('0.00')))
+        wins[user_id] = (count + 1, won + prizes[pk])
+    leaderboard_service.record_wins(game_round.game_id, wins)
+    
+    UserEntry.objects.filter(pk__in=[pk for pk, _ in entries]).update(
+        is_winner=True,
+        winning_amount=Case(
+            *[When(pk=pk, then=Value(prizes[pk])) for pk, _ in entries],
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        ),
+    )
+    
+    return len(entries), sum((prizes[pk] for pk, _ in entries), Decimal('0.00'))
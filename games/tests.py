@@ -1,3 +1,94 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
+
+from accounts import wallet
+from accounts.models import UserProfile
+from transactions import ledger
+from transactions.models import Transaction
+
+from . import resolution, settlement
+from .models import Game, GameRound, UserEntry, Winner
+
+
+class SettlementTests(TestCase):
+    
+    def setUp(self):
+        game = Game.objects.create(
+            name='Lucky Draw', game_type='lucky_draw', description='d', rules='r',
+            entry_fee=Decimal('10.00'), winning_amount=Decimal('100.00'), max_participants=100,
+        )
+        now = timezone.now()
+        self.round = GameRound.objects.create(
+            game=game, round_number=1, status='closed',
+            scheduled_start=now - timedelta(hours=2), scheduled_end=now - timedelta(hours=1),
+        )
+        self.users = [User.objects.create_user(username=f'player{i}', password='x') for i in range(3)]
+        for user in self.users:
+            wallet.credit(user, Decimal('20.00'))
+        self.entries = [
+            UserEntry.objects.create(
+                user=user, game_round=self.round, user_choice=[i + 1],
+                entry_fee_paid=Decimal('10.00'), entry_number=UserEntry.generate_entry_number(),
+            )
+            for i, user in enumerate(self.users)
+        ]
+    
+    def balance(self, user):
+        return UserProfile.objects.get(user=user).wallet_balance
+    
+    def test_each_winner_is_credited_once(self):
+        prizes = {self.entries[0].pk: Decimal('60.00'), self.entries[1].pk: Decimal('40.00')}
+        
+        self.assertEqual(settlement.settle_round(self.round, prizes), (2, Decimal('100.00')))
+        # Running it again (a retried job) pays nobody twice
+        self.assertEqual(settlement.settle_round(self.round, prizes), (0, Decimal('0.00')))
+        
+        self.assertEqual(self.balance(self.users[0]), Decimal('80.00'))
+        self.assertEqual(self.balance(self.users[1]), Decimal('60.00'))
+        self.assertEqual(self.balance(self.users[2]), Decimal('20.00'))
+        self.assertEqual(Winner.objects.filter(game_round=self.round).count(), 2)
+        self.assertEqual(Transaction.objects.filter(transaction_type='winning').count(), 2)
+        for user in self.users:
+            self.assertEqual(ledger.balance(user), self.balance(user))
+        self.round.refresh_from_db()
+        self.assertEqual(self.round.status, 'completed')
+        self.assertTrue(self.round.has_winner)
+    
+    def test_batched_settlement_credits_each_winner_once(self):
+        prizes = resolution.split_prize(Decimal('90.00'), [entry.pk for entry in self.entries])
+        
+        settled, paid = settlement.settle_round(self.round, prizes, batch_size=1)
+        
+        self.assertEqual((settled, paid), (3, Decimal('90.00')))
+        for user in self.users:
+            self.assertEqual(self.balance(user), Decimal('50.00'))
+        self.assertEqual(Winner.objects.filter(game_round=self.round).count(), 3)
+    
+    def test_prizes_rounded_down_to_zero(self):
+        prizes = resolution.split_prize(Decimal('0.02'), [entry.pk for entry in self.entries])
+        self.assertEqual(set(prizes.values()), {Decimal('0.00')})
+        
+        self.assertEqual(settlement.settle_round(self.round, prizes), (3, Decimal('0.00')))
+        
+        for user in self.users:
+            self.assertEqual(self.balance(user), Decimal('20.00'))
+        self.assertEqual(Transaction.objects.filter(transaction_type='winning').count(), 0)
+        winners = Winner.objects.filter(game_round=self.round)
+        self.assertEqual(winners.count(), 3)
+        self.assertEqual({winner.prize_amount for winner in winners}, {Decimal('0.00')})
+        self.round.refresh_from_db()
+        self.assertEqual(self.round.status, 'completed')
+    
+    def test_zero_and_positive_prizes_together(self):
+        prizes = {self.entries[0].pk: Decimal('0.00'), self.entries[1].pk: Decimal('5.00')}
+        
+        self.assertEqual(settlement.settle_round(self.round, prizes), (2, Decimal('5.00')))
 
-# Create your tests here.
+        self.assertEqual(self.balance(self.users[0]), Decimal('20.00'))
+        self.assertEqual(self.balance(self.users[1]), Decimal('25.00'))
+        self.assertEqual(Transaction.objects.filter(transaction_type='winning').count(), 1)
+        self.assertTrue(UserEntry.objects.get(pk=self.entries[0].pk).is_winner)
@@ -9,7 +9,9 @@ urlpatterns = [
     path('games/', views.games_list, name='games_list'),
     path('game/<int:game_id>/', views.game_detail, name='game_detail'),
     path('game/<int:game_id>/play/<int:round_id>/', views.play_game, name='play_game'),
+    path('play/bulk/', views.bulk_play, name='bulk_play'),
     path('my-entries/', views.my_entries, name='my_entries'),
+    path('my-entries/feed/', views.my_entries_feed, name='my_entries_feed'),
     path('winners/', views.winners_list, name='winners_list'),
     path('leaderboard/', views.leaderboard, name='leaderboard'),
 ]
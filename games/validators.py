@@ -0,0 +1,219 @@
+"""
+Choice validators for game entries, keyed by game type.
+
+Each validator interprets a game's config once (choice sets, bounds) when it
+is compiled; get_validator() keeps the compiled instance per Game until the
+game is saved again (updated_at changes). New game types only need a
+@register'ed subclass here.
+"""
+import inspect
+import threading
+from abc import ABC, abstractmethod
+
+
+VALIDATORS = {}
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+def register(game_type):
+    """Class decorator adding a validator to the registry.
+    
+    Raises:
+        TypeError: if the class leaves an abstract method (validate()) unimplemented
+    """
+    def decorator(cls):
+        if inspect.isabstract(cls):
+            missing = ', '.join(sorted(cls.__abstractmethods__))
+            raise TypeError(f"Validator {cls.__name__} for {game_type!r} must implement {missing}")
+        VALIDATORS[game_type] = cls
+        cls.game_type = game_type
+        return cls
+    return decorator
+
+
+def get_validator(game):
+    """Compiled validator for the game, cached per (game, config version)"""
+    version = (game.game_type, game.updated_at)
+    cached = _compiled.get(game.pk)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    
+    validator_class = VALIDATORS.get(game.game_type)
+    if validator_class is None:
+        validator = InvalidValidator("Invalid game type")
+    else:
+        validator = validator_class(game.game_config or {})
+    
+    if game.pk is not None:
+        with _compiled_lock:
+            _compiled[game.pk] = (version, validator)
+    return validator
+
+
+def clear_cache():
+    """Drop all compiled validators"""
+    with _compiled_lock:
+        _compiled.clear()
+
+
+class ChoiceValidator(ABC):
+    """Base validator: compile the config in __init__, check selections in validate()"""
+    game_type = None
+    
+    def __init__(self, config):
+        self.config = config
+    
+    @abstractmethod
+    def validate(self, data):
+        """Return the user's choice as a list.
+        
+        Args:
+            data: the POSTed form (or any MultiValueDict using the same field names)
+        
+        Raises:
+            ValueError/TypeError: with a user-facing message
+        """
+
+
+class InvalidValidator(ChoiceValidator):
+    """Rejects every selection (unknown type or broken config)"""
+    
+    def __init__(self, message):
+        self.message = message
+    
+    def validate(self, data):
+        raise ValueError(self.message)
+
+
+@register('number_match')
+class NumberMatchValidator(ChoiceValidator):
+    count = 5
+    low, high = 0, 99
+    
+    def validate(self, data):
+        user_choice = [int(data.get(f'number_{i}', 0)) for i in range(1, self.count + 1)]
+        if any(n < self.low or n > self.high for n in user_choice):
+            raise ValueError(f"Numbers must be between {self.low} and {self.high}")
+        return user_choice
+
+
+@register('lucky_draw')
+class LuckyDrawValidator(ChoiceValidator):
+    low, high = 1, 100
+    
+    def validate(self, data):
+        number = int(data.get('number', 0))
+        if number < self.low or number > self.high:
+            raise ValueError(f"Number must be between {self.low} and {self.high}")
+        return [number]
+
+
+@register('color_game')
+class ColorGameValidator(ChoiceValidator):
+    colors = frozenset(['red', 'green', 'blue', 'yellow'])
+    
+    def validate(self, data):
+        color = data.get('color', '').lower()
+        if color not in self.colors:
+            raise ValueError("Invalid color selection")
+        return [color]
+
+
+@register('keno')
+class KenoValidator(ChoiceValidator):
+    """Pick 1-20 distinct numbers from 1-80"""
+    min_picks, max_picks = 1, 20
+    low, high = 1, 80
+    
+    def validate(self, data):
+        numbers = data.getlist('keno_numbers')
+        if not numbers:
+            raise ValueError("Must select at least 1 number")
+        
+        user_choice = [int(n) for n in numbers]
+        if len(user_choice) < self.min_picks or len(user_choice) > self.max_picks:
+            raise ValueError(f"Must select between {self.min_picks} and {self.max_picks} numbers")
+        if any(n < self.low or n > self.high for n in user_choice):
+            raise ValueError(f"Numbers must be between {self.low} and {self.high}")
+        if len(user_choice) != len(set(user_choice)):
+            raise ValueError("Duplicate numbers not allowed")
+        return user_choice
+
+
+@register('odd_even')
+class OddEvenValidator(ChoiceValidator):
+    predictions = frozenset(['odd', 'even'])
+    
+    def validate(self, data):
+        prediction = data.get('prediction', '').lower()
+        if prediction not in self.predictions:
+            raise ValueError("Must select Odd or Even")
+        return [prediction]
+
+
+@register('custom')
+class CustomGameValidator(ChoiceValidator):
+    """Admin-configured games: number, choice or text input"""
+    
+    def __init__(self, config):
+        super().__init__(config)
+        self.input_type = config.get('input_type')
+        
+        if self.input_type == 'number':
+            self.number_count = config.get('number_count', 1)
+            self.min_val = config.get('min_value', 1)
+            self.max_val = config.get('max_value', 100)
+            self.allow_duplicates = config.get('allow_duplicates', False)
+        elif self.input_type == 'choice':
+            self.multiple = config.get('multiple_selection', False)
+            self.selection_count = config.get('selection_count', 1)
+            self.valid_choices = frozenset(config.get('choices', []))
+        elif self.input_type == 'text':
+            self.min_len = config.get('min_length', 1)
+            self.max_len = config.get('max_length', 100)
+            self.case_sensitive = config.get('case_sensitive', False)
+    
+    def validate(self, data):
+        if self.input_type == 'number':
+            return self._validate_numbers(data)
+        if self.input_type == 'choice':
+            return self._validate_choices(data)
+        if self.input_type == 'text':
+            return self._validate_text(data)
+        raise ValueError("Invalid custom game configuration")
+    
+    def _validate_numbers(self, data):
+        user_choice = []
+        for i in range(1, self.number_count + 1):
+            num = int(data.get(f'custom_number_{i}', 0))
+            if num < self.min_val or num > self.max_val:
+                raise ValueError(f"Number must be between {self.min_val} and {self.max_val}")
+            user_choice.append(num)
+        
+        if not self.allow_duplicates and len(user_choice) != len(set(user_choice)):
+            raise ValueError("Duplicate numbers not allowed")
+        return user_choice
+    
+    def _validate_choices(self, data):
+        if self.multiple:
+            user_choice = data.getlist('custom_choice')
+            if len(user_choice) != self.selection_count:
+                raise ValueError(f"Must select exactly {self.selection_count} option(s)")
+            if not all(c in self.valid_choices for c in user_choice):
+                raise ValueError("Invalid choice selection")
+            return user_choice
+        
+        choice = data.get('custom_choice', '')
+        if choice not in self.valid_choices:
+            raise ValueError("Invalid choice selection")
+        return [choice]
+    
+    def _validate_text(self, data):
+        text = data.get('custom_text', '').strip()
+        if len(text) < self.min_len or len(text) > self.max_len:
+            raise ValueError(f"Text must be between {self.min_len} and {self.max_len} characters")
+        if not self.case_sensitive:
+            text = text.lower()
+        return [text]
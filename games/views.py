@@ -2,9 +2,18 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
+from django.db import IntegrityError, transaction as db_transaction
 from django.db.models import Count, Sum
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
+from django.conf import settings
+from django.utils.datastructures import MultiValueDict
+from django.views.decorators.http import require_POST
 from .models import Game, GameRound, UserEntry, Winner, Leaderboard
+from . import counters, leaderboard_service, rank_index, resolution, rollups
+from .validators import get_validator
+from accounts import wallet
+from transactions import pagination
+from transactions.currency_utils import CurrencyManager
 from transactions.models import Transaction
 from decimal import Decimal
 import json
@@ -23,7 +32,7 @@ def home(request):
         return redirect('games:dashboard')
     
     featured_games = Game.objects.filter(status='active', is_featured=True)[:3]
-    recent_winners = Winner.objects.all().order_by('-announced_at')[:5]
+    recent_winners = Winner.objects.select_related('user', 'game_round__game').order_by('-announced_at')[:5]
     
     context = {
         'featured_games': featured_games,
@@ -102,6 +111,8 @@ def game_detail(request, game_id):
     
     # Get active round for this game
     active_round = game.get_active_round()
+    if active_round:
+        active_round.refresh_counters()
     
     # Get recent winners for this game
     recent_winners = Winner.objects.filter(
@@ -160,176 +171,272 @@ def play_game(request, game_id, round_id):
         
         # Get user's choice based on game type
         try:
-            if game.game_type == 'number_match':
-                user_choice = [
-                    int(request.POST.get(f'number_{i}', 0))
-                    for i in range(1, 6)
-                ]
-                # Validate numbers
-                if len(user_choice) != 5:
-                    raise ValueError("Must select 5 numbers")
-                if any(n < 0 or n > 99 for n in user_choice):
-                    raise ValueError("Numbers must be between 0 and 99")
-            
-            elif game.game_type == 'lucky_draw':
-                user_choice = [int(request.POST.get('number', 0))]
-                if user_choice[0] < 1 or user_choice[0] > 100:
-                    raise ValueError("Number must be between 1 and 100")
-            
-            elif game.game_type == 'color_game':
-                user_choice = [request.POST.get('color', '').lower()]
-                valid_colors = ['red', 'green', 'blue', 'yellow']
-                if user_choice[0] not in valid_colors:
-                    raise ValueError("Invalid color selection")
-            
-            elif game.game_type == 'keno':
-                # Keno: Pick 1-20 numbers from 1-80
-                numbers = request.POST.getlist('keno_numbers')
-                if not numbers:
-                    raise ValueError("Must select at least 1 number")
-                
-                user_choice = [int(n) for n in numbers]
-                
-                # Validate count
-                if len(user_choice) < 1 or len(user_choice) > 20:
-                    raise ValueError("Must select between 1 and 20 numbers")
-                
-                # Validate range
-                if any(n < 1 or n > 80 for n in user_choice):
-                    raise ValueError("Numbers must be between 1 and 80")
-                
-                # Check for duplicates
-                if len(user_choice) != len(set(user_choice)):
-                    raise ValueError("Duplicate numbers not allowed")
-            
-            elif game.game_type == 'odd_even':
-                # Odd/Even: Pick odd or even
-                prediction = request.POST.get('prediction', '').lower()
-                if prediction not in ['odd', 'even']:
-                    raise ValueError("Must select Odd or Even")
-                user_choice = [prediction]
-            
-            elif game.game_type == 'custom':
-                # Handle custom game inputs
-                config = game.game_config
-                user_choice = []
-                
-                if config.get('input_type') == 'number':
-                    number_count = config.get('number_count', 1)
-                    min_val = config.get('min_value', 1)
-                    max_val = config.get('max_value', 100)
-                    
-                    for i in range(1, number_count + 1):
-                        num = int(request.POST.get(f'custom_number_{i}', 0))
-                        if num < min_val or num > max_val:
-                            raise ValueError(f"Number must be between {min_val} and {max_val}")
-                        user_choice.append(num)
-                    
-                    # Check duplicates if not allowed
-                    if not config.get('allow_duplicates', False) and len(user_choice) != len(set(user_choice)):
-                        raise ValueError("Duplicate numbers not allowed")
-                
-                elif config.get('input_type') == 'choice':
-                    if config.get('multiple_selection', False):
-                        # Multiple checkboxes
-                        user_choice = request.POST.getlist('custom_choice')
-                        selection_count = config.get('selection_count', 1)
-                        if len(user_choice) != selection_count:
-                            raise ValueError(f"Must select exactly {selection_count} option(s)")
-                        # Validate choices
-                        valid_choices = config.get('choices', [])
-                        if not all(c in valid_choices for c in user_choice):
-                            raise ValueError("Invalid choice selection")
-                    else:
-                        # Single select
-                        choice = request.POST.get('custom_choice', '')
-                        valid_choices = config.get('choices', [])
-                        if choice not in valid_choices:
-                            raise ValueError("Invalid choice selection")
-                        user_choice = [choice]
-                
-                elif config.get('input_type') == 'text':
-                    text = request.POST.get('custom_text', '').strip()
-                    min_len = config.get('min_length', 1)
-                    max_len = config.get('max_length', 100)
-                    
-                    if len(text) < min_len or len(text) > max_len:
-                        raise ValueError(f"Text must be between {min_len} and {max_len} characters")
-                    
-                    if not config.get('case_sensitive', False):
-                        text = text.lower()
-                    
-                    user_choice = [text]
-                
-                else:
-                    raise ValueError("Invalid custom game configuration")
-            
-            else:
-                raise ValueError("Invalid game type")
-        
+            user_choice = get_validator(game).validate(request.POST)
         except (ValueError, TypeError) as e:
             messages.error(request, f'Invalid input: {str(e)}')
             return redirect('games:game_detail', game_id=game_id)
         
-        # Ensure user has a profile (create if missing)
-        from accounts.models import UserProfile
-        profile, created = UserProfile.objects.get_or_create(user=request.user)
-        
         # Convert entry fee to Decimal once
         entry_fee = Decimal(str(game.entry_fee))
         
-        # Deduct entry fee from user wallet
-        if not profile.deduct_credits(entry_fee):
-            messages.error(request, 'Insufficient credits in your wallet.')
+        try:
+            with db_transaction.atomic():
+                # Guarded UPDATE: only succeeds if the balance covers the fee
+                new_balance = wallet.debit(request.user, entry_fee)
+                if new_balance is None:
+                    messages.error(request, 'Insufficient credits in your wallet.')
+                    return redirect('games:game_detail', game_id=game_id)
+                
+                # Create user entry
+                entry = UserEntry.objects.create(
+                    user=request.user,
+                    game_round=game_round,
+                    user_choice=user_choice,
+                    choice_key=resolution.choice_key(game, user_choice),
+                    entry_fee_paid=entry_fee
+                )
+                
+                # Create transaction record
+                Transaction.objects.create(
+                    user=request.user,
+                    transaction_type='game_entry',
+                    amount=entry_fee,
+                    status='completed',
+                    balance_before=new_balance + entry_fee,
+                    balance_after=new_balance,
+                    description=f'Entry fee for {game.name} - Round {game_round.round_number}',
+                    game_entry=entry,
+                    completed_at=timezone.now()
+                )
+                
+                # Update round statistics (sharded; folded into the round periodically)
+                counters.increment(game_round, participants=1, pool_amount=entry_fee)
+                leaderboard_service.record_entries(game.pk, {request.user.pk: (1, entry_fee)})
+        except IntegrityError:
+            # A concurrent submit already created the entry; the debit was rolled back
+            messages.error(request, 'You have already entered this round')
             return redirect('games:game_detail', game_id=game_id)
         
-        # Create user entry
-        entry = UserEntry.objects.create(
-            user=request.user,
-            game_round=game_round,
-            user_choice=user_choice,
-            entry_fee_paid=entry_fee
-        )
-        
-        # Create transaction record
-        Transaction.objects.create(
-            user=request.user,
-            transaction_type='game_entry',
-            amount=entry_fee,
-            status='completed',
-            balance_before=request.user.profile.wallet_balance + entry_fee,
-            balance_after=request.user.profile.wallet_balance,
-            description=f'Entry fee for {game.name} - Round {game_round.round_number}',
-            game_entry=entry,
-            completed_at=timezone.now()
-        )
-        
-        # Update round statistics
-        game_round.total_participants += 1
-        game_round.total_pool_amount += entry_fee
-        game_round.save()
-        
         messages.success(request, f'Successfully entered {game.name}! Entry Number: {entry.entry_number}')
         return redirect('games:my_entries')
     
     return redirect('games:game_detail', game_id=game_id)
 
 
+def _as_form_data(item):
+    """Wrap a JSON item so validators can read it like request.POST"""
+    data = MultiValueDict()
+    for key, value in item.items():
+        if isinstance(value, list):
+            data.setlist(key, [str(v) for v in value])
+        else:
+            data[key] = '' if value is None else str(value)
+    return data
+
+
 @login_required
-def my_entries(request):
-    """User's game entries"""
-    entries = UserEntry.objects.filter(user=request.user).order_by('-created_at')
+@require_POST
+def bulk_play(request):
+    """Enter several rounds in one request (JSON API).
     
-    context = {
-        'entries': entries,
-    }
+    Body: {"entries": [{"round_id": 12, "number": 42}, {"round_id": 15, "keno_numbers": [3, 7, 19]}, ...]}
+    where each item uses the same field names as the play form. Valid items are
+    paid with a single wallet debit and inserted with bulk_create; invalid ones
+    are reported per item and skipped.
+    """
+    from accounts.models import UserProfile
+    profile, created = UserProfile.objects.get_or_create(user=request.user)
+    
+    if profile.is_blocked:
+        return JsonResponse({'success': False, 'error': 'Your account has been banned.'}, status=403)
+    if not profile.can_view_games or not profile.can_play_games:
+        return JsonResponse({'success': False, 'error': 'You do not have permission to play games.'}, status=403)
+    
+    try:
+        items = json.loads(request.body).get('entries')
+    except (ValueError, AttributeError):
+        items = None
+    if not isinstance(items, list) or not items:
+        return JsonResponse({'success': False, 'error': 'Expected a non-empty "entries" list'}, status=400)
+    
+    max_items = getattr(settings, 'BULK_ENTRY_MAX_ITEMS', 100)
+    if len(items) > max_items:
+        return JsonResponse({'success': False, 'error': f'At most {max_items} entries per request'}, status=400)
+    
+    # One query each for the rounds, the live counters and existing entries
+    round_ids = set()
+    for item in items:
+        try:
+            round_ids.add(int(item.get('round_id')))
+        except (AttributeError, TypeError, ValueError):
+            pass
+    rounds = GameRound.objects.select_related('game').in_bulk(round_ids)
+    live_totals = counters.totals_for(round_ids)
+    entered = set(UserEntry.objects.filter(
+        user=request.user, game_round_id__in=round_ids
+    ).values_list('game_round_id', flat=True))
+    
+    now = timezone.now()
+    results = []
+    accepted = []
+    claimed = set()
+    
+    for index, item in enumerate(items):
+        result = {'index': index, 'round_id': item.get('round_id') if isinstance(item, dict) else None, 'success': False}
+        results.append(result)
+        
+        try:
+            game_round = rounds.get(int(item.get('round_id')))
+        except (AttributeError, TypeError, ValueError):
+            game_round = None
+        if game_round is None:
+            result['error'] = 'Round not found'
+            continue
+        
+        game = game_round.game
+        if not (game_round.status == 'open' and game_round.scheduled_start <= now < game_round.scheduled_end):
+            result['error'] = 'Round is not open for entry'
+            continue
+        if game_round.pk in entered:
+            result['error'] = 'You have already entered this round'
+            continue
+        if game_round.pk in claimed:
+            result['error'] = 'Duplicate round in this request'
+            continue
+        if live_totals[game_round.pk][0] >= game.max_participants:
+            result['error'] = 'Round is full'
+            continue
+        
+        try:
+            user_choice = get_validator(game).validate(_as_form_data(item))
+        except (ValueError, TypeError) as e:
+            result['error'] = f'Invalid input: {str(e)}'
+            continue
+        
+        claimed.add(game_round.pk)
+        accepted.append((game_round, user_choice, Decimal(str(game.entry_fee)), result))
+    
+    if not accepted:
+        return JsonResponse({'success': False, 'created': 0, 'entries': results})
+    
+    total_fee = sum((fee for _, _, fee, _ in accepted), Decimal('0.00'))
+    
+    try:
+        with db_transaction.atomic():
+            # One guarded UPDATE for the summed fee
+            new_balance = wallet.debit(request.user, total_fee, memo=f'Bulk entry ({len(accepted)} rounds)')
+            if new_balance is None:
+                for _, _, _, result in accepted:
+                    result['error'] = 'Insufficient credits'
+                return JsonResponse({
+                    'success': False,
+                    'created': 0,
+                    'error': f'Insufficient credits for {len(accepted)} entries (₹{total_fee})',
+                    'entries': results,
+                })
+            
+            entries = UserEntry.objects.bulk_create([
+                UserEntry(
+                    user=request.user,
+                    game_round=game_round,
+                    user_choice=user_choice,
+                    choice_key=resolution.choice_key(game_round.game, user_choice),
+                    entry_fee_paid=fee,
+                    entry_number=UserEntry.generate_entry_number(),
+                )
+                for game_round, user_choice, fee, _ in accepted
+            ])
+            if any(entry.pk is None for entry in entries):
+                # MySQL doesn't return bulk-inserted keys; look them up by entry number
+                pks = dict(UserEntry.objects.filter(
+                    entry_number__in=[entry.entry_number for entry in entries]
+                ).values_list('entry_number', 'pk'))
+                for entry in entries:
+                    entry.pk = entry.id = pks[entry.entry_number]
+            
+            # Per-entry ledger rows, with balances walking down from the pre-debit total
+            balance = new_balance + total_fee
+            completed_at = timezone.now()
+            transactions = []
+            for entry, (game_round, _, fee, _) in zip(entries, accepted):
+                transactions.append(Transaction(
+                    user=request.user,
+                    transaction_type='game_entry',
+                    amount=fee,
+                    total_amount=fee,
+                    status='completed',
+                    balance_before=balance,
+                    balance_after=balance - fee,
+                    reference_id=Transaction.generate_reference_id(),
+                    description=f'Entry fee for {game_round.game.name} - Round {game_round.round_number}',
+                    game_entry=entry,
+                    completed_at=completed_at,
+                ))
+                balance -= fee
+            Transaction.objects.bulk_create(transactions)
+            
+            per_round, per_game = {}, {}
+            for game_round, _, fee, _ in accepted:
+                participants, pool = per_round.get(game_round.pk, (0, Decimal('0.00')))
+                per_round[game_round.pk] = (participants + 1, pool + fee)
+                count, spent = per_game.get(game_round.game_id, (0, Decimal('0.00')))
+                per_game[game_round.game_id] = (count + 1, spent + fee)
+            counters.increment_many(per_round)
+            for game_id, played in per_game.items():
+                leaderboard_service.record_entries(game_id, {request.user.pk: played})
+    except IntegrityError:
+        # A concurrent single entry beat us to one of the rounds; nothing was charged
+        return JsonResponse({
+            'success': False,
+            'created': 0,
+            'error': 'One of the rounds was entered concurrently. No entries were made, please retry.',
+            'entries': results,
+        }, status=409)
+    
+    for entry, (_, _, fee, result) in zip(entries, accepted):
+        result['success'] = True
+        result['entry_number'] = entry.entry_number
+        result['entry_fee'] = float(fee)
+    
+    return JsonResponse({
+        'success': True,
+        'created': len(entries),
+        'total_fee': float(total_fee),
+        'balance': float(new_balance),
+        'entries': results,
+    })
+
+
+def _entries_page(request):
+    context = pagination.page_for_request(
+        request,
+        UserEntry.objects.filter(user=request.user).select_related('game_round__game'),
+        'created_at',
+        {'game': ('game_round__game_id', [str(pk) for pk in Game.objects.values_list('pk', flat=True)])},
+    )
+    context['entries'] = context['page']
+    CurrencyManager.format_column(context['page'], ['entry_fee_paid', 'winning_amount'], request.user, request=request)
+    return context
+
+
+@login_required
+def my_entries(request):
+    """User's game entries, a page at a time (?cursor=, filters ?game=&date_from=&date_to=)"""
+    context = _entries_page(request)
+    context['games'] = Game.objects.only('pk', 'name').order_by('name')
     return render(request, 'games/my_entries.html', context)
 
 
+@login_required
+def my_entries_feed(request):
+    """Next page of the user's entries as JSON (infinite scroll)"""
+    return pagination.feed_response(request, 'games/my_entries_rows.html', _entries_page(request))
+
+
 @login_required
 def winners_list(request):
     """List of all winners"""
-    winners = Winner.objects.all().order_by('-announced_at')
+    winners = Winner.objects.select_related('user', 'game_round__game').order_by('-announced_at')
     
     context = {
         'winners': winners,
@@ -339,18 +446,41 @@ def winners_list(request):
 
 @login_required
 def leaderboard(request):
-    """Leaderboard view"""
-    leaderboards = Leaderboard.objects.all().order_by('rank')[:100]
+    """Leaderboard view (all time, or ?period=day/week/month, optionally &game=<id>)"""
+    period = request.GET.get('period')
+    game = None
+    if request.GET.get('game'):
+        try:
+            game_id = int(request.GET['game'])
+        except ValueError:
+            raise Http404('No such game')
+        game = get_object_or_404(Game, pk=game_id)
+        if period not in rollups.PERIOD_TYPES:
+            period = 'week'
     
-    # Get current user's position
-    try:
-        user_leaderboard = Leaderboard.objects.get(user=request.user)
-    except Leaderboard.DoesNotExist:
-        user_leaderboard = Leaderboard.objects.create(user=request.user)
-        user_leaderboard.update_stats()
+    if period in rollups.PERIOD_TYPES:
+        leaderboards = rollups.top(period, game=game, limit=100)
+        # The user's position in the same window (None until they play in it)
+        user_leaderboard = rollups.position(request.user, period, game=game)
+    else:
+        period = None
+        leaderboards = rank_index.load(rank_index.index.top(100))
+        user_leaderboard, created = Leaderboard.objects.get_or_create(user=request.user)
+        if created:
+            user_leaderboard.update_stats()
+        user_leaderboard.rank = rank_index.index.rank_of(request.user.pk)
+    
+    # Players just above and below, when the user is outside the top 100
+    nearby = []
+    if period is None and user_leaderboard.rank and user_leaderboard.rank > 100:
+        nearby = rank_index.load(rank_index.index.neighbors(request.user.pk, radius=2))
     
     context = {
         'leaderboards': leaderboards,
         'user_leaderboard': user_leaderboard,
+        'nearby': nearby,
+        'period': period,
+        'selected_game': game,
+        'games': Game.objects.filter(status='active').order_by('name'),
     }
     return render(request, 'games/leaderboard.html', context)
@@ -1,9 +1,12 @@
 from django.contrib import admin
+from django.db import transaction as db_transaction
 from django.utils import timezone
-from .models import Transaction, DepositRequest, WithdrawalRequest
+from accounts import wallet
+from custom_admin import sidebar
+from .models import Transaction, DepositRequest, WithdrawalRequest, LedgerPosting, BalanceSnapshot, DailyTransactionRollup
 
 # Import currency admin configurations
-from .currency_admin import CurrencyAdmin, ExchangeRateAdmin, CurrencyConversionLogAdmin
+from .currency_admin import CurrencyAdmin, ExchangeRateAdmin, CurrencyConversionLogAdmin, ExchangeRateRefreshAdmin
 
 
 @admin.register(Transaction)
@@ -70,28 +73,29 @@ class DepositRequestAdmin(admin.ModelAdmin):
         for deposit_request in queryset.filter(status='pending'):
             user = deposit_request.user
             
-            # Create transaction
-            transaction = Transaction.objects.create(
-                user=user,
-                transaction_type='deposit',
-                amount=deposit_request.amount,
-                payment_method=deposit_request.payment_method,
-                status='completed',
-                balance_before=user.profile.wallet_balance,
-                balance_after=user.profile.wallet_balance + deposit_request.amount,
-                description=f'Deposit approved by {request.user.username}',
-                completed_at=timezone.now()
-            )
-            
-            # Add credits to user wallet
-            user.profile.add_credits(deposit_request.amount)
-            
-            # Update deposit request
-            deposit_request.status = 'approved'
-            deposit_request.processed_by = request.user
-            deposit_request.processed_at = timezone.now()
-            deposit_request.transaction = transaction
-            deposit_request.save()
+            with db_transaction.atomic():
+                # Add credits to user wallet
+                new_balance = wallet.credit(user, deposit_request.amount, 'total_deposits')
+                
+                # Create transaction
+                transaction = Transaction.objects.create(
+                    user=user,
+                    transaction_type='deposit',
+                    amount=deposit_request.amount,
+                    payment_method=deposit_request.payment_method,
+                    status='completed',
+                    balance_before=new_balance - deposit_request.amount,
+                    balance_after=new_balance,
+                    description=f'Deposit approved by {request.user.username}',
+                    completed_at=timezone.now()
+                )
+                
+                # Update deposit request
+                deposit_request.status = 'approved'
+                deposit_request.processed_by = request.user
+                deposit_request.processed_at = timezone.now()
+                deposit_request.transaction = transaction
+                deposit_request.save()
             
             approved_count += 1
         
@@ -104,6 +108,8 @@ class DepositRequestAdmin(admin.ModelAdmin):
             processed_by=request.user,
             processed_at=timezone.now()
         )
+        # Bulk updates send no signals
+        sidebar.adjust('pending_deposits_count', -updated)
         self.message_user(request, f'{updated} deposit(s) rejected.')
     reject_deposits.short_description = "Reject selected deposit requests"
 
@@ -137,6 +143,7 @@ class WithdrawalRequestAdmin(admin.ModelAdmin):
     
     def approve_withdrawals(self, request, queryset):
         updated = queryset.filter(status='pending').update(status='approved', processed_by=request.user, processed_at=timezone.now())
+        sidebar.adjust('pending_withdrawals_count', -updated)
         self.message_user(request, f'{updated} withdrawal(s) approved.')
     approve_withdrawals.short_description = "Approve selected withdrawal requests"
     
@@ -145,34 +152,31 @@ class WithdrawalRequestAdmin(admin.ModelAdmin):
         for withdrawal_request in queryset.filter(status='approved'):
             user = withdrawal_request.user
             
-            # Check if user has sufficient balance
-            if user.profile.wallet_balance < withdrawal_request.amount:
-                continue
-            
-            # Create transaction
-            transaction = Transaction.objects.create(
-                user=user,
-                transaction_type='withdrawal',
-                amount=withdrawal_request.amount,
-                payment_method='wallet',
-                status='completed',
-                balance_before=user.profile.wallet_balance,
-                balance_after=user.profile.wallet_balance - withdrawal_request.amount,
-                description=f'Withdrawal completed by {request.user.username}',
-                completed_at=timezone.now()
-            )
-            
-            # Deduct from user wallet
-            user.profile.wallet_balance -= withdrawal_request.amount
-            user.profile.total_withdrawals += withdrawal_request.amount
-            user.profile.save()
-            
-            # Update withdrawal request
-            withdrawal_request.status = 'completed'
-            withdrawal_request.processed_by = request.user
-            withdrawal_request.processed_at = timezone.now()
-            withdrawal_request.transaction = transaction
-            withdrawal_request.save()
+            with db_transaction.atomic():
+                # Deduct from user wallet (skipped if the balance doesn't cover it)
+                new_balance = wallet.debit(user, withdrawal_request.amount, 'total_withdrawals')
+                if new_balance is None:
+                    continue
+                
+                # Create transaction
+                transaction = Transaction.objects.create(
+                    user=user,
+                    transaction_type='withdrawal',
+                    amount=withdrawal_request.amount,
+                    payment_method='wallet',
+                    status='completed',
+                    balance_before=new_balance + withdrawal_request.amount,
+                    balance_after=new_balance,
+                    description=f'Withdrawal completed by {request.user.username}',
+                    completed_at=timezone.now()
+                )
+                
+                # Update withdrawal request
+                withdrawal_request.status = 'completed'
+                withdrawal_request.processed_by = request.user
+                withdrawal_request.processed_at = timezone.now()
+                withdrawal_request.transaction = transaction
+                withdrawal_request.save()
             
             completed_count += 1
         
@@ -185,5 +189,46 @@ class WithdrawalRequestAdmin(admin.ModelAdmin):
             processed_by=request.user,
             processed_at=timezone.now()
         )
+        sidebar.invalidate('pending_withdrawals_count')
         self.message_user(request, f'{updated} withdrawal(s) rejected.')
     reject_withdrawals.short_description = "Reject selected withdrawal requests"
+
+
+@admin.register(LedgerPosting)
+class LedgerPostingAdmin(admin.ModelAdmin):
+    list_display = ('id', 'entry_id', 'account', 'user', 'sequence', 'amount', 'memo', 'created_at')
+    list_filter = ('account', 'created_at')
+    search_fields = ('user__username', 'entry_id', 'memo')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(BalanceSnapshot)
+class BalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('user', 'sequence', 'balance', 'created_at')
+    search_fields = ('user__username',)
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyTransactionRollup)
+class DailyTransactionRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'transaction_type', 'status', 'currency_code', 'shard', 'transaction_count', 'amount')
+    list_filter = ('transaction_type', 'status', 'currency_code', 'date')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
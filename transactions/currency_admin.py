@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .currency_models import Currency, ExchangeRate, CurrencyConversionLog
+from .currency_models import Currency, ExchangeRate, CurrencyConversionLog, ExchangeRateRefresh
 
 
 @admin.register(Currency)
@@ -64,3 +64,17 @@ class CurrencyConversionLogAdmin(admin.ModelAdmin):
     
     def has_change_permission(self, request, obj=None):
         return False  # Logs should not be modified
+
+
+@admin.register(ExchangeRateRefresh)
+class ExchangeRateRefreshAdmin(admin.ModelAdmin):
+    list_display = ['finished_at', 'trigger', 'success', 'message']
+    list_filter = ['trigger', 'success']
+    readonly_fields = ['finished_at', 'trigger', 'success', 'message', 'updated', 'failed']
+    ordering = ['-finished_at']
+    
+    def has_add_permission(self, request):
+        return False  # Recorded by each refresh
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -103,6 +103,8 @@ class ExchangeRate(models.Model):
         indexes = [
             models.Index(fields=['from_currency', 'to_currency', 'is_active']),
             models.Index(fields=['effective_from', 'effective_until']),
+            # Latest change, for the rate matrix version (transactions.rate_matrix)
+            models.Index(fields=['updated_at']),
         ]
     
     def __str__(self):
@@ -112,6 +114,9 @@ class ExchangeRate(models.Model):
     def get_current_rate(cls, from_currency, to_currency):
         """Get current active exchange rate
         
+        Served from the in-process rate matrix (transactions.rate_matrix), which
+        also derives reverse and cross rates when no direct rate is stored.
+        
         Args:
             from_currency: Currency code string (e.g., 'USD') or Currency object
             to_currency: Currency code string (e.g., 'INR') or Currency object
@@ -119,57 +124,15 @@ class ExchangeRate(models.Model):
         Returns:
             Decimal: Exchange rate or None if not found
         """
-        # Convert currency codes to Currency objects if strings are passed
-        if isinstance(from_currency, str):
-            try:
-                from_currency = Currency.objects.get(code=from_currency)
-            except Currency.DoesNotExist:
-                return None
-        
-        if isinstance(to_currency, str):
-            try:
-                to_currency = Currency.objects.get(code=to_currency)
-            except Currency.DoesNotExist:
-                return None
-        
-        # If same currency, return 1
-        if from_currency.id == to_currency.id:
-            return Decimal('1.0')
-        
-        now = timezone.now()
-        rate = cls.objects.filter(
-            from_currency=from_currency,
-            to_currency=to_currency,
-            is_active=True,
-            effective_from__lte=now
-        ).filter(
-            models.Q(effective_until__isnull=True) | models.Q(effective_until__gte=now)
-        ).first()
-        
-        if rate:
-            return rate.rate
-        
-        # Try reverse rate
-        reverse_rate = cls.objects.filter(
-            from_currency=to_currency,
-            to_currency=from_currency,
-            is_active=True,
-            effective_from__lte=now
-        ).filter(
-            models.Q(effective_until__isnull=True) | models.Q(effective_until__gte=now)
-        ).first()
-        
-        if reverse_rate:
-            return Decimal('1.0') / reverse_rate.rate
-        
-        return None
+        from . import rate_matrix
+        return rate_matrix.rate(from_currency, to_currency)
     
     @classmethod
     def convert_amount(cls, amount, from_currency, to_currency):
         """Convert amount from one currency to another"""
         rate = cls.get_current_rate(from_currency, to_currency)
         if rate is None:
-            raise ValueError(f"No exchange rate found for {from_currency.code} to {to_currency.code}")
+            raise ValueError(f"No exchange rate found for {getattr(from_currency, 'code', from_currency)} to {getattr(to_currency, 'code', to_currency)}")
         return Decimal(str(amount)) * rate
 
 
@@ -199,3 +162,27 @@ class CurrencyConversionLog(models.Model):
     
     def __str__(self):
         return f"{self.from_amount} {self.from_currency.code} → {self.to_amount} {self.to_currency.code}"
+
+
+class ExchangeRateRefresh(models.Model):
+    """Outcome of one refresh of the rates from the live APIs, whichever process ran it"""
+    TRIGGER_CHOICES = [
+        ('admin', 'Admin panel'),
+        ('command', 'Management command'),
+    ]
+    
+    trigger = models.CharField(max_length=20, choices=TRIGGER_CHOICES)
+    success = models.BooleanField(default=False)
+    message = models.CharField(max_length=500)
+    updated = models.JSONField(default=list, blank=True, help_text="[{currency, rate, symbol}] of the rates stored")
+    failed = models.JSONField(default=list, blank=True, help_text="[{currency, error}] of the currencies not updated")
+    finished_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-finished_at']
+        indexes = [
+            models.Index(fields=['-finished_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.finished_at:%Y-%m-%d %H:%M} {self.get_trigger_display()}: {self.message}"
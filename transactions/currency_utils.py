@@ -1,9 +1,13 @@
 """
 Utility functions for currency management and conversion
 """
+import threading
 from decimal import Decimal
 from django.core.cache import cache
-from .currency_models import Currency, ExchangeRate, CurrencyConversionLog
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from .currency_models import Currency, ExchangeRate, CurrencyConversionLog, ExchangeRateRefresh
+from . import rate_matrix, rate_sources
 
 
 class CurrencyManager:
@@ -78,12 +82,14 @@ class CurrencyManager:
         if from_currency == to_currency:
             return Decimal(str(amount))
         
-        # Get exchange rate and convert
-        converted_amount = ExchangeRate.convert_amount(amount, from_currency, to_currency)
+        # Get exchange rate (one in-memory lookup) and convert
+        rate = rate_matrix.rate(from_currency, to_currency)
+        if rate is None:
+            raise ValueError(f"No exchange rate found for {from_currency.code} to {to_currency.code}")
+        converted_amount = Decimal(str(amount)) * rate
         
         # Log the conversion
         if user or transaction_type:
-            rate = ExchangeRate.get_current_rate(from_currency, to_currency)
             CurrencyConversionLog.objects.create(
                 from_currency=from_currency,
                 to_currency=to_currency,
@@ -115,6 +121,93 @@ class CurrencyManager:
             return user.profile.preferred_currency
         return CurrencyManager.get_base_currency()
     
+    @staticmethod
+    def viewer_conversion(user, from_currency='INR', request=None):
+        """
+        Currency and rate for showing from_currency amounts to a user
+        
+        Resolved once per (user, from_currency) and request: the result is
+        memoized on the request when one is given.
+        
+        Returns:
+            tuple: (currency to show, rate from from_currency), or (None, None)
+                   when neither the user's nor the base currency exists. Without
+                   a rate to the user's currency, amounts stay in from_currency.
+        """
+        memo = None
+        if request is not None:
+            memo = request.__dict__.setdefault('_currency_memo', {})
+            key = (getattr(user, 'pk', None), from_currency)
+            if key in memo:
+                return memo[key]
+        
+        currency = CurrencyManager.get_user_currency(user)
+        if currency is None:
+            result = (None, None)
+        elif currency.code == from_currency:
+            result = (currency, Decimal('1'))
+        else:
+            rate = rate_matrix.rate(from_currency, currency)
+            if rate is None:
+                result = (rate_matrix.get().currency(from_currency), Decimal('1'))
+            else:
+                result = (currency, rate)
+        
+        if memo is not None:
+            memo[key] = result
+        return result
+    
+    @staticmethod
+    def convert_many(amounts, from_currency, to_currency):
+        """
+        Convert many amounts with one rate lookup
+        
+        Returns:
+            list: converted amounts (Decimal), None where the amount was None
+        """
+        rate = rate_matrix.rate(from_currency, to_currency)
+        if rate is None:
+            raise ValueError(f"No exchange rate found for {getattr(from_currency, 'code', from_currency)} to {getattr(to_currency, 'code', to_currency)}")
+        return [None if amount is None else Decimal(str(amount)) * rate for amount in amounts]
+    
+    @staticmethod
+    def format_for_user(amount, user, from_currency='INR', request=None):
+        """Format one amount in the user's currency (memoized per request, see viewer_conversion)"""
+        currency, rate = CurrencyManager.viewer_conversion(user, from_currency, request)
+        if currency is None:
+            return f'₹{amount}'
+        return currency.format_amount(Decimal(str(amount)) * rate)
+    
+    @staticmethod
+    def format_column(rows, fields, user, from_currency='INR', request=None, suffix='_display'):
+        """
+        Convert and format amount columns of a list of objects in one pass
+        
+        Sets <field><suffix> on every row to the formatted amount in the
+        user's currency (e.g. transaction.balance_after_display).
+        
+        Args:
+            rows: Model instances (a page, list or evaluated queryset)
+            fields: Field name or list of field names holding from_currency amounts
+        
+        Returns:
+            The rows
+        """
+        if isinstance(fields, str):
+            fields = [fields]
+        currency, rate = CurrencyManager.viewer_conversion(user, from_currency, request)
+        for row in rows:
+            for field in fields:
+                amount = getattr(row, field)
+                if amount is None:
+                    display = ''
+                elif currency is None:
+                    display = f'₹{amount}'
+                else:
+                    display = currency.format_amount(Decimal(str(amount)) * rate)
+                setattr(row, field + suffix, display)
+        return rows
+    
     @staticmethod
     def clear_cache():
         """Clear all currency-related cache"""
@@ -123,6 +216,7 @@ class CurrencyManager:
         # Also clear individual currency caches
         for currency in Currency.objects.all():
             cache.delete(f'currency_{currency.code}')
+        rate_matrix.invalidate()
 
 
 def initialize_default_currencies():
@@ -237,21 +331,8 @@ def set_exchange_rates_to_inr():
             
             if created:
                 created_rates.append(exchange_rate)
+            # The reverse and cross rates are derived (transactions.rate_matrix)
             
-            # Also create reverse rate
-            reverse_rate, created = ExchangeRate.objects.get_or_create(
-                from_currency=to_currency,
-                to_currency=inr,
-                defaults={
-                    'rate': Decimal('1.0') / rate,
-                    'source': 'manual',
-                    'is_active': True,
-                }
-            )
-            
-            if created:
-                created_rates.append(reverse_rate)
-                
         except Currency.DoesNotExist:
             print(f"Currency {code} not found")
             continue
@@ -259,65 +340,16 @@ def set_exchange_rates_to_inr():
     return created_rates
 
 
-def fetch_live_exchange_rates():
+def fetch_live_exchange_rates(strategy=None, timeout=None):
     """
-    Fetch live exchange rates from external API
-    Uses Frankfurter API (free, no API key) and ExchangeRate-API as backup
+    Fetch live exchange rates from the configured sources (transactions.rate_sources)
+    All sources are queried at once; see EXCHANGE_RATE_SOURCES and EXCHANGE_RATE_STRATEGY
     Returns dict with currency codes as keys and rates (to INR) as values
     """
-    import requests
-    from decimal import Decimal
-    
-    rates = {}
-    
-    # Try Frankfurter API first (European Central Bank data, free)
-    try:
-        # Get rates with EUR as base
-        response = requests.get('https://api.frankfurter.app/latest?from=EUR', timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            eur_rates = data.get('rates', {})
-            
-            # Get INR rate relative to EUR
-            if 'INR' in eur_rates:
-                inr_per_eur = Decimal(str(eur_rates['INR']))
-                
-                # Calculate each currency's rate to INR
-                for currency_code, rate_to_eur in eur_rates.items():
-                    if currency_code != 'INR':
-                        # Convert: 1 CURRENCY = (inr_per_eur / rate_to_eur) INR
-                        rate_to_inr = inr_per_eur / Decimal(str(rate_to_eur))
-                        rates[currency_code] = rate_to_inr
-                
-                # EUR to INR
-                rates['EUR'] = inr_per_eur
-                return rates
-    except Exception as e:
-        print(f"Frankfurter API error: {e}")
-    
-    # Fallback: Try ExchangeRate-API (free tier: 1500 requests/month)
-    try:
-        # Get rates with INR as base
-        response = requests.get('https://api.exchangerate-api.com/v4/latest/INR', timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            inr_rates = data.get('rates', {})
-            
-            # Convert to "X to INR" format (inverse of the API response)
-            for currency_code, rate_from_inr in inr_rates.items():
-                if currency_code != 'INR' and rate_from_inr > 0:
-                    # API gives: 1 INR = X USD, we need: 1 USD = Y INR
-                    rate_to_inr = Decimal('1.0') / Decimal(str(rate_from_inr))
-                    rates[currency_code] = rate_to_inr
-            
-            return rates
-    except Exception as e:
-        print(f"ExchangeRate-API error: {e}")
-    
-    return rates
+    return rate_sources.fetch_rates(strategy=strategy, timeout=timeout)['rates']
 
 
-def update_exchange_rates_from_api():
+def update_exchange_rates_from_api(strategy=None, timeout=None):
     """
     Update exchange rates for all active currencies from live API
     Returns: dict with success status and updated currencies info
@@ -333,11 +365,14 @@ def update_exchange_rates_from_api():
     }
     
     # Fetch live rates
-    live_rates = fetch_live_exchange_rates()
+    fetched = rate_sources.fetch_rates(strategy=strategy, timeout=timeout)
+    live_rates = fetched['rates']
     
     if not live_rates:
-        result['message'] = 'Failed to fetch rates from external APIs'
+        errors = '; '.join(f'{name}: {error}' for name, error in fetched['errors'].items())
+        result['message'] = 'Failed to fetch rates from external APIs' + (f' ({errors})' if errors else '')
         return result
+    source = ('api_' + '+'.join(fetched['sources']))[:100]
     
     # Get INR base currency
     try:
@@ -350,69 +385,112 @@ def update_exchange_rates_from_api():
     active_currencies = Currency.objects.filter(is_active=True).exclude(code='INR')
     
     now = timezone.now()
-    
+    new_rates = []
     for currency in active_currencies:
         if currency.code in live_rates:
-            rate_value = live_rates[currency.code]
-            
-            try:
-                # Deactivate old rates (set effective_until)
-                old_rates = ExchangeRate.objects.filter(
-                    from_currency=currency,
-                    to_currency=inr,
-                    is_active=True,
-                    effective_until__isnull=True
-                )
-                old_rates.update(effective_until=now)
-                
-                # Create new rate
-                new_rate = ExchangeRate.objects.create(
-                    from_currency=currency,
-                    to_currency=inr,
-                    rate=rate_value,
-                    source='api_frankfurter',
-                    is_active=True,
-                    effective_from=now,
-                    effective_until=None
-                )
-                
-                # Also create/update reverse rate (INR to other currency)
-                old_reverse = ExchangeRate.objects.filter(
-                    from_currency=inr,
-                    to_currency=currency,
-                    is_active=True,
-                    effective_until__isnull=True
-                )
-                old_reverse.update(effective_until=now)
-                
-                ExchangeRate.objects.create(
-                    from_currency=inr,
-                    to_currency=currency,
-                    rate=Decimal('1.0') / rate_value,
-                    source='api_frankfurter',
-                    is_active=True,
-                    effective_from=now,
-                    effective_until=None
-                )
-                
-                result['updated'].append({
-                    'currency': currency.code,
-                    'rate': float(rate_value),
-                    'symbol': currency.symbol
-                })
-                
-            except Exception as e:
-                result['failed'].append({
-                    'currency': currency.code,
-                    'error': str(e)
-                })
+            new_rates.append(ExchangeRate(
+                from_currency=currency,
+                to_currency=inr,
+                rate=live_rates[currency.code],
+                source=source,
+                is_active=True,
+                effective_from=now,
+                effective_until=None
+            ))
         else:
             result['failed'].append({
                 'currency': currency.code,
                 'error': 'Rate not available in API response'
             })
     
+    # Rotate every rate in one transaction, so readers never see a half-updated
+    # set: one UPDATE closes the open rates of the updated currencies in both
+    # directions (a stored INR -> currency rate would shadow the reverse of the
+    # new one, see transactions.rate_matrix) and one INSERT adds the new ones
+    currency_ids = [rate.from_currency_id for rate in new_rates]
+    try:
+        with db_transaction.atomic():
+            ExchangeRate.objects.filter(
+                Q(from_currency_id__in=currency_ids, to_currency=inr) |
+                Q(from_currency=inr, to_currency_id__in=currency_ids),
+                is_active=True,
+                effective_until__isnull=True
+            ).update(effective_until=now)
+            ExchangeRate.objects.bulk_create(new_rates, batch_size=500)
+            # update() and bulk_create() send no signals: drop this process's
+            # rate matrix once, after commit (other processes see the new ids)
+            db_transaction.on_commit(rate_matrix.invalidate)
+    except Exception as e:
+        result['failed'].extend({'currency': rate.from_currency.code, 'error': str(e)} for rate in new_rates)
+        new_rates = []
+    
+    for rate in new_rates:
+        result['updated'].append({
+            'currency': rate.from_currency.code,
+            'rate': float(rate.rate),
+            'symbol': rate.from_currency.symbol
+        })
+    
     result['success'] = len(result['updated']) > 0
     result['message'] = f"Updated {len(result['updated'])} currencies, {len(result['failed'])} failed"
     
     return result
+
+
+# ExchangeRateRefresh rows kept for the admin
+REFRESH_HISTORY = 100
+
+_refresh_lock = threading.Lock()
+
+
+def record_refresh(result, trigger):
+    """Store a refresh result (stamping it with 'finished_at') for last_refresh(), in any process"""
+    refresh = ExchangeRateRefresh.objects.create(
+        trigger=trigger,
+        success=result['success'],
+        message=result['message'][:500],
+        updated=result['updated'],
+        failed=result['failed'],
+    )
+    result['finished_at'] = refresh.finished_at
+    # Keep the newest REFRESH_HISTORY rows
+    cutoff = ExchangeRateRefresh.objects.order_by('-pk').values_list('pk', flat=True)[REFRESH_HISTORY:REFRESH_HISTORY + 1]
+    if cutoff:
+        ExchangeRateRefresh.objects.filter(pk__lte=cutoff[0]).delete()
+    return refresh
+
+
+def _refresh(strategy, timeout):
+    from django.db import connection
+    
+    try:
+        try:
+            result = update_exchange_rates_from_api(strategy, timeout)
+        except Exception as e:
+            result = {'success': False, 'updated': [], 'failed': [], 'message': f'Refresh failed: {e}'}
+        record_refresh(result, 'admin')
+    finally:
+        connection.close()
+        _refresh_lock.release()
+
+
+def refresh_in_background(strategy=None, timeout=None):
+    """
+    Run update_exchange_rates_from_api() on a background thread, so the
+    caller (an admin request) never waits on the network
+    Returns: False if a refresh is already running in this process
+    """
+    if not _refresh_lock.acquire(blocking=False):
+        return False
+    try:
+        threading.Thread(target=_refresh, args=(strategy, timeout), name='exchange-rate-refresh', daemon=True).start()
+    except BaseException:
+        # The thread that would release the lock never ran
+        _refresh_lock.release()
+        raise
+    return True
+
+
+def last_refresh():
+    """The last ExchangeRateRefresh, from the admin or the refresh_exchange_rates command, or None"""
+    return ExchangeRateRefresh.objects.first()
@@ -0,0 +1,250 @@
+"""
+Streaming exports of transactions, game entries and winners for finance.
+
+Rows are read in id order, CHUNK_SIZE at a time, each chunk a short keyset
+query (WHERE id > last id ORDER BY id LIMIT n) of plain values, and written
+out as CSV or JSON lines (optionally gzipped) as they are read. Memory stays
+at one chunk however large the export, and no query or transaction stays
+open while a slow client downloads.
+
+Every export can be resumed: a cursor token (see cursor_token()) names the
+dataset and the last id written, and an export started from it continues
+with the next row. The export_finance_data command prints the token when it
+stops; in the HTTP export the id column of the last row received serves the
+same purpose (?after_id=).
+"""
+import base64
+import csv
+import json
+import zlib
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from games.models import UserEntry, Winner
+from .models import Transaction
+
+
+CHUNK_SIZE = 2000
+
+FORMATS = ('csv', 'jsonl')
+
+# name: model, timestamp field the date filters apply to,
+#       {column: values() lookup}, {filter: model field}
+DATASETS = {
+    'transactions': {
+        'model': Transaction,
+        'date_field': 'created_at',
+        'columns': {
+            'id': 'id',
+            'reference_id': 'reference_id',
+            'created_at': 'created_at',
+            'completed_at': 'completed_at',
+            'user_id': 'user_id',
+            'username': 'user__username',
+            'transaction_type': 'transaction_type',
+            'status': 'status',
+            'amount': 'amount',
+            'fee_amount': 'fee_amount',
+            'total_amount': 'total_amount',
+            'currency': 'currency__code',
+            'amount_in_base': 'amount_in_base',
+            'exchange_rate': 'exchange_rate',
+            'payment_method': 'payment_method',
+            'payment_id': 'payment_id',
+            'gateway_order_id': 'gateway_order_id',
+            'balance_before': 'balance_before',
+            'balance_after': 'balance_after',
+            'description': 'description',
+        },
+        'filters': {
+            'type': 'transaction_type',
+            'status': 'status',
+            'currency': 'currency__code',
+        },
+    },
+    'entries': {
+        'model': UserEntry,
+        'date_field': 'created_at',
+        'columns': {
+            'id': 'id',
+            'entry_number': 'entry_number',
+            'created_at': 'created_at',
+            'user_id': 'user_id',
+            'username': 'user__username',
+            'game_id': 'game_round__game_id',
+            'game': 'game_round__game__name',
+            'round_id': 'game_round_id',
+            'round_number': 'game_round__round_number',
+            'user_choice': 'user_choice',
+            'entry_fee_paid': 'entry_fee_paid',
+            'is_winner': 'is_winner',
+            'winning_amount': 'winning_amount',
+        },
+        'filters': {
+            'game': 'game_round__game_id',
+        },
+    },
+    'winners': {
+        'model': Winner,
+        'date_field': 'announced_at',
+        'columns': {
+            'id': 'id',
+            'announced_at': 'announced_at',
+            'user_id': 'user_id',
+            'username': 'user__username',
+            'entry_id': 'user_entry_id',
+            'game_id': 'game_round__game_id',
+            'game': 'game_round__game__name',
+            'round_id': 'game_round_id',
+            'round_number': 'game_round__round_number',
+            'prize_amount': 'prize_amount',
+            'prize_credited': 'prize_credited',
+            'prize_credited_at': 'prize_credited_at',
+        },
+        'filters': {
+            'game': 'game_round__game_id',
+        },
+    },
+}
+
+
+def cursor_token(dataset, last_id):
+    """Opaque token to resume an export of dataset after the row last_id"""
+    return base64.urlsafe_b64encode(f'{dataset}:{last_id}'.encode()).decode().rstrip('=')
+
+
+def parse_cursor(dataset, token):
+    """The last id of a cursor token.
+    
+    Raises:
+        ValueError: if the token is invalid or belongs to another dataset
+    """
+    try:
+        name, last_id = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode().split(':')
+        last_id = int(last_id)
+    except (TypeError, ValueError) as exc:
+        raise ValueError('Invalid cursor token') from exc
+    if name != dataset:
+        raise ValueError(f'Cursor token is for the {name} export, not {dataset}')
+    return last_id
+
+
+def queryset(dataset, since=None, until=None, **filters):
+    """The rows of an export, filtered by day (since/until inclusive) and by the dataset's filters.
+    
+    Raises:
+        ValueError: on an unknown dataset or filter
+    """
+    if dataset not in DATASETS:
+        raise ValueError(f'Unknown dataset {dataset!r} (choose from {", ".join(DATASETS)})')
+    spec = DATASETS[dataset]
+    rows = spec['model'].objects.all()
+    
+    date_field = spec['date_field']
+    if since:
+        rows = rows.filter(**{f'{date_field}__gte': timezone.make_aware(datetime.combine(since, time.min))})
+    if until:
+        rows = rows.filter(**{f'{date_field}__lt': timezone.make_aware(datetime.combine(until + timedelta(days=1), time.min))})
+    for name, value in filters.items():
+        if value in (None, ''):
+            continue
+        if name not in spec['filters']:
+            raise ValueError(f'The {dataset} export has no {name!r} filter')
+        rows = rows.filter(**{spec['filters'][name]: value})
+    return rows
+
+
+def iter_chunks(rows, columns, after_id=0, chunk_size=CHUNK_SIZE):
+    """Yield lists of value tuples in id order, one keyset query per chunk (columns must start with 'id')"""
+    lookups = list(columns.values())
+    while True:
+        chunk = list(rows.filter(pk__gt=after_id).order_by('pk').values_list(*lookups)[:chunk_size])
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        after_id = chunk[-1][0]
+
+
+class _Line:
+    """File-like target for csv.writer that hands back what it writes"""
+    
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def iter_export(dataset, rows, fmt='csv', after_id=0, chunk_size=CHUNK_SIZE, header=True):
+    """Yield (last id written, rows, text) per chunk; a CSV export starts with its header unless header is False.
+    
+    Raises:
+        ValueError: on an unknown format
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown format {fmt!r} (choose from {", ".join(FORMATS)})')
+    columns = DATASETS[dataset]['columns']
+    names = list(columns)
+    
+    if fmt == 'csv':
+        writer = csv.writer(_Line())
+        if header:
+            yield after_id, 0, writer.writerow(names)
+        for chunk in iter_chunks(rows, columns, after_id, chunk_size):
+            yield chunk[-1][0], len(chunk), ''.join(writer.writerow([_csv_value(value) for value in values]) for values in chunk)
+    else:
+        for chunk in iter_chunks(rows, columns, after_id, chunk_size):
+            yield chunk[-1][0], len(chunk), ''.join(json.dumps(dict(zip(names, values)), default=str) + '\n' for values in chunk)
+
+
+class Encoder:
+    """UTF-8 encodes export text, gzip-compressing it as it goes if asked.
+    
+    Each encode() ends on a sync flush, so a gzipped file cut off after any
+    chunk still decompresses up to that chunk. A writer that calls
+    checkpoint() once each chunk is safely written can, after a failed
+    write, drop the partial chunk and close the gzip stream with
+    finish(at_checkpoint=True), so that the file is whole again and a
+    resumed export can append to it.
+    """
+    
+    def __init__(self, gzip=False):
+        self.compressor = zlib.compressobj(wbits=31) if gzip else None
+        self.saved = None
+        self.checkpoint()
+    
+    def encode(self, text):
+        data = text.encode('utf-8')
+        if self.compressor:
+            data = self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        return data
+    
+    def checkpoint(self):
+        """Remember the compressor state after the last chunk written in full"""
+        if self.compressor:
+            self.saved = self.compressor.copy()
+    
+    def finish(self, at_checkpoint=False):
+        """End of the output, as of the last encode() or the last checkpoint()"""
+        compressor = self.saved if at_checkpoint else self.compressor
+        return compressor.flush() if compressor else b''
+
+
+def iter_bytes(dataset, rows, fmt='csv', gzip=False, after_id=0, chunk_size=CHUNK_SIZE):
+    """The export as a stream of byte blocks, for StreamingHttpResponse"""
+    encoder = Encoder(gzip)
+    for _, _, text in iter_export(dataset, rows, fmt, after_id, chunk_size):
+        yield encoder.encode(text)
+    yield encoder.finish()
+
+
+def filename(dataset, fmt='csv', gzip=False):
+    stamp = timezone.localtime().strftime('%Y%m%d-%H%M%S')
+    return f'{dataset}-{stamp}.{fmt}' + ('.gz' if gzip else '')
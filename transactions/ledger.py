@@ -0,0 +1,188 @@
+"""
+Wallet ledger: append-only postings and balance snapshots.
+
+accounts.wallet calls record() right after its guarded profile UPDATE, so
+the per-user sequence is handed out under that row lock and postings are
+never updated or deleted afterwards.
+"""
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import models, transaction as db_transaction
+from django.db.models import Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .ledger_models import LedgerPosting, BalanceSnapshot
+
+
+# Contra account for each running total kept on the profile
+CONTRA_ACCOUNTS = {
+    'total_deposits': 'deposits',
+    'total_withdrawals': 'withdrawals',
+    'total_spent': 'game_fees',
+    'total_winnings': 'prize_payouts',
+}
+
+
+def snapshot_interval():
+    """Write a snapshot inline every N postings per user"""
+    return getattr(settings, 'LEDGER_SNAPSHOT_INTERVAL', 100)
+
+
+def record(user_id, sequence, amount, aggregate, balance, memo='', using=None):
+    """Append both legs of one wallet movement.
+    
+    Args:
+        amount: signed change to the wallet (negative for debits)
+        balance: wallet balance after this posting, as returned by the UPDATE
+    """
+    record_many([(user_id, sequence, amount, balance)], aggregate, memo, using=using)
+
+
+def record_many(movements, aggregate, memo='', using=None):
+    """Append the postings for several wallet movements in one INSERT.
+    
+    Args:
+        movements: iterable of (user_id, sequence, signed amount, balance after)
+    """
+    postings = []
+    snapshots = []
+    interval = snapshot_interval()
+    
+    for user_id, sequence, amount, balance in movements:
+        entry_id = uuid.uuid4()
+        postings.append(LedgerPosting(
+            entry_id=entry_id,
+            account=LedgerPosting.WALLET,
+            user_id=user_id,
+            sequence=sequence,
+            amount=amount,
+            memo=memo,
+        ))
+        postings.append(LedgerPosting(
+            entry_id=entry_id,
+            account=CONTRA_ACCOUNTS[aggregate],
+            amount=-amount,
+            memo=memo,
+        ))
+        if interval and sequence % interval == 0:
+            snapshots.append(BalanceSnapshot(user_id=user_id, sequence=sequence, balance=balance))
+    
+    LedgerPosting.objects.using(using).bulk_create(postings)
+    if snapshots:
+        BalanceSnapshot.objects.using(using).bulk_create(snapshots)
+
+
+def balance(user, using=None):
+    """Ledger balance: latest snapshot plus the postings after it"""
+    user_id = getattr(user, 'pk', user)
+    
+    snapshot = BalanceSnapshot.objects.using(using).filter(
+        user_id=user_id
+    ).order_by('-sequence').values_list('sequence', 'balance').first()
+    # Opening-balance postings use sequence 0, so start below it
+    last_sequence, opening = snapshot if snapshot else (-1, Decimal('0.00'))
+    
+    delta = LedgerPosting.objects.using(using).filter(
+        account=LedgerPosting.WALLET,
+        user_id=user_id,
+        sequence__gt=last_sequence,
+    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+    
+    return opening + delta
+
+
+def post_opening_balances(user_ids, using=None):
+    """Post sequence-0 opening entries for wallets that predate the ledger.
+    
+    The opening amount is whatever the profile balance holds beyond the
+    postings already recorded, read under a row lock so no wallet write can
+    slip in between. Returns the number of wallets opened.
+    """
+    from accounts.models import UserProfile
+    
+    opened = LedgerPosting.objects.using(using).filter(
+        account=LedgerPosting.WALLET, user_id__in=user_ids, sequence=0
+    ).values('user_id')
+    
+    with db_transaction.atomic(using=using):
+        locked = dict(
+            UserProfile.objects.using(using).select_for_update()
+            .filter(user_id__in=user_ids)
+            .exclude(user_id__in=opened)
+            .values_list('user_id', 'wallet_balance')
+        )
+        if not locked:
+            return 0
+        
+        posted = dict(
+            LedgerPosting.objects.using(using).filter(
+                account=LedgerPosting.WALLET, user_id__in=list(locked)
+            ).values('user_id').annotate(total=Sum('amount')).values_list('user_id', 'total')
+        )
+        
+        postings = []
+        snapshots = []
+        for user_id, wallet_balance in locked.items():
+            opening = Decimal(str(wallet_balance)) - (posted.get(user_id) or Decimal('0.00'))
+            if not opening:
+                continue
+            entry_id = uuid.uuid4()
+            postings.append(LedgerPosting(
+                entry_id=entry_id, account=LedgerPosting.WALLET,
+                user_id=user_id, sequence=0, amount=opening, memo='Opening balance',
+            ))
+            postings.append(LedgerPosting(
+                entry_id=entry_id, account='opening_balance',
+                amount=-opening, memo='Opening balance',
+            ))
+            snapshots.append(BalanceSnapshot(user_id=user_id, sequence=0, balance=opening))
+        
+        LedgerPosting.objects.using(using).bulk_create(postings)
+        BalanceSnapshot.objects.using(using).bulk_create(snapshots, ignore_conflicts=True)
+    
+    return len(snapshots)
+
+
+def rebuild_snapshots(user_ids, using=None):
+    """Snapshot each wallet at its latest posting.
+    
+    Only postings after each user's previous snapshot are read (a range on
+    the (user, sequence) unique index), so repeated runs stay incremental.
+    
+    Returns:
+        dict: user_id -> (sequence, balance) for every wallet with postings
+    """
+    latest = BalanceSnapshot.objects.using(using).filter(
+        user_id=OuterRef('user_id')
+    ).order_by('-sequence')
+    
+    previous = {
+        user_id: (sequence, snap_balance)
+        for user_id, sequence, snap_balance in BalanceSnapshot.objects.using(using).filter(
+            user_id__in=user_ids,
+            sequence=Subquery(latest.values('sequence')[:1]),
+        ).values_list('user_id', 'sequence', 'balance')
+    }
+    
+    newer = LedgerPosting.objects.using(using).filter(
+        account=LedgerPosting.WALLET,
+        user_id__in=user_ids,
+        sequence__gt=Coalesce(
+            Subquery(latest.values('sequence')[:1]), Value(-1),
+            output_field=models.BigIntegerField(),
+        ),
+    ).values('user_id').annotate(
+        total=Sum('amount'), last=Max('sequence')
+    ).values_list('user_id', 'total', 'last')
+    
+    balances = dict(previous)
+    snapshots = []
+    for user_id, total, last in newer:
+        opening = previous.get(user_id, (None, Decimal('0.00')))[1]
+        balances[user_id] = (last, opening + total)
+        snapshots.append(BalanceSnapshot(user_id=user_id, sequence=last, balance=opening + total))
+    
+    BalanceSnapshot.objects.using(using).bulk_create(snapshots, ignore_conflicts=True)
+    return balances
@@ -0,0 +1,63 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class LedgerPosting(models.Model):
+    """Append-only double-entry ledger leg.
+    
+    Every wallet movement writes two legs sharing an entry_id: one on the
+    user's wallet (sequenced per user) and the opposite amount on a system
+    contra account, so each entry sums to zero.
+    """
+    WALLET = 'wallet'
+    
+    ACCOUNT_CHOICES = [
+        (WALLET, 'User Wallet'),
+        ('deposits', 'Deposits Clearing'),
+        ('withdrawals', 'Withdrawals Clearing'),
+        ('game_fees', 'Game Entry Fees'),
+        ('prize_payouts', 'Prize Payouts'),
+        ('opening_balance', 'Opening Balance'),
+    ]
+    
+    entry_id = models.UUIDField(db_index=True, editable=False, help_text="Shared by both legs of one entry")
+    account = models.CharField(max_length=20, choices=ACCOUNT_CHOICES)
+    user = models.ForeignKey(User, on_delete=models.PROTECT, null=True, blank=True, related_name='ledger_postings', help_text="Wallet owner (empty on system legs)")
+    sequence = models.PositiveBigIntegerField(null=True, blank=True, help_text="Per-user posting number (wallet legs only)")
+    amount = models.DecimalField(max_digits=12, decimal_places=2, help_text="Signed: positive credits the account")
+    memo = models.CharField(max_length=200, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Ledger Posting'
+        verbose_name_plural = 'Ledger Postings'
+        ordering = ['-id']
+        unique_together = ['user', 'sequence']
+        indexes = [
+            models.Index(fields=['account', 'created_at']),
+        ]
+    
+    def __str__(self):
+        owner = self.user.username if self.user_id else self.get_account_display()
+        return f"{owner} #{self.sequence or '-'} {self.amount:+}"
+
+
+class BalanceSnapshot(models.Model):
+    """Wallet balance after a given posting sequence.
+    
+    Ledger balance = latest snapshot + sum of the user's postings with a
+    higher sequence, so lookups never scan a user's full history.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='balance_snapshots')
+    sequence = models.PositiveBigIntegerField(help_text="Last posting sequence included")
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Balance Snapshot'
+        verbose_name_plural = 'Balance Snapshots'
+        ordering = ['-sequence']
+        unique_together = ['user', 'sequence']
+    
+    def __str__(self):
+        return f"{self.user.username} @{self.sequence}: {self.balance}"
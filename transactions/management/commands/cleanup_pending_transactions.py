@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
+from transactions import rollups
 from transactions.models import Transaction
 
 
@@ -47,10 +48,7 @@ class Command(BaseCommand):
                 self.stdout.write(f'  ... and {count - 10} more')
         else:
             # Update transactions
-            updated = old_pending.update(
-                status='failed',
-                payment_status='Transaction expired - payment not completed within time limit'
-            )
+            updated = rollups.update_status(old_pending, 'failed')
             
             self.stdout.write(
                 self.style.SUCCESS(
@@ -62,8 +60,8 @@ class Command(BaseCommand):
             self.stdout.write('\nCleaned up transactions:')
             for txn in Transaction.objects.filter(
                 status='failed',
-                payment_status='Transaction expired - payment not completed within time limit'
-            )[:5]:
+                created_at__lt=cutoff_time
+            ).select_related('user')[:5]:
                 self.stdout.write(
                     f'  - Transaction #{txn.id}: ₹{txn.amount} for {txn.user.username}'
                 )
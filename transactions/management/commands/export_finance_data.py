@@ -0,0 +1,118 @@
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from transactions import exports
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream transactions, game entries or winners to CSV or JSON lines (optionally gzipped) '
+        'in constant memory. Prints a cursor token when it stops; pass it back with --cursor '
+        '(and --append) to continue after the last row written, e.g. for the next incremental export.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=exports.DATASETS, help='What to export')
+        parser.add_argument(
+            '--format',
+            choices=exports.FORMATS,
+            default='csv',
+            help='Output format (default: csv)',
+        )
+        parser.add_argument('--gzip', action='store_true', help='Gzip the output')
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='File to write (default: standard output)',
+        )
+        parser.add_argument(
+            '--append',
+            action='store_true',
+            help='Append to --output instead of replacing it (no second CSV header)',
+        )
+        parser.add_argument(
+            '--since',
+            type=date.fromisoformat,
+            help='First day to export, YYYY-MM-DD',
+        )
+        parser.add_argument(
+            '--until',
+            type=date.fromisoformat,
+            help='Last day to export, YYYY-MM-DD',
+        )
+        parser.add_argument('--type', help='Transaction type (transactions only)')
+        parser.add_argument('--status', help='Transaction status (transactions only)')
+        parser.add_argument('--currency', help='Currency code, e.g. INR (transactions only)')
+        parser.add_argument('--game', type=int, help='Game id (entries and winners only)')
+        parser.add_argument('--cursor', help='Resume after the row this token was printed for')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=exports.CHUNK_SIZE,
+            help=f'Rows read per query (default: {exports.CHUNK_SIZE})',
+        )
+    
+    def handle(self, *args, **options):
+        dataset = options['dataset']
+        if options['since'] and options['until'] and options['since'] > options['until']:
+            raise CommandError('--since must not be after --until')
+        filters = {name: options[name] for name in ('type', 'status', 'currency', 'game') if options[name] is not None}
+        try:
+            rows = exports.queryset(dataset, options['since'], options['until'], **filters)
+            after_id = exports.parse_cursor(dataset, options['cursor']) if options['cursor'] else 0
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        
+        to_stdout = options['output'] == '-'
+        out = sys.stdout.buffer if to_stdout else open(options['output'], 'ab' if options['append'] else 'wb')
+        encoder = exports.Encoder(options['gzip'])
+        last_id, written = after_id, 0
+        # End of the last chunk written in full (the file is opened at its end)
+        complete_at = None if to_stdout else out.tell()
+        try:
+            for last_id_written, count, text in exports.iter_export(
+                dataset, rows, options['format'], after_id, max(options['chunk_size'], 1),
+                header=not options['append'],
+            ):
+                out.write(encoder.encode(text))
+                out.flush()
+                encoder.checkpoint()
+                if not to_stdout:
+                    complete_at = out.tell()
+                if count:
+                    written += count
+                    last_id = last_id_written
+                    self.stderr.write(f'  {written} row(s), up to id {last_id}')
+            out.write(encoder.finish())
+        except BaseException:
+            self.stderr.write(self._stopped(dataset, last_id, out, encoder, complete_at))
+            raise
+        finally:
+            if not to_stdout:
+                out.close()
+        
+        self.stderr.write(self.style.SUCCESS(
+            f'✓ Exported {written} {dataset} row(s); continue later with --cursor {exports.cursor_token(dataset, last_id)}'
+        ))
+    
+    def _stopped(self, dataset, last_id, out, encoder, complete_at):
+        """Make an interrupted output file whole again and say how to resume"""
+        resume = f'--cursor {exports.cursor_token(dataset, last_id)}'
+        if complete_at is None:
+            return (
+                f'Stopped after id {last_id}; the output may end in a partial chunk and, if gzipped, is '
+                f'not closed: keep only the rows up to id {last_id} and resume with {resume} into a new file'
+            )
+        try:
+            # Drop a partly written chunk and close the gzip stream where the last whole chunk ended
+            out.seek(complete_at)
+            out.truncate()
+            out.write(encoder.finish(at_checkpoint=True))
+            out.flush()
+        except Exception as exc:
+            return (
+                f'Stopped after id {last_id}, and the output could not be cut back to its last complete '
+                f'chunk ({exc}): resume with {resume} into a new file'
+            )
+        return f'Stopped after id {last_id}; resume with {resume} --append'
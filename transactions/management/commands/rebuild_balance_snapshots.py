@@ -0,0 +1,82 @@
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from accounts.models import UserProfile
+from transactions import ledger
+
+
+class Command(BaseCommand):
+    help = 'Rebuild wallet balance snapshots from the ledger in user chunks'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of users processed per batch (default: 1000)',
+        )
+        parser.add_argument(
+            '--opening-balances',
+            action='store_true',
+            help='First post opening entries for wallets that predate the ledger',
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Compare rebuilt ledger balances with profile wallet balances',
+        )
+    
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        opening_balances = options['opening_balances']
+        verify = options['verify']
+        
+        last_user_id = 0
+        users_seen = 0
+        opened = 0
+        mismatches = []
+        
+        while True:
+            # Keyset pagination over profiles - no OFFSET, no full scan per chunk
+            user_ids = list(
+                UserProfile.objects.filter(user_id__gt=last_user_id)
+                .order_by('user_id')
+                .values_list('user_id', flat=True)[:chunk_size]
+            )
+            if not user_ids:
+                break
+            last_user_id = user_ids[-1]
+            users_seen += len(user_ids)
+            
+            if opening_balances:
+                opened += ledger.post_opening_balances(user_ids)
+            
+            balances = ledger.rebuild_snapshots(user_ids)
+            
+            if verify:
+                profiles = UserProfile.objects.filter(user_id__in=user_ids).values_list(
+                    'user_id', 'wallet_balance', 'ledger_sequence'
+                )
+                for user_id, wallet_balance, ledger_sequence in profiles:
+                    sequence, ledger_balance = balances.get(user_id, (ledger_sequence, Decimal('0.00')))
+                    if sequence != ledger_sequence:
+                        # Wallet moved after the snapshot was taken; next run covers it
+                        continue
+                    if ledger_balance != wallet_balance:
+                        mismatches.append((user_id, wallet_balance, ledger_balance))
+            
+            self.stdout.write(f'  Processed users up to #{last_user_id} ({users_seen} so far)')
+        
+        if opening_balances:
+            self.stdout.write(self.style.SUCCESS(f'✓ Posted opening balances for {opened} wallet(s)'))
+        
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt balance snapshots for {users_seen} user(s)'))
+        
+        if verify:
+            if not mismatches:
+                self.stdout.write(self.style.SUCCESS('✓ Ledger balances match wallet balances'))
+            else:
+                self.stdout.write(self.style.WARNING(f'{len(mismatches)} wallet(s) differ from the ledger:'))
+                for user_id, wallet_balance, ledger_balance in mismatches[:20]:
+                    self.stdout.write(f'  - User #{user_id}: wallet ₹{wallet_balance}, ledger ₹{ledger_balance}')
+                if len(mismatches) > 20:
+                    self.stdout.write(f'  ... and {len(mismatches) - 20} more')
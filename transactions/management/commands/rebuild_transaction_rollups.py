@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from transactions import rollups
+from transactions.models import Transaction
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily transaction rollups from the Transaction table (backfill or repair)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=date.fromisoformat,
+            help='First day to rebuild, YYYY-MM-DD (default: day of the first transaction)',
+        )
+        parser.add_argument(
+            '--until',
+            type=date.fromisoformat,
+            help='Last day to rebuild, YYYY-MM-DD (default: today)',
+        )
+        parser.add_argument(
+            '--chunk-days',
+            type=int,
+            default=31,
+            help='Days rebuilt per transaction (default: 31)',
+        )
+    
+    def handle(self, *args, **options):
+        until = options['until'] or timezone.localdate()
+        since = options['since']
+        if since is None:
+            first = Transaction.objects.order_by('created_at').values_list('created_at', flat=True).first()
+            if first is None:
+                self.stdout.write('No transactions to roll up')
+                return
+            since = timezone.localdate(first)
+        if since > until:
+            raise CommandError('--since must not be after --until')
+        
+        chunk = timedelta(days=max(options['chunk_days'], 1))
+        start, rows = since, 0
+        while start <= until:
+            end = min(start + chunk - timedelta(days=1), until)
+            written = rollups.rebuild(start, end)
+            rows += written
+            self.stdout.write(f'  {start} to {end}: {written} row(s)')
+            start = end + timedelta(days=1)
+        
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt rollups from {since} to {until} ({rows} row(s))'))
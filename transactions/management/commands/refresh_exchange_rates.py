@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from transactions import rate_sources
+from transactions.currency_utils import record_refresh, update_exchange_rates_from_api
+
+
+class Command(BaseCommand):
+    help = (
+        'Fetch exchange rates from all configured sources at once and store them. '
+        'Run it from cron, or keep it running with --interval.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--strategy',
+            choices=rate_sources.STRATEGIES,
+            help='Take the first valid answer or the median across sources (default: EXCHANGE_RATE_STRATEGY or first)',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            help='Seconds to wait for each source (default: EXCHANGE_RATE_TIMEOUT or 10)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            help='Keep running and refresh every this many seconds',
+        )
+    
+    def handle(self, *args, **options):
+        if options['interval'] is not None and options['interval'] <= 0:
+            raise CommandError('--interval must be positive')
+        
+        while True:
+            close_old_connections()
+            result = update_exchange_rates_from_api(options['strategy'], options['timeout'])
+            record_refresh(result, 'command')
+            
+            style = self.style.SUCCESS if result['success'] else self.style.ERROR
+            self.stdout.write(style(f"[{result['finished_at']:%Y-%m-%d %H:%M:%S}] {result['message']}"))
+            for item in result['failed']:
+                self.stdout.write(f"  {item['currency']}: {item['error']}")
+            
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
+        
+        if not result['success']:
+            raise CommandError('Exchange rates were not updated')
+        self.stdout.write(self.style.SUCCESS('✓ Exchange rates refreshed'))
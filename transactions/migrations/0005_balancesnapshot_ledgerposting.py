@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_depositrequest_amount_in_base_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveBigIntegerField(help_text='Last posting sequence included')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Balance Snapshot',
+                'verbose_name_plural': 'Balance Snapshots',
+                'ordering': ['-sequence'],
+                'unique_together': {('user', 'sequence')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_id', models.UUIDField(db_index=True, editable=False, help_text='Shared by both legs of one entry')),
+                ('account', models.CharField(choices=[('wallet', 'User Wallet'), ('deposits', 'Deposits Clearing'), ('withdrawals', 'Withdrawals Clearing'), ('game_fees', 'Game Entry Fees'), ('prize_payouts', 'Prize Payouts'), ('opening_balance', 'Opening Balance')], max_length=20)),
+                ('sequence', models.PositiveBigIntegerField(blank=True, help_text='Per-user posting number (wallet legs only)', null=True)),
+                ('amount', models.DecimalField(decimal_places=2, help_text='Signed: positive credits the account', max_digits=12)),
+                ('memo', models.CharField(blank=True, default='', max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(blank=True, help_text='Wallet owner (empty on system legs)', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ledger_postings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Ledger Posting',
+                'verbose_name_plural': 'Ledger Postings',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['account', 'created_at'], name='transaction_account_eb34cf_idx')],
+                'unique_together': {('user', 'sequence')},
+            },
+        ),
+    ]
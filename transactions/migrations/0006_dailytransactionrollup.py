@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0005_balancesnapshot_ledgerposting'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyTransactionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(help_text='Day the transactions were created')),
+                ('transaction_type', models.CharField(max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('currency_code', models.CharField(blank=True, default='', help_text='Empty for transactions without a currency (base currency)', max_length=3)),
+                ('shard', models.PositiveSmallIntegerField(default=0)),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Daily Transaction Rollup',
+                'verbose_name_plural': 'Daily Transaction Rollups',
+                'ordering': ['-date', 'transaction_type', 'status'],
+                'indexes': [models.Index(fields=['status', 'transaction_type', 'date'], name='transaction_status_16e610_idx')],
+                'unique_together': {('date', 'transaction_type', 'status', 'currency_code', 'shard')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0010_userentry_games_usere_user_id_f8d7ed_idx'),
+        ('transactions', '0006_dailytransactionrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='depositrequest',
+            index=models.Index(fields=['user', '-requested_at', '-id'], name='transaction_user_id_765c90_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='transaction_user_id_4f0652_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'transaction_type', '-created_at', '-id'], name='transaction_user_id_62b5c5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='withdrawalrequest',
+            index=models.Index(fields=['user', '-requested_at', '-id'], name='transaction_user_id_400acc_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0007_depositrequest_transaction_user_id_765c90_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exchangerate',
+            index=models.Index(fields=['updated_at'], name='transaction_updated_8047a7_idx'),
+        ),
+    ]
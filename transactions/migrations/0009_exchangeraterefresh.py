@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0008_exchangerate_transaction_updated_8047a7_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRateRefresh',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigger', models.CharField(choices=[('admin', 'Admin panel'), ('command', 'Management command')], max_length=20)),
+                ('success', models.BooleanField(default=False)),
+                ('message', models.CharField(max_length=500)),
+                ('updated', models.JSONField(blank=True, default=list, help_text='[{currency, rate, symbol}] of the rates stored')),
+                ('failed', models.JSONField(blank=True, default=list, help_text='[{currency, error}] of the currencies not updated')),
+                ('finished_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-finished_at'],
+                'indexes': [models.Index(fields=['-finished_at'], name='transaction_finishe_d4ead6_idx')],
+            },
+        ),
+    ]
@@ -2,10 +2,17 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from decimal import Decimal
 import json
 
 # Import currency models
-from .currency_models import Currency, ExchangeRate, CurrencyConversionLog
+from .currency_models import Currency, ExchangeRate, CurrencyConversionLog, ExchangeRateRefresh
+
+# Import ledger models
+from .ledger_models import LedgerPosting, BalanceSnapshot
+
+# Import rollup models
+from .rollup_models import DailyTransactionRollup
 
 
 class PaymentGateway(models.Model):
@@ -120,6 +127,20 @@ class PaymentGateway(models.Model):
                 raise ValidationError(f"Cannot activate gateway without {self.mode} API key")
 
 
+class TransactionManager(models.Manager):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        # With ignore_conflicts we can't tell which rows were inserted; rebuild_transaction_rollups repairs those
+        if not kwargs.get('ignore_conflicts') and not kwargs.get('update_conflicts'):
+            from .rollups import record_created
+            from .signals import transactions_bulk_created
+            record_created(objs)
+            transactions_bulk_created.send(sender=self.model, transactions=objs)
+        for obj in objs:
+            obj._rollup_state = obj.rollup_state()
+        return objs
+
+
 class Transaction(models.Model):
     """All financial transactions"""
     TRANSACTION_TYPES = [
@@ -184,27 +205,71 @@ class Transaction(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     
+    objects = TransactionManager()
+    
+    # Values that decide which DailyTransactionRollup a transaction counts in
+    ROLLUP_FIELDS = ('created_at', 'transaction_type', 'status', 'currency_id', 'amount')
+    
     class Meta:
         verbose_name = 'Transaction'
         verbose_name_plural = 'Transactions'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of a user's history (transactions.pagination)
+            models.Index(fields=['user', '-created_at', '-id']),
+            models.Index(fields=['user', 'transaction_type', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.transaction_type} - ₹{self.amount}"
     
+    @staticmethod
+    def generate_reference_id():
+        """Unique reference ID (also used for bulk_create, which skips save())"""
+        import uuid
+        from datetime import datetime
+        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        return f"TXN-{timestamp}-{uuid.uuid4().hex[:6].upper()}"
+    
     def save(self, *args, **kwargs):
         if not self.reference_id:
             # Generate unique reference ID
-            import uuid
-            from datetime import datetime
-            timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-            self.reference_id = f"TXN-{timestamp}-{uuid.uuid4().hex[:6].upper()}"
+            self.reference_id = self.generate_reference_id()
         
         # Calculate total amount if not set
         if self.total_amount is None:
-            self.total_amount = self.amount + self.fee_amount
+            self.total_amount = Decimal(str(self.amount)) + Decimal(str(self.fee_amount))
+        
+        previous = None
+        if not self._state.adding:
+            previous = getattr(self, '_rollup_state', None)
+            if previous is None:
+                previous = Transaction.objects.filter(pk=self.pk).values_list(*self.ROLLUP_FIELDS).first()
         
         super().save(*args, **kwargs)
+        
+        # Keep the daily rollups in step (new transaction, or a status/amount change)
+        current = self.rollup_state()
+        if previous != current:
+            from .rollups import record_change
+            record_change(previous, current)
+        self._rollup_state = current
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(name in field_names for name in cls.ROLLUP_FIELDS):
+            instance._rollup_state = instance.rollup_state()
+        return instance
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        # Also runs when a deferred field is first read; don't load the others just for this
+        if not self.get_deferred_fields() & set(self.ROLLUP_FIELDS):
+            self._rollup_state = self.rollup_state()
+    
+    def rollup_state(self):
+        return tuple(getattr(self, name) for name in self.ROLLUP_FIELDS)
 
 
 class DepositRequest(models.Model):
@@ -255,6 +320,9 @@ class DepositRequest(models.Model):
         verbose_name = 'Deposit Request'
         verbose_name_plural = 'Deposit Requests'
         ordering = ['-requested_at']
+        indexes = [
+            models.Index(fields=['user', '-requested_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - ₹{self.amount} - {self.status}"
@@ -298,6 +366,9 @@ class WithdrawalRequest(models.Model):
         verbose_name = 'Withdrawal Request'
         verbose_name_plural = 'Withdrawal Requests'
         ordering = ['-requested_at']
+        indexes = [
+            models.Index(fields=['user', '-requested_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - ₹{self.amount} - {self.status}"
@@ -0,0 +1,153 @@
+"""
+Keyset (cursor) pagination for per-user history lists.
+
+Lists are ordered newest first on (timestamp, id), and each page after the
+first continues strictly after the last row of the one before:
+    
+    WHERE user_id = %s AND (created_at < %s OR (created_at = %s AND id < %s))
+    ORDER BY created_at DESC, id DESC LIMIT per_page + 1
+
+With an index on (user, timestamp, id) that reads per_page + 1 index
+entries whatever the page and however many rows the user has; OFFSET would
+read and throw away every earlier row. The cursor handed to the client is
+an opaque token of the last row's (timestamp, id).
+"""
+import base64
+import json
+from datetime import date, datetime, time, timedelta
+from urllib.parse import urlencode
+
+from django.db.models import Q
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+PER_PAGE = 25
+
+
+class Page:
+    """One page of rows and the cursor of the next one (None on the last page)"""
+    
+    def __init__(self, items, next_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+    
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+    
+    def __iter__(self):
+        return iter(self.items)
+    
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(timestamp, pk):
+    raw = json.dumps([timestamp.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """(timestamp, pk) of a cursor token.
+    
+    Raises:
+        ValueError: if the token wasn't made by encode_cursor()
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        value, pk = json.loads(raw)
+        timestamp = parse_datetime(value)
+    except (TypeError, ValueError) as exc:
+        raise ValueError('Invalid cursor') from exc
+    if timestamp is None or not isinstance(pk, int):
+        raise ValueError('Invalid cursor')
+    return timestamp, pk
+
+
+def paginate(queryset, cursor=None, field='created_at', per_page=PER_PAGE):
+    """The page of queryset after cursor (the first page if cursor is None), newest first.
+    
+    Raises:
+        ValueError: on an invalid cursor token
+    """
+    queryset = queryset.order_by(f'-{field}', '-pk')
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'pk__lt': pk}))
+    
+    rows = list(queryset[:per_page + 1])
+    if len(rows) <= per_page:
+        return Page(rows)
+    rows = rows[:per_page]
+    last = rows[-1]
+    return Page(rows, encode_cursor(getattr(last, field), last.pk))
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def filter_queryset(queryset, params, field='created_at', choices=None):
+    """Apply the list filters of a request's GET parameters.
+    
+    Dates (date_from/date_to, YYYY-MM-DD, inclusive) become a range on the
+    timestamp field itself rather than a __date lookup, so the (user,
+    timestamp, id) index still applies.
+    
+    Args:
+        params: request.GET
+        choices: {parameter: (model field, allowed values)}; other values are ignored
+    
+    Returns:
+        tuple: (filtered queryset, {parameter: value} of the filters applied)
+    """
+    applied = {}
+    for param, (model_field, allowed) in (choices or {}).items():
+        value = params.get(param)
+        if value and value in allowed:
+            queryset = queryset.filter(**{model_field: value})
+            applied[param] = value
+    
+    date_from = _parse_date(params.get('date_from'))
+    if date_from:
+        queryset = queryset.filter(**{f'{field}__gte': timezone.make_aware(datetime.combine(date_from, time.min))})
+        applied['date_from'] = date_from.isoformat()
+    date_to = _parse_date(params.get('date_to'))
+    if date_to:
+        queryset = queryset.filter(**{f'{field}__lt': timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))})
+        applied['date_to'] = date_to.isoformat()
+    return queryset, applied
+
+
+def page_for_request(request, queryset, field='created_at', choices=None, per_page=PER_PAGE):
+    """Filter queryset by the request's GET parameters and return the page at its ?cursor=.
+    
+    An invalid cursor gives the first page.
+    
+    Returns:
+        dict: template context with 'page', 'filters' and 'filter_query'
+              (the filters as a query string, to carry into the next page's URL)
+    """
+    queryset, filters = filter_queryset(queryset, request.GET, field, choices)
+    try:
+        page = paginate(queryset, request.GET.get('cursor'), field, per_page)
+    except ValueError:
+        page = paginate(queryset, None, field, per_page)
+    return {'page': page, 'filters': filters, 'filter_query': urlencode(filters)}
+
+
+def feed_response(request, rows_template, context):
+    """JSON of one page for infinite scroll: its rendered table rows and the next cursor"""
+    page = context['page']
+    return JsonResponse({
+        'success': True,
+        'html': render_to_string(rows_template, context, request=request),
+        'count': len(page),
+        'next_cursor': page.next_cursor,
+    })
@@ -8,7 +8,9 @@ import hashlib
 import hmac
 from decimal import Decimal
 from django.conf import settings
+from django.db import transaction as db_transaction
 from django.utils import timezone
+from accounts import wallet
 from transactions.models import PaymentGateway, Transaction, DepositRequest
 
 
@@ -424,22 +426,32 @@ class PaymentService:
     def complete_payment(self, transaction, payment_id, payment_details=None):
         """Mark payment as completed and credit user wallet"""
         try:
-            transaction.status = 'completed'
-            transaction.payment_id = payment_id
-            transaction.completed_at = timezone.now()
-            
-            if payment_details:
-                transaction.payment_details = json.dumps(payment_details)
-            
-            # Credit user wallet (always in INR - base currency)
-            user_profile = transaction.user.profile
-            # Use amount_in_base if available (for multi-currency), otherwise use amount
-            credit_amount = transaction.amount_in_base if transaction.amount_in_base else transaction.amount
-            user_profile.add_credits(credit_amount)
-            
-            # Update balance_after
-            transaction.balance_after = user_profile.wallet_balance
-            transaction.save()
+            with db_transaction.atomic():
+                # Claim the transaction first so a webhook racing the client-side
+                # verification cannot credit the same payment twice
+                claimed = Transaction.objects.filter(
+                    pk=transaction.pk
+                ).exclude(status='completed').update(status='completed')
+                
+                if not claimed:
+                    transaction.refresh_from_db()
+                else:
+                    transaction.status = 'completed'
+                    transaction.payment_id = payment_id
+                    transaction.completed_at = timezone.now()
+                    
+                    if payment_details:
+                        transaction.payment_details = json.dumps(payment_details)
+                    
+                    # Credit user wallet (always in INR - base currency)
+                    # Use amount_in_base if available (for multi-currency), otherwise use amount
+                    credit_amount = transaction.amount_in_base if transaction.amount_in_base else transaction.amount
+                    new_balance = wallet.credit(transaction.user_id, credit_amount, 'total_deposits')
+                    
+                    # Balances come from the guarded UPDATE, not a stale profile copy
+                    transaction.balance_before = new_balance - credit_amount
+                    transaction.balance_after = new_balance
+                    transaction.save()
             
             # Show message in user's currency if available
             if transaction.currency:
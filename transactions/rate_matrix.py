@@ -0,0 +1,194 @@
+"""
+In-process matrix of the current exchange rates.
+
+build() reads every currency and every active exchange rate in two queries
+and fills a dense N x N table of Decimal rates:
+
+- direct rates, the latest effective one per pair (what get_current_rate()
+  used to query for);
+- reverse rates, 1 / rate, where only the opposite direction is stored;
+- cross rates through the base currency (USD -> INR -> EUR) where neither
+  direction is stored, and failing that along the shortest chain of stored
+  rates (fewest multiplications, so the least rounding).
+
+So only one rate per currency against the base needs storing; every other
+pair is derived when the matrix is built, once per rate version.
+
+Each process keeps its own matrix and at most every
+CURRENCY_RATES_CHECK_SECONDS compares the version it was built from with
+the database's: the highest rate id, the latest rate and currency
+updated_at and the number of currencies (two small queries on indexes and
+a tiny table). A rate or currency added or saved in any process, by the
+admin, the API refresh or a management command, so shows up in every
+worker within that interval, with no shared cache needed; a conversion is
+otherwise a dict and list lookup. Saving or deleting a Currency or
+ExchangeRate, clearing the currency cache and update_exchange_rates_from_api()
+also drop this process's matrix at once (see transactions.signals).
+
+The matrix is also rebuilt once it reaches its valid_until (the first
+moment one of its rates expires or a scheduled rate takes effect), and in
+any case after CURRENCY_RATES_MAX_AGE seconds, which bounds how long a
+change the version can't see (an older rate deleted in another process)
+goes unnoticed.
+"""
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .currency_models import Currency, ExchangeRate
+
+
+ONE = Decimal('1.0')
+
+# {'version', 'matrix', 'checked_at'} of this process
+_state = None
+
+
+class RateMatrix:
+    """Current rate between every pair of currencies (None where no rate can be derived)"""
+    
+    def __init__(self, currencies, rates, built_at, valid_until=None):
+        self.currencies = currencies
+        self.index_by_code = {currency.code: i for i, currency in enumerate(currencies)}
+        self.index_by_id = {currency.id: i for i, currency in enumerate(currencies)}
+        self.rates = rates
+        self.built_at = built_at
+        self.valid_until = valid_until
+    
+    def index(self, currency):
+        """Row/column of a currency code or Currency (None if unknown)"""
+        if isinstance(currency, str):
+            return self.index_by_code.get(currency)
+        return self.index_by_id.get(currency.id)
+    
+    def currency(self, code):
+        """The Currency with this code, active or not (None if unknown)"""
+        i = self.index_by_code.get(code)
+        return None if i is None else self.currencies[i]
+    
+    def rate(self, from_currency, to_currency):
+        """1 from_currency = rate to_currency (codes or Currency objects); None if unknown"""
+        i, j = self.index(from_currency), self.index(to_currency)
+        if i is None or j is None:
+            return None
+        return self.rates[i][j]
+    
+    def expired(self, now=None):
+        return self.valid_until is not None and (now or timezone.now()) >= self.valid_until
+
+
+def build(now=None):
+    """Read currencies and current rates into a new RateMatrix (two queries)"""
+    now = now or timezone.now()
+    currencies = list(Currency.objects.order_by('id'))
+    index = {currency.id: i for i, currency in enumerate(currencies)}
+    size = len(currencies)
+    rates = [[None] * size for _ in range(size)]
+    for i in range(size):
+        rates[i][i] = ONE
+    
+    valid_until = None
+    direct = set()
+    rows = ExchangeRate.objects.filter(is_active=True).filter(
+        Q(effective_until__isnull=True) | Q(effective_until__gte=now)
+    ).order_by('-effective_from').values_list('from_currency_id', 'to_currency_id', 'rate', 'effective_from', 'effective_until')
+    for from_id, to_id, rate, effective_from, effective_until in rows:
+        if effective_from > now:
+            # Scheduled: the matrix is stale once it takes effect
+            valid_until = effective_from if valid_until is None else min(valid_until, effective_from)
+            continue
+        pair = (index[from_id], index[to_id])
+        if pair in direct or pair[0] == pair[1]:
+            continue  # an older rate of a pair already filled
+        direct.add(pair)
+        rates[pair[0]][pair[1]] = rate
+        if effective_until is not None:
+            valid_until = effective_until if valid_until is None else min(valid_until, effective_until)
+    
+    # Reverse rates where only the other direction is stored
+    for i, j in direct:
+        if (j, i) not in direct and rates[i][j]:
+            rates[j][i] = ONE / rates[i][j]
+    
+    # Cross rates through the base currency
+    base = next((i for i, currency in enumerate(currencies) if currency.is_base_currency), None)
+    if base is not None:
+        for i in range(size):
+            to_base = rates[i][base]
+            if to_base is None:
+                continue
+            for j in range(size):
+                if rates[i][j] is None and rates[base][j] is not None:
+                    rates[i][j] = to_base * rates[base][j]
+    
+    # Anything still missing: shortest path over the stored (and reversed) rates
+    neighbours = {}
+    for i, j in direct:
+        neighbours.setdefault(i, set()).add(j)
+        neighbours.setdefault(j, set()).add(i)
+    for i in range(size):
+        if None in rates[i]:
+            _fill_by_path(rates, i, neighbours)
+    
+    return RateMatrix(currencies, rates, now, valid_until)
+
+
+def _fill_by_path(rates, source, neighbours):
+    """Fill the missing rates of row source by breadth-first search from it"""
+    path_rate = {source: ONE}
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for node in frontier:
+            for neighbour in neighbours.get(node, ()):
+                if neighbour in path_rate or rates[node][neighbour] is None:
+                    continue
+                path_rate[neighbour] = path_rate[node] * rates[node][neighbour]
+                next_frontier.append(neighbour)
+        frontier = next_frontier
+    for target, value in path_rate.items():
+        if rates[source][target] is None:
+            rates[source][target] = value
+
+
+def _version():
+    """Changes whenever a rate or currency is added or saved, or a currency deleted"""
+    rates = ExchangeRate.objects.aggregate(last_id=Max('id'), changed=Max('updated_at'))
+    currencies = Currency.objects.aggregate(count=Count('id'), changed=Max('updated_at'))
+    return (rates['last_id'], rates['changed'], currencies['count'], currencies['changed'])
+
+
+def get():
+    """The current matrix, rebuilt when the version changed, a rate expired or it got too old"""
+    global _state
+    now = time.monotonic()
+    state = _state
+    check_every = getattr(settings, 'CURRENCY_RATES_CHECK_SECONDS', 5)
+    max_age = getattr(settings, 'CURRENCY_RATES_MAX_AGE', 300)
+    
+    fresh = state is not None and now - state['built_at'] < max_age and not state['matrix'].expired()
+    if fresh and now - state['checked_at'] < check_every:
+        return state['matrix']
+    
+    version = _version()
+    if fresh and state['version'] == version:
+        state['checked_at'] = now
+        return state['matrix']
+    
+    matrix = build()
+    _state = {'version': version, 'matrix': matrix, 'checked_at': now, 'built_at': now}
+    return matrix
+
+
+def rate(from_currency, to_currency):
+    """Current rate between two currencies (codes or Currency objects), or None"""
+    return get().rate(from_currency, to_currency)
+
+
+def invalidate():
+    """Drop this process's matrix; the others see the change at their next version check"""
+    global _state
+    _state = None
@@ -0,0 +1,186 @@
+"""
+Live exchange-rate sources and a concurrent fetcher.
+
+A RateSource adapter knows one API: its URL and how to turn the response
+into {currency code: INR per unit}. EXCHANGE_RATE_SOURCES lists the adapters
+to use, each as {'class': dotted path, **constructor arguments}, so a
+source's URL can be pointed elsewhere (a mirror, or a local stub server in
+tests) and new providers added without touching the fetcher:
+    
+    EXCHANGE_RATE_SOURCES = [
+        {'class': 'transactions.rate_sources.FrankfurterSource'},
+        {'class': 'transactions.rate_sources.ExchangeRateApiSource', 'url': 'http://127.0.0.1:8001/latest/INR'},
+    ]
+
+fetch_rates() queries every source at once on an asyncio loop (the blocking
+HTTP calls run on a small thread pool) and either returns the first valid
+answer ('first') or waits for all of them and takes the median rate per
+currency ('median'). A source that fails, times out or returns nothing
+usable is skipped.
+"""
+import asyncio
+import logging
+import statistics
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('first', 'median')
+
+DEFAULT_SOURCES = [
+    {'class': 'transactions.rate_sources.FrankfurterSource'},
+    {'class': 'transactions.rate_sources.ExchangeRateApiSource'},
+]
+
+# Not asyncio's default executor: asyncio.run() waits for that one on exit,
+# which would hold the 'first' strategy up until the slowest source answered
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='rate-source')
+
+
+class RateSource(ABC):
+    """Adapter for one rate API; subclasses set name and url and implement parse()"""
+    name = ''
+    url = ''
+    
+    def __init__(self, url=None, name=None):
+        if url:
+            self.url = url
+        if name:
+            self.name = name
+    
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.name} {self.url}>'
+    
+    @abstractmethod
+    def parse(self, data):
+        """{currency code: Decimal INR per unit} from the decoded JSON response"""
+    
+    def fetch(self, timeout):
+        """Blocking fetch (runs on the fetcher's thread pool)"""
+        import requests
+        response = requests.get(self.url, timeout=timeout)
+        response.raise_for_status()
+        return self.parse(response.json())
+
+
+class FrankfurterSource(RateSource):
+    """Frankfurter (European Central Bank data, free, no API key), quoted against EUR"""
+    name = 'frankfurter'
+    url = 'https://api.frankfurter.app/latest?from=EUR'
+    
+    def parse(self, data):
+        eur_rates = data.get('rates', {})
+        if 'INR' not in eur_rates:
+            return {}
+        inr_per_eur = Decimal(str(eur_rates['INR']))
+        # 1 CURRENCY = (inr_per_eur / rate_to_eur) INR
+        rates = {
+            code: inr_per_eur / Decimal(str(rate_to_eur))
+            for code, rate_to_eur in eur_rates.items()
+            if code != 'INR' and rate_to_eur
+        }
+        rates['EUR'] = inr_per_eur
+        return rates
+
+
+class ExchangeRateApiSource(RateSource):
+    """ExchangeRate-API (free tier), quoted from INR"""
+    name = 'exchangerate-api'
+    url = 'https://api.exchangerate-api.com/v4/latest/INR'
+    
+    def parse(self, data):
+        # API gives: 1 INR = X USD, we need: 1 USD = Y INR
+        return {
+            code: Decimal('1.0') / Decimal(str(rate_from_inr))
+            for code, rate_from_inr in data.get('rates', {}).items()
+            if code != 'INR' and rate_from_inr and rate_from_inr > 0
+        }
+
+
+def configured_sources():
+    """Adapters built from EXCHANGE_RATE_SOURCES"""
+    sources = []
+    for config in getattr(settings, 'EXCHANGE_RATE_SOURCES', DEFAULT_SOURCES):
+        options = dict(config)
+        sources.append(import_string(options.pop('class'))(**options))
+    return sources
+
+
+def _valid(rates):
+    """Only positive, finite Decimal rates"""
+    valid = {}
+    for code, rate in (rates or {}).items():
+        try:
+            if rate.is_finite() and rate > 0:
+                valid[code] = rate
+        except (AttributeError, InvalidOperation):
+            continue
+    return valid
+
+
+async def _fetch(source, timeout):
+    loop = asyncio.get_running_loop()
+    try:
+        rates = await asyncio.wait_for(loop.run_in_executor(_executor, source.fetch, timeout), timeout)
+    except Exception as exc:
+        logger.warning('Exchange rate source %s failed: %s', source.name, exc)
+        return source, {}, str(exc) or type(exc).__name__
+    rates = _valid(rates)
+    return source, rates, None if rates else 'No usable rates in response'
+
+
+async def fetch_rates_async(sources=None, strategy='first', timeout=10):
+    """Query the sources concurrently.
+    
+    Returns:
+        dict: 'rates' {code: INR per unit}, 'sources' (names of the sources used)
+              and 'errors' {source name: error} of those that failed
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f'Unknown strategy {strategy!r} (choose from {", ".join(STRATEGIES)})')
+    sources = configured_sources() if sources is None else sources
+    result = {'rates': {}, 'sources': [], 'errors': {}}
+    if not sources:
+        return result
+    
+    tasks = [asyncio.ensure_future(_fetch(source, timeout)) for source in sources]
+    if strategy == 'first':
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                source, rates, error = await next_done
+                if rates:
+                    result['rates'], result['sources'] = rates, [source.name]
+                    return result
+                result['errors'][source.name] = error
+        finally:
+            for task in tasks:
+                task.cancel()
+        return result
+    
+    answers = []
+    for source, rates, error in await asyncio.gather(*tasks):
+        if rates:
+            answers.append(rates)
+            result['sources'].append(source.name)
+        else:
+            result['errors'][source.name] = error
+    codes = set().union(*answers) if answers else set()
+    result['rates'] = {
+        code: statistics.median([rates[code] for rates in answers if code in rates])
+        for code in codes
+    }
+    return result
+
+
+def fetch_rates(sources=None, strategy=None, timeout=None):
+    """Blocking wrapper of fetch_rates_async() (strategy and timeout default to
+    EXCHANGE_RATE_STRATEGY and EXCHANGE_RATE_TIMEOUT)"""
+    strategy = strategy or getattr(settings, 'EXCHANGE_RATE_STRATEGY', 'first')
+    timeout = timeout or getattr(settings, 'EXCHANGE_RATE_TIMEOUT', 10)
+    return asyncio.run(fetch_rates_async(sources, strategy, timeout))
@@ -0,0 +1,29 @@
+from django.db import models
+
+
+class DailyTransactionRollup(models.Model):
+    """Count and amount of transactions per day, type, status and currency.
+    
+    Maintained by transactions.rollups; a key is spread over a few shard
+    rows, so totals are always the sum over shards.
+    """
+    date = models.DateField(help_text="Day the transactions were created")
+    transaction_type = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    currency_code = models.CharField(max_length=3, blank=True, default='', help_text="Empty for transactions without a currency (base currency)")
+    shard = models.PositiveSmallIntegerField(default=0)
+    
+    transaction_count = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        verbose_name = 'Daily Transaction Rollup'
+        verbose_name_plural = 'Daily Transaction Rollups'
+        ordering = ['-date', 'transaction_type', 'status']
+        unique_together = ['date', 'transaction_type', 'status', 'currency_code', 'shard']
+        indexes = [
+            models.Index(fields=['status', 'transaction_type', 'date']),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} {self.transaction_type}/{self.status} {self.currency_code or '-'}: {self.transaction_count} ({self.amount})"
@@ -0,0 +1,179 @@
+"""
+Daily transaction totals.
+
+DailyTransactionRollup holds a count and amount per (day created, type,
+status, currency). Transaction.save() and Transaction.objects.bulk_create()
+add new transactions and move them between rows when their status (or
+amount) changes; update_status() does the same for bulk status changes.
+Totals and charts then sum a few rows per day instead of scanning the
+Transaction table.
+
+Like the round counters, each write goes to one of TRANSACTION_ROLLUP_SHARDS
+rows picked at random, so concurrent payments and game entries don't
+serialize on today's row; readers always sum over the shards.
+rebuild() recomputes days from the Transaction table.
+"""
+import random
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .currency_models import Currency
+from .models import DailyTransactionRollup, Transaction
+
+
+_currency_codes = {}
+
+
+def shard_count():
+    """Number of rows each (day, type, status, currency) is spread over"""
+    return max(1, getattr(settings, 'TRANSACTION_ROLLUP_SHARDS', 8))
+
+
+def _currency_code(currency_id):
+    if currency_id is None:
+        return ''
+    if currency_id not in _currency_codes:
+        _currency_codes.update(Currency.objects.values_list('id', 'code'))
+    return _currency_codes.get(currency_id, '')
+
+
+def _key(state):
+    """Rollup key and amount of a Transaction.rollup_state() tuple"""
+    created_at, transaction_type, status, currency_id, amount = state
+    return (timezone.localdate(created_at), transaction_type, status, _currency_code(currency_id)), Decimal(str(amount))
+
+
+def apply(deltas):
+    """Add to the rollups in two statements.
+    
+    Args:
+        deltas: {(date, transaction_type, status, currency_code): (count, amount)}
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta[0] or delta[1]}
+    if not deltas:
+        return
+    shard = random.randrange(shard_count())
+    
+    DailyTransactionRollup.objects.bulk_create([
+        DailyTransactionRollup(date=day, transaction_type=transaction_type, status=status, currency_code=code, shard=shard)
+        for day, transaction_type, status, code in deltas
+    ], ignore_conflicts=True)
+    
+    conditions = [
+        (Q(date=day, transaction_type=transaction_type, status=status, currency_code=code), delta)
+        for (day, transaction_type, status, code), delta in deltas.items()
+    ]
+    DailyTransactionRollup.objects.filter(shard=shard).filter(reduce(or_, [q for q, _ in conditions])).update(
+        transaction_count=F('transaction_count') + Case(
+            *[When(q, then=Value(count)) for q, (count, _) in conditions],
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+        amount=F('amount') + Case(
+            *[When(q, then=Value(amount)) for q, (_, amount) in conditions],
+            default=Value(Decimal('0')),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+    )
+
+
+def _add(deltas, state, sign):
+    key, amount = _key(state)
+    count, total = deltas.get(key, (0, Decimal('0.00')))
+    deltas[key] = (count + sign, total + sign * amount)
+
+
+def record_change(before, after):
+    """Move one transaction's contribution from its old rollup state to the new one (None = absent)"""
+    deltas = {}
+    if before is not None:
+        _add(deltas, before, -1)
+    if after is not None:
+        _add(deltas, after, 1)
+    apply(deltas)
+
+
+def record_created(transactions):
+    """Count newly inserted transactions"""
+    deltas = {}
+    for txn in transactions:
+        _add(deltas, txn.rollup_state(), 1)
+    apply(deltas)
+
+
+def update_status(queryset, status, **fields):
+    """queryset.update(status=status, **fields) that also moves the rollups.
+    
+    Returns:
+        int: number of transactions changed
+    """
+    with db_transaction.atomic():
+        rows = list(
+            queryset.select_for_update().exclude(status=status).values_list('pk', *Transaction.ROLLUP_FIELDS)
+        )
+        if not rows:
+            return 0
+        updated = Transaction.objects.filter(pk__in=[row[0] for row in rows]).update(status=status, **fields)
+        
+        deltas = {}
+        for pk, created_at, transaction_type, old_status, currency_id, amount in rows:
+            _add(deltas, (created_at, transaction_type, old_status, currency_id, amount), -1)
+            _add(deltas, (created_at, transaction_type, status, currency_id, amount), 1)
+        apply(deltas)
+    return updated
+
+
+def totals(status='completed', **filters):
+    """{transaction_type: (count, amount)} over all days (or the filtered ones)"""
+    rows = DailyTransactionRollup.objects.filter(status=status, **filters).values('transaction_type').annotate(
+        count=Sum('transaction_count'), total=Sum('amount'),
+    )
+    return {row['transaction_type']: (row['count'], row['total']) for row in rows}
+
+
+def daily(first_day, last_day, status='completed', transaction_types=None):
+    """{(date, transaction_type): amount} for the days [first_day, last_day]"""
+    rows = DailyTransactionRollup.objects.filter(status=status, date__gte=first_day, date__lte=last_day)
+    if transaction_types is not None:
+        rows = rows.filter(transaction_type__in=transaction_types)
+    rows = rows.values('date', 'transaction_type').annotate(total=Sum('amount'))
+    return {(row['date'], row['transaction_type']): row['total'] for row in rows}
+
+
+def rebuild(first_day, last_day):
+    """Recompute the rollups of the days [first_day, last_day] from the Transaction table.
+    
+    Returns:
+        int: rollup rows written
+    """
+    since = timezone.make_aware(datetime.combine(first_day, time.min))
+    until = timezone.make_aware(datetime.combine(last_day + timedelta(days=1), time.min))
+    
+    with db_transaction.atomic():
+        rows = Transaction.objects.filter(created_at__gte=since, created_at__lt=until).annotate(
+            day=TruncDate('created_at'),
+        ).values('day', 'transaction_type', 'status', 'currency__code').annotate(
+            count=Count('pk'), total=Sum('amount'),
+        )
+        rollups = [
+            DailyTransactionRollup(
+                date=row['day'],
+                transaction_type=row['transaction_type'],
+                status=row['status'],
+                currency_code=row['currency__code'] or '',
+                transaction_count=row['count'],
+                amount=row['total'],
+            )
+            for row in rows
+        ]
+        DailyTransactionRollup.objects.filter(date__gte=first_day, date__lte=last_day).delete()
+        DailyTransactionRollup.objects.bulk_create(rollups, batch_size=1000)
+    return len(rollups)
@@ -0,0 +1,22 @@
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal
+
+from . import rate_matrix
+from .currency_models import Currency, ExchangeRate
+
+
+# Sent by Transaction.objects.bulk_create(), which (unlike save()) sends no post_save.
+# Arguments: sender (the Transaction class), transactions (the inserted instances)
+transactions_bulk_created = Signal()
+
+
+def _rates_changed(sender, **kwargs):
+    # After commit, so a rebuild can't read the old rows again
+    db_transaction.on_commit(rate_matrix.invalidate)
+
+
+def connect():
+    for model in (Currency, ExchangeRate):
+        post_save.connect(_rates_changed, sender=model, dispatch_uid=f'rate_matrix_save_{model._meta.label}')
+        post_delete.connect(_rates_changed, sender=model, dispatch_uid=f'rate_matrix_delete_{model._meta.label}')
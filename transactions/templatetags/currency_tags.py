@@ -1,5 +1,6 @@
 from django import template
 from decimal import Decimal
+from transactions import rate_matrix
 from transactions.currency_utils import CurrencyManager
 
 register = template.Library()
@@ -29,10 +30,10 @@ def convert_currency(amount, currencies):
     Usage: {{ amount|convert_currency:"USD,EUR" }}
     """
     try:
-        from_code, to_code = currencies.split(',')
-        converted = CurrencyManager.convert(amount, from_code.strip(), to_code.strip())
-        to_currency = CurrencyManager.get_currency_by_code(to_code.strip())
-        return to_currency.format_amount(converted) if to_currency else converted
+        from_code, to_code = [code.strip() for code in currencies.split(',')]
+        converted = CurrencyManager.convert_many([amount], from_code, to_code)[0]
+        to_currency = rate_matrix.get().currency(to_code)
+        return to_currency.format_amount(converted) if to_currency and to_currency.is_active else converted
     except Exception as e:
         return amount
 
@@ -46,25 +47,21 @@ def user_currency(user):
     return CurrencyManager.get_user_currency(user)
 
 
-@register.simple_tag(name='format_user_amount')
-def format_user_amount(amount, user, from_currency='INR'):
+@register.simple_tag(name='format_user_amount', takes_context=True)
+def format_user_amount(context, amount, user, from_currency='INR'):
     """
     Format amount in user's preferred currency with conversion
     Usage: {% format_user_amount 1000 request.user %}
     
+    The user's currency and rate are looked up once per request (see
+    CurrencyManager.viewer_conversion), so list rows only multiply and format.
+    
     Args:
         amount: The amount to format
         user: The user object
         from_currency: The currency the amount is currently in (default: 'INR')
     """
-    currency = CurrencyManager.get_user_currency(user)
-    if currency and currency.code != from_currency:
-        # Convert from base currency (INR) to user's currency
-        converted_amount = CurrencyManager.convert(amount, from_currency, currency.code)
-        return currency.format_amount(converted_amount)
-    elif currency:
-        return currency.format_amount(amount)
-    return f'₹{amount}'
+    return CurrencyManager.format_for_user(amount, user, from_currency, context.get('request'))
 
 
 @register.inclusion_tag('transactions/currency_selector.html')
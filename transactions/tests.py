@@ -1,3 +1,156 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from . import currency_utils, rate_matrix, rate_sources
+from .currency_models import Currency, ExchangeRate
+
+
+@override_settings(CURRENCY_RATES_CHECK_SECONDS=0)
+class RateMatrixTests(TestCase):
+    
+    def setUp(self):
+        rate_matrix.invalidate()
+        currencies = {
+            code: Currency.objects.create(code=code, name=code, symbol=code, is_base_currency=code == 'INR')
+            for code in ('INR', 'USD', 'EUR', 'GBP')
+        }
+        since = timezone.now() - timezone.timedelta(days=1)
+        for code, rate in (('USD', '80'), ('EUR', '90')):
+            ExchangeRate.objects.create(
+                from_currency=currencies[code], to_currency=currencies['INR'], rate=Decimal(rate), effective_from=since,
+            )
+        # GBP only against USD: reachable by a chain of rates, not through INR directly
+        ExchangeRate.objects.create(
+            from_currency=currencies['GBP'], to_currency=currencies['USD'], rate=Decimal('1.25'), effective_from=since,
+        )
+        self.currencies = currencies
+    
+    def tearDown(self):
+        rate_matrix.invalidate()
+    
+    def test_direct_reverse_and_cross_rates(self):
+        self.assertEqual(rate_matrix.rate('USD', 'INR'), Decimal('80'))
+        self.assertEqual(rate_matrix.rate('INR', 'USD'), Decimal('1') / Decimal('80'))
+        self.assertEqual(rate_matrix.rate('USD', 'EUR'), Decimal('80') * (Decimal('1') / Decimal('90')))
+        self.assertEqual(rate_matrix.rate('GBP', 'INR'), Decimal('100'))
+        self.assertIsNone(rate_matrix.rate('USD', 'XYZ'))
+    
+    def test_new_rate_replaces_the_old_one(self):
+        self.assertEqual(rate_matrix.rate('USD', 'INR'), Decimal('80'))
+        ExchangeRate.objects.create(
+            from_currency=self.currencies['USD'], to_currency=self.currencies['INR'], rate=Decimal('85'),
+        )
+        self.assertEqual(ExchangeRate.get_current_rate('USD', 'INR'), Decimal('85'))
+    
+    def test_update_noticed_without_invalidation(self):
+        """Another process's change reaches this one through the DB version"""
+        self.assertEqual(rate_matrix.rate('USD', 'INR'), Decimal('80'))
+        # update() sends no signal, as for a write from another process
+        ExchangeRate.objects.filter(from_currency__code='USD').update(rate=Decimal('82'), updated_at=timezone.now())
+        self.assertEqual(rate_matrix.rate('USD', 'INR'), Decimal('82'))
+
+
+class StubRatesHandler(BaseHTTPRequestHandler):
+    """ExchangeRate-API style answers: /<delay>/<INR to USD>, or /broken"""
+    
+    def do_GET(self):
+        if self.path == '/broken':
+            self.send_response(500)
+            self.end_headers()
+            return
+        delay, usd = self.path.strip('/').split('/')
+        time.sleep(float(delay))
+        body = json.dumps({'base': 'INR', 'rates': {'INR': 1, 'USD': float(usd)}}).encode()
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up waiting (timeout test)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class RateSourcesTests(SimpleTestCase):
+    """fetch_rates() against a local stub HTTP server"""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubRatesHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+    
+    def source(self, name, path):
+        return {
+            'class': 'transactions.rate_sources.ExchangeRateApiSource',
+            'name': name,
+            'url': f'http://127.0.0.1:{self.server.server_port}{path}',
+        }
+    
+    def test_first_returns_before_the_slow_source(self):
+        sources = [self.source('slow', '/2/0.02'), self.source('fast', '/0/0.01'), self.source('broken', '/broken')]
+        with override_settings(EXCHANGE_RATE_SOURCES=sources):
+            started = time.monotonic()
+            result = rate_sources.fetch_rates(strategy='first', timeout=5)
+            elapsed = time.monotonic() - started
+        
+        self.assertLess(elapsed, 1)
+        self.assertEqual(result['sources'], ['fast'])
+        self.assertEqual(result['rates']['USD'], Decimal('100'))
+    
+    def test_median_per_currency(self):
+        sources = [
+            self.source('high', '/0/0.01'),
+            self.source('middle', '/0.2/0.0125'),
+            self.source('low', '/0.1/0.02'),
+            self.source('broken', '/broken'),
+        ]
+        with override_settings(EXCHANGE_RATE_SOURCES=sources):
+            result = rate_sources.fetch_rates(strategy='median', timeout=5)
+        
+        self.assertEqual(result['rates']['USD'], Decimal('80'))
+        self.assertEqual(sorted(result['sources']), ['high', 'low', 'middle'])
+        self.assertEqual(list(result['errors']), ['broken'])
+    
+    def test_errors_name_failed_and_timed_out_sources(self):
+        sources = [self.source('slow', '/2/0.02'), self.source('broken', '/broken')]
+        with override_settings(EXCHANGE_RATE_SOURCES=sources):
+            result = rate_sources.fetch_rates(strategy='median', timeout=0.5)
+        
+        self.assertEqual(result['rates'], {})
+        self.assertEqual(sorted(result['errors']), ['broken', 'slow'])
+    
+    def test_source_without_parse_cannot_be_built(self):
+        class Incomplete(rate_sources.RateSource):
+            name = 'incomplete'
+        
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+class RefreshInBackgroundTests(SimpleTestCase):
+    
+    def test_lock_released_when_the_thread_fails_to_start(self):
+        with mock.patch.object(threading.Thread, 'start', side_effect=RuntimeError("can't start new thread")):
+            with self.assertRaises(RuntimeError):
+                currency_utils.refresh_in_background()
+        
+        self.assertTrue(currency_utils._refresh_lock.acquire(blocking=False))
+        currency_utils._refresh_lock.release()
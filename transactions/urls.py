@@ -6,6 +6,7 @@ app_name = 'transactions'
 urlpatterns = [
     # Transaction History
     path('history/', views.transaction_history, name='transaction_history'),
+    path('history/feed/', views.transaction_history_feed, name='transaction_history_feed'),
     
     # Add Credits (New Payment Integration)
     path('add-credits/', views.add_credits, name='add_credits'),
@@ -19,7 +20,9 @@ urlpatterns = [
     
     # Legacy/Admin Requests
     path('deposits/', views.deposit_requests, name='deposit_requests'),
+    path('deposits/feed/', views.deposit_requests_feed, name='deposit_requests_feed'),
     path('withdrawals/', views.withdrawal_requests, name='withdrawal_requests'),
+    path('withdrawals/feed/', views.withdrawal_requests_feed, name='withdrawal_requests_feed'),
     
     # Webhook Endpoints (for payment gateway callbacks)
     path('webhooks/razorpay/', views.razorpay_webhook, name='razorpay_webhook'),
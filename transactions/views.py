@@ -7,20 +7,46 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 import json
 from .models import Transaction, DepositRequest, WithdrawalRequest, PaymentGateway
+from . import pagination
+from .currency_utils import CurrencyManager
 from .payment_service import PaymentService, get_available_gateways, verify_and_complete_payment
 
 
+TRANSACTION_FILTERS = {
+    'type': ('transaction_type', [value for value, _ in Transaction.TRANSACTION_TYPES]),
+    'status': ('status', [value for value, _ in Transaction.STATUS_CHOICES]),
+}
+
+
+def _transaction_page(request):
+    context = pagination.page_for_request(
+        request,
+        Transaction.objects.filter(user=request.user).select_related('currency'),
+        'created_at',
+        TRANSACTION_FILTERS,
+    )
+    context['transactions'] = context['page']
+    CurrencyManager.format_column(context['page'], 'balance_after', request.user, request=request)
+    return context
+
+
 @login_required
 def transaction_history(request):
-    """View all transactions"""
-    transactions = Transaction.objects.filter(user=request.user).order_by('-created_at')
-    
-    context = {
-        'transactions': transactions,
-    }
+    """View transactions, newest first, a page at a time (?cursor=, filters ?type=&status=&date_from=&date_to=)"""
+    context = _transaction_page(request)
+    context.update({
+        'transaction_types': Transaction.TRANSACTION_TYPES,
+        'status_choices': Transaction.STATUS_CHOICES,
+    })
     return render(request, 'transactions/transaction_history.html', context)
 
 
+@login_required
+def transaction_history_feed(request):
+    """Next page of transaction history as JSON (infinite scroll)"""
+    return pagination.feed_response(request, 'transactions/transaction_history_rows.html', _transaction_page(request))
+
+
 @login_required
 def add_credits(request):
     """Add credits using payment gateway - Direct payment integration"""
@@ -345,28 +371,56 @@ def withdraw_credits(request):
     return render(request, 'transactions/withdraw_credits.html')
 
 
+def _deposit_page(request):
+    context = pagination.page_for_request(
+        request,
+        DepositRequest.objects.filter(user=request.user),
+        'requested_at',
+        {'status': ('status', [value for value, _ in DepositRequest.STATUS_CHOICES])},
+    )
+    context['deposits'] = context['page']
+    return context
+
+
 @login_required
 def deposit_requests(request):
-    """View user's deposit requests"""
-    deposits = DepositRequest.objects.filter(user=request.user).order_by('-requested_at')
-    
-    context = {
-        'deposits': deposits,
-    }
+    """View user's deposit requests, a page at a time"""
+    context = _deposit_page(request)
+    context['status_choices'] = DepositRequest.STATUS_CHOICES
     return render(request, 'transactions/deposit_requests.html', context)
 
 
+@login_required
+def deposit_requests_feed(request):
+    """Next page of deposit requests as JSON (infinite scroll)"""
+    return pagination.feed_response(request, 'transactions/deposit_request_rows.html', _deposit_page(request))
+
+
+def _withdrawal_page(request):
+    context = pagination.page_for_request(
+        request,
+        WithdrawalRequest.objects.filter(user=request.user),
+        'requested_at',
+        {'status': ('status', [value for value, _ in WithdrawalRequest.STATUS_CHOICES])},
+    )
+    context['withdrawals'] = context['page']
+    return context
+
+
 @login_required
 def withdrawal_requests(request):
-    """View user's withdrawal requests"""
-    withdrawals = WithdrawalRequest.objects.filter(user=request.user).order_by('-requested_at')
-    
-    context = {
-        'withdrawals': withdrawals,
-    }
+    """View user's withdrawal requests, a page at a time"""
+    context = _withdrawal_page(request)
+    context['status_choices'] = WithdrawalRequest.STATUS_CHOICES
     return render(request, 'transactions/withdrawal_requests.html', context)
 
 
+@login_required
+def withdrawal_requests_feed(request):
+    """Next page of withdrawal requests as JSON (infinite scroll)"""
+    return pagination.feed_response(request, 'transactions/withdrawal_request_rows.html', _withdrawal_page(request))
+
+
 # ==================== WEBHOOK HANDLERS ====================
 
 @csrf_exempt